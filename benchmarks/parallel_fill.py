@@ -0,0 +1,89 @@
+"""Бенчмарк параллельной заливки многоугольников: масштабирование по числу процессов.
+
+Запуск из корня репозитория: python -m benchmarks.parallel_fill --size 4096 --polygons 2000
+С --output растр пишется в файл .npy через memmap (заливка полосами строк, без копии в памяти).
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from framebuffer import Framebuffer, MappedFramebuffer
+from kernels import scanline_spans
+from polygon import PolygonEditor, FILL_COLORS
+
+
+def random_polygons(count, size, vertices, seed=0):
+    rng = np.random.default_rng(seed)
+    polygons = []
+    for _ in range(count):
+        center = rng.uniform(0, size, 2)
+        radius = rng.uniform(size * 0.01, size * 0.1)
+        angles = np.sort(rng.uniform(0, 2 * np.pi, vertices))
+        radii = radius * rng.uniform(0.5, 1.0, vertices)
+        polygons.append(np.column_stack((center[0] + radii * np.cos(angles),
+                                         center[1] + radii * np.sin(angles))))
+    return polygons
+
+
+def unclipped_fill(polygons, colors, size):
+    """Последовательная заливка без предварительного отсечения по растру — эталон для проверки."""
+    target = Framebuffer(size, size)
+    for points, color in zip(polygons, colors):
+        target.fill_spans(*scanline_spans(points, 0, size), FILL_COLORS[color])
+    return target.pixels
+
+
+def check_clipping(editor, size):
+    """Отсечение по растру перед заливкой не должно менять пиксели: многоугольники вокруг краев растра."""
+    rng = np.random.default_rng(2)
+    polygons = [rng.uniform(-0.5, 1.5, (rng.integers(3, 12), 2)) * size for _ in range(500)]
+    colors = list(rng.choice(list(FILL_COLORS), len(polygons)))
+    pixels = editor.parallel_scanline_fill(polygons, size, size, colors, workers=1)
+    if not np.array_equal(pixels, unclipped_fill(polygons, colors, size)):
+        raise SystemExit("Заливка с отсечением по растру отличается от заливки без отсечения")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=4096, help="сторона растра в пикселях")
+    parser.add_argument("--polygons", type=int, default=2000)
+    parser.add_argument("--vertices", type=int, default=16)
+    parser.add_argument("--split", choices=["bands", "polygons"], default="bands")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="файл .npy или сырой растр, в который идет заливка через memmap")
+    args = parser.parse_args()
+
+    editor = PolygonEditor()
+    polygons = random_polygons(args.polygons, args.size, args.vertices)
+    colors = list(np.random.default_rng(1).choice(["black", "green", "blue", "yellow", "purple"], len(polygons)))
+    counts = sorted({1, 2, 4, 8, 16, os.cpu_count() or 1})
+    counts = [n for n in counts if n <= (os.cpu_count() or 1)]
+
+    check_clipping(editor, 128)
+    reference = None
+    baseline = None
+    print(f"{'процессы':>9} {'время, с':>10} {'ускорение':>10}")
+    for workers in counts:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            if args.output:
+                with MappedFramebuffer(args.output, args.size, args.size) as target:
+                    editor.parallel_scanline_fill(polygons, colors=colors, workers=workers, split=args.split,
+                                                  target=target)
+                    pixels = np.array(target.pixels[::64, ::64])
+            else:
+                pixels = editor.parallel_scanline_fill(polygons, args.size, args.size, colors,
+                                                       workers=workers, split=args.split)
+            best = min(best, time.perf_counter() - start)
+        if reference is None:
+            reference, baseline = pixels, best
+        elif not np.array_equal(pixels, reference):
+            raise SystemExit(f"Результат для {workers} процессов отличается от последовательного")
+        print(f"{workers:>9} {best:>10.3f} {baseline / best:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""Бенчмарки всех алгоритмов растеризации и геометрии с разделением времени вычислений и matplotlib.
+
+Запуск из корня репозитория:
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --groups lines conics --compare results.json
+"""
+import argparse
+import functools
+import gc
+import json
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+from matplotlib import collections, image, lines as mlines, patches, text
+from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from lines import LineDrawer
+from conics import ConicDrawer
+from curves import CurveDrawer
+from cube import CubeDrawer, compose_transform, transform_key, DEFAULT_TRANSFORM_PARAMS
+from polygon import PolygonEditor
+from voronoi_delaunay import VoronoiDelaunay
+
+POLYGON_MODES = ["Нормали", "Грэхем", "Джарвис", "Пересечения", "Проверка точки", "Простая развертка",
+                 "Развертка с активными ребрами", "Заливка с затравкой", "Построчная заливка", "Отсечение"]
+
+
+class ArtistTimer:
+    """Время, проведенное в matplotlib: создание художников и методы Axes, которые их добавляют."""
+
+    AXES_METHODS = ("plot", "scatter", "imshow", "fill", "text", "add_patch", "add_collection", "add_line",
+                    "add_artist", "add_image", "clear", "cla", "set_xticks", "set_yticks", "set_xticklabels",
+                    "set_yticklabels", "set_xlim", "set_ylim", "set_aspect")
+    ARTIST_CLASSES = (patches.Patch, mlines.Line2D, collections.Collection, image.AxesImage, text.Text)
+
+    def __init__(self):
+        self.elapsed = 0.0
+        self._depth = 0
+        self._originals = []
+
+    def _wrap(self, owner, name):
+        original = owner.__dict__[name]
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            # Вложенные вызовы (plot создает Line2D) учитываются один раз, на внешнем уровне
+            if self._depth:
+                return original(*args, **kwargs)
+            self._depth += 1
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.elapsed += time.perf_counter() - start
+                self._depth -= 1
+
+        setattr(owner, name, wrapper)
+        self._originals.append((owner, name, original))
+
+    def __enter__(self):
+        self.elapsed = 0.0
+        for name in self.AXES_METHODS:
+            owner = next(cls for cls in Axes.__mro__ if name in cls.__dict__)
+            self._wrap(owner, name)
+        for cls in self.ARTIST_CLASSES:
+            self._wrap(cls, "__init__")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for owner, name, original in reversed(self._originals):
+            setattr(owner, name, original)
+        self._originals = []
+
+
+class Workload:
+    def __init__(self, group, name, params, run):
+        self.group = group
+        self.name = name
+        self.params = params
+        self.run = run
+
+    @property
+    def key(self):
+        params = ",".join(f"{key}={value}" for key, value in self.params.items())
+        return f"{self.group}/{self.name}[{params}]"
+
+
+def random_polygon(count, seed=0):
+    """Звездный многоугольник с count вершинами в области 0..100, координаты целые, как при вводе в GUI."""
+    rng = np.random.default_rng(seed)
+    angles = np.sort(rng.uniform(0, 2 * np.pi, count))
+    radii = rng.uniform(15, 45, count)
+    # draw_line_on_pixel_map шагает по целым координатам и не завершается на дробных вершинах
+    points = np.rint(np.column_stack((50 + radii * np.cos(angles), 50 + radii * np.sin(angles))))
+    unique = [tuple(p) for p in dict.fromkeys(map(tuple, points.tolist()))]
+    return [(float(x), float(y)) for x, y in unique]
+
+
+def random_sites(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [(float(x), float(y)) for x, y in rng.uniform(5, 95, (count, 2)).round(3)]
+
+
+def line_workloads(cell_size, lengths):
+    drawer = LineDrawer()
+    for method, name in ((1, "DDA"), (2, "Bresenham"), (3, "Wu")):
+        for length in lengths:
+            run = functools.partial(drawer.draw_line, method, 0, 0, length, length * 0.37, cell_size)
+            yield Workload("lines", name, {"length": length},
+                           lambda fig, ax, run=run: run(fig, ax))
+    rng = np.random.default_rng(0)
+    for count in lengths:
+        segments = rng.uniform(0, 100 / cell_size, (count, 2, 2))
+        yield Workload("lines", "Wu batch", {"lines": count},
+                       lambda fig, ax, s=segments: drawer.draw_wu_lines(s, cell_size, ax))
+        walk = np.clip(np.cumsum(rng.normal(0, 1, (count * 10, 2)), axis=0) + 50, 0, 100) / cell_size
+        for join in ("miter", "round"):
+            yield Workload("lines", f"stroke {join}", {"vertices": count * 10},
+                           lambda fig, ax, p=walk, j=join: drawer.draw_polyline(p, 3, cell_size, ax, join=j))
+
+
+def conic_workloads(cell_size, radii):
+    drawer = ConicDrawer()
+    for radius in radii:
+        yield Workload("conics", "Circle", {"radius": radius},
+                       lambda fig, ax, r=radius: drawer.draw_conic("Circle", 50, 50, r, 0, 0, cell_size, fig, ax))
+        yield Workload("conics", "Ellipse", {"radius": radius},
+                       lambda fig, ax, r=radius: drawer.draw_conic("Ellipse", 50, 50, r, r / 2, 0, cell_size, fig, ax))
+        yield Workload("conics", "Hyperbola", {"radius": radius},
+                       lambda fig, ax, r=radius: drawer.draw_conic("Hyperbola", 50, 50, r / 4, r / 4, 0,
+                                                                   cell_size, fig, ax))
+        yield Workload("conics", "Parabola", {"radius": radius},
+                       lambda fig, ax, r=radius: drawer.draw_conic("Parabola", 50, 50, 0, 0, r / 10,
+                                                                   cell_size, fig, ax))
+
+
+def curve_workloads(cell_size, point_counts, steps):
+    drawer = CurveDrawer()
+    rng = np.random.default_rng(0)
+    for count in point_counts:
+        points = [tuple(p) for p in rng.uniform(0, 100 / cell_size, (count, 2))]
+        for step in steps:
+            params = {"points": count, "steps": step}
+            yield Workload("curves", "BSpline", params,
+                           lambda fig, ax, p=points, s=step: drawer.bspline_curve(p, cell_size, ax, steps=s))
+            yield Workload("curves", "BezierN", params,
+                           lambda fig, ax, p=points, s=step: drawer.bezier_n_curve(p, cell_size, ax, steps=s))
+            yield Workload("curves", "NURBS", params,
+                           lambda fig, ax, p=points, s=step: drawer.nurbs_curve(p, cell_size, ax, steps=s))
+        yield Workload("curves", "BSplineAdaptive", {"points": count},
+                       lambda fig, ax, p=points: drawer.draw_curve("BSpline", p, cell_size, ax))
+
+
+def cube_workloads(cell_size, frame_counts):
+    drawer = CubeDrawer()
+    params = {"rotate_x": 30, "rotate_y": 40, "translate_x": 0.2, "scale": 1.2}
+    yield Workload("cube", "draw", {}, lambda fig, ax: drawer.draw_cube(cell_size, ax, params))
+    yield Workload("cube", "draw_solid", {}, lambda fig, ax: drawer.draw_cube(cell_size, ax, params, solid=True))
+    yield Workload("cube", "draw_antialias", {},
+                   lambda fig, ax: drawer.draw_cube(cell_size, ax, params, antialias=True))
+    for frames in frame_counts:
+        def transform(fig, ax, frames=frames):
+            pose = dict(DEFAULT_TRANSFORM_PARAMS)
+            pose.update(params)
+            for frame in range(frames):
+                pose["rotate_y"] = frame % 360
+                drawer.apply_composed(compose_transform(transform_key(pose)))
+                drawer.project()
+        yield Workload("cube", "transform", {"frames": frames}, transform)
+
+
+def polygon_workloads(cell_size, vertex_counts):
+    editor = PolygonEditor()
+    for count in vertex_counts:
+        points = random_polygon(count)
+        for mode in POLYGON_MODES:
+            if mode == "Пересечения":
+                extra = [(0.0, 50.0), (100.0, 55.0)]
+            elif mode == "Проверка точки":
+                extra = [(50.0, 50.0)]
+            elif mode == "Отсечение":
+                extra = [(20.0, 30.0), (80.0, 70.0)]
+            else:
+                extra = []
+            yield Workload("polygon", mode, {"vertices": count},
+                           lambda fig, ax, p=points, e=extra, m=mode:
+                           editor.draw_polygon(p, e, cell_size, ax, mode=m))
+    # Пакетное отсечение отрезков: восьмиугольник (Кирус — Бек) и прямоугольник (Лианг — Барски)
+    octagon = [(50 + 40 * np.cos(a), 50 + 40 * np.sin(a)) for a in np.arange(8) * np.pi / 4]
+    rectangle = [(10.0, 20.0), (90.0, 20.0), (90.0, 80.0), (10.0, 80.0)]
+    for count in vertex_counts:
+        segments = np.random.default_rng(count).uniform(0, 100, (count * 10000, 4))
+        for name, window in (("Кирус — Бек", octagon), ("Лианг — Барски", rectangle)):
+            yield Workload("polygon", name, {"segments": len(segments)},
+                           lambda fig, ax, s=segments, w=window: editor.clip_segments(s, w))
+
+
+def voronoi_workloads(cell_size, site_counts):
+    builder = VoronoiDelaunay()
+    for count in site_counts:
+        sites = random_sites(count)
+        for mode in ("delaunay", "voronoi"):
+            yield Workload("voronoi", mode, {"sites": count},
+                           lambda fig, ax, s=sites, m=mode: builder.draw(s, cell_size, ax, mode=m))
+
+
+def build_workloads(args):
+    groups = {
+        "lines": lambda: line_workloads(args.cell_size, [10, 100, 1000] if not args.quick else [10, 100]),
+        "conics": lambda: conic_workloads(args.cell_size, [10, 100, 1000] if not args.quick else [10, 100]),
+        "curves": lambda: curve_workloads(args.cell_size, [4, 16, 64] if not args.quick else [4, 16],
+                                          [50, 500] if not args.quick else [50]),
+        "cube": lambda: cube_workloads(args.cell_size, [100, 1000] if not args.quick else [100]),
+        "polygon": lambda: polygon_workloads(args.cell_size, [8, 32, 128] if not args.quick else [8, 32]),
+        "voronoi": lambda: voronoi_workloads(args.cell_size, [10, 50, 200] if not args.quick else [10, 50]),
+    }
+    for group in args.groups or groups:
+        yield from groups[group]()
+
+
+def measure(workload, repeat):
+    """Лучшее из repeat измерений: вычисления, создание художников matplotlib и отрисовка холста Agg."""
+    fig = Figure(figsize=(6, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    best = None
+    for _ in range(repeat):
+        ax.clear()
+        gc.collect()
+        with ArtistTimer() as timer:
+            start = time.perf_counter()
+            workload.run(fig, ax)
+            total = time.perf_counter() - start
+        start = time.perf_counter()
+        fig.canvas.draw()
+        render = time.perf_counter() - start
+        sample = {"compute": total - timer.elapsed, "artist": timer.elapsed, "render": render, "total": total}
+        if best is None or sample["total"] < best["total"]:
+            best = sample
+    return best
+
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "matplotlib": matplotlib.__version__,
+        "platform": platform.platform(),
+    }
+
+
+def compare(results, baseline_path, threshold):
+    """Сравнить с прошлым запуском; вернуть ключи нагрузок, где вычисления замедлились больше threshold раз."""
+    with open(baseline_path, encoding="utf-8") as file:
+        baseline = {entry["key"]: entry for entry in json.load(file)["results"]}
+    regressions = []
+    print(f"\n{'нагрузка':<60} {'было, мс':>10} {'стало, мс':>10} {'отношение':>10}")
+    for entry in results:
+        old = baseline.get(entry["key"])
+        if old is None:
+            continue
+        ratio = entry["compute"] / max(old["compute"], 1e-9)
+        flag = " !" if ratio > threshold else ""
+        print(f"{entry['key']:<60} {old['compute'] * 1e3:>10.2f} {entry['compute'] * 1e3:>10.2f} {ratio:>10.2f}{flag}")
+        if ratio > threshold:
+            regressions.append(entry["key"])
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", nargs="*", choices=["lines", "conics", "curves", "cube", "polygon", "voronoi"])
+    parser.add_argument("--cell-size", type=int, default=10, help="размер клетки; 1 делает сетку графика главной затратой")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="только малые размеры нагрузок")
+    parser.add_argument("--output", help="файл JSON для результатов")
+    parser.add_argument("--compare", help="файл JSON прошлого запуска для поиска регрессий")
+    parser.add_argument("--threshold", type=float, default=1.25, help="допустимое замедление вычислений")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'нагрузка':<60} {'вычисл., мс':>12} {'matplotlib, мс':>15} {'отрисовка, мс':>14}")
+    for workload in build_workloads(args):
+        timing = measure(workload, args.repeat)
+        results.append({"key": workload.key, "group": workload.group, "name": workload.name,
+                        "params": workload.params, **timing})
+        print(f"{workload.key:<60} {timing['compute'] * 1e3:>12.2f} {timing['artist'] * 1e3:>15.2f} "
+              f"{timing['render'] * 1e3:>14.2f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"meta": metadata(), "results": results}, file, ensure_ascii=False, indent=2)
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            raise SystemExit(f"Замедление вычислений больше чем в {args.threshold} раза: {len(regressions)} нагрузок")
+
+
+if __name__ == "__main__":
+    main()
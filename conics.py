@@ -1,7 +1,252 @@
 import matplotlib.pyplot as plt
 from matplotlib.patches import Rectangle
+from matplotlib.collections import PolyCollection
+from profiling import profiled, PROFILER
+from player import StepPlayer
+import numpy as np
 import math
 
+
+def _octant_keep(xs, ys):
+    diagonal = xs != ys
+    return np.array([
+        np.ones_like(diagonal), xs > 0, ys > 0, (xs > 0) & (ys > 0),
+        diagonal, diagonal & (ys > 0), diagonal & (xs > 0), diagonal & (xs > 0) & (ys > 0)
+    ])
+
+
+def _quadrant_keep(xs, ys):
+    return np.array([np.ones(len(xs), bool), xs > 0, ys > 0, (xs > 0) & (ys > 0)])
+
+
+def _ragged_arange(counts):
+    counts = np.asarray(counts, dtype=np.int64)
+    owner = np.repeat(np.arange(len(counts)), counts)
+    return owner, np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+
+def _octant_points(radii):
+    # Столбцы с запасом за r/√2: октант идет, пока x <= y, как цикл while y >= x
+    owner, xs = _ragged_arange((radii / math.sqrt(2)).astype(np.int64) + 2)
+    r = radii[owner]
+    # В каждом столбце берется ближайший к окружности пиксель (округление y)
+    ys = np.floor(np.sqrt(np.maximum(r * r - xs * xs, 0)) + 0.5).astype(np.int64)
+    keep = xs <= ys
+    return owner[keep], xs[keep], ys[keep]
+
+
+def _quadrant_points(a, b):
+    norm = np.sqrt(a * a + b * b)
+    norm[norm == 0] = 1
+    # Область 1 (наклон < 1) идет по столбцам до точки с наклоном 1
+    owner1, xs1 = _ragged_arange((a * a / norm).astype(np.int64) + 1)
+    ratio = np.divide(xs1, a[owner1], out=np.zeros(len(xs1)), where=a[owner1] > 0)
+    ys1 = np.floor(b[owner1] * np.sqrt(np.maximum(1 - ratio ** 2, 0)) + 0.5).astype(np.int64)
+    # Область 2 идет по строкам ниже последней точки области 1
+    last = np.zeros(len(a), np.int64)
+    last[owner1] = ys1
+    owner2, ys2 = _ragged_arange(last)
+    ratio = np.divide(ys2, b[owner2], out=np.zeros(len(ys2)), where=b[owner2] > 0)
+    xs2 = np.floor(a[owner2] * np.sqrt(np.maximum(1 - ratio ** 2, 0)) + 0.5).astype(np.int64)
+    return np.concatenate((owner1, owner2)), np.concatenate((xs1, xs2)), np.concatenate((ys1, ys2))
+
+
+def circle_octant(r):
+    """Точки первого октанта окружности (0 <= x <= y) в виде массивов x, y."""
+    _, xs, ys = _octant_points(np.array([abs(float(r))]))
+    return xs, ys
+
+
+def ellipse_quadrant(a, b):
+    """Точки первой четверти эллипса в виде массивов x, y."""
+    _, xs, ys = _quadrant_points(np.array([abs(float(a))]), np.array([abs(float(b))]))
+    return xs, ys
+
+
+def mirror_octant(xs, ys):
+    """Отразить октант в 8 симметричных точек без повторов на осях и диагоналях: (k, 2)."""
+    xs, ys = np.asarray(xs), np.asarray(ys)
+    copies = np.array([
+        [xs, ys], [-xs, ys], [xs, -ys], [-xs, -ys],
+        [ys, xs], [-ys, xs], [ys, -xs], [-ys, -xs]
+    ])
+    return copies.transpose(0, 2, 1)[_octant_keep(xs, ys)]
+
+
+def mirror_quadrant(xs, ys):
+    """Отразить четверть в 4 симметричные точки без повторов на осях: (k, 2)."""
+    xs, ys = np.asarray(xs), np.asarray(ys)
+    copies = np.array([[xs, ys], [-xs, ys], [xs, -ys], [-xs, -ys]])
+    return copies.transpose(0, 2, 1)[_quadrant_keep(xs, ys)]
+
+
+def circles_batch(centers, radii):
+    """Пиксели пакета окружностей с разными центрами и радиусами одним проходом: (N, 2)."""
+    centers = np.rint(np.asarray(centers, dtype=float)).astype(np.int64).reshape(-1, 2)
+    radii = np.abs(np.broadcast_to(np.asarray(radii, dtype=float), (len(centers),)))
+    owner, xs, ys = _octant_points(radii)
+    owners = np.broadcast_to(owner, (8, len(owner)))[_octant_keep(xs, ys)]
+    return mirror_octant(xs, ys) + centers[owners]
+
+
+def ellipses_batch(centers, semi_axes):
+    """Пиксели пакета эллипсов с разными центрами и полуосями (a, b) одним проходом: (N, 2)."""
+    centers = np.rint(np.asarray(centers, dtype=float)).astype(np.int64).reshape(-1, 2)
+    semi_axes = np.abs(np.broadcast_to(np.asarray(semi_axes, dtype=float), (len(centers), 2)))
+    owner, xs, ys = _quadrant_points(semi_axes[:, 0].copy(), semi_axes[:, 1].copy())
+    owners = np.broadcast_to(owner, (4, len(owner)))[_quadrant_keep(xs, ys)]
+    return mirror_quadrant(xs, ys) + centers[owners]
+
+
+def _half_width(a, b, t):
+    """Полуширина эллипса на высоте t (0 за пределами эллипса)."""
+    ratio = np.divide(t, b, out=np.full(np.shape(t), 2.0), where=b > 0)
+    return a * np.sqrt(np.maximum(1 - ratio ** 2, 0))
+
+
+def ellipse_fill_spans(a, b):
+    """Строки заливки эллипса: (y, x_start, x_end) относительно центра, пиксели внутри по центру."""
+    a, b = abs(float(a)), abs(float(b))
+    ys = np.arange(-int(b), int(b) + 1)
+    widths = np.floor(_half_width(a, b, np.abs(ys))).astype(np.int64)
+    return ys, -widths, widths
+
+
+def ellipse_coverage(a, b):
+    """Сглаженная заливка эллипса: строки полностью покрытых пикселей и покрытие граничных.
+
+    Возвращает (ys, x_starts, x_ends) для сплошных отрезков и (xs, ys, coverage) для границы.
+    Покрытие считается по Ву: в пологой области — по вертикали столбца, в крутой — по горизонтали строки.
+    """
+    a, b = abs(float(a)), abs(float(b))
+    rows = np.arange(-int(math.ceil(b + 0.5)), int(math.ceil(b + 0.5)) + 1)
+    level = np.abs(rows).astype(float)
+    # Пиксель покрыт целиком, если внутри лежит его край, дальний от центра
+    full = np.floor(_half_width(a, b, level + 0.5) - 0.5).astype(np.int64)
+    reach = np.floor(_half_width(a, b, np.maximum(level - 0.5, 0)) + 0.5).astype(np.int64)
+    has_span = full >= 0
+    spans = rows[has_span], -full[has_span], full[has_span]
+
+    first = np.maximum(full + 1, 0)
+    owner, step = _ragged_arange(np.maximum(reach - first + 1, 0))
+    m = first[owner] + step
+    y = rows[owner]
+    norm = math.sqrt(a * a + b * b) or 1.0
+    shallow = m <= a * a / norm
+    vertical = _half_width(b, a, m.astype(float)) + 0.5 - np.abs(y)
+    horizontal = _half_width(a, b, np.abs(y).astype(float)) + 0.5 - m
+    coverage = np.clip(np.where(shallow, vertical, horizontal), 0, 1)
+    keep = coverage > 0
+    m, y, coverage = m[keep], y[keep], coverage[keep]
+    mirror = m > 0
+    xs = np.concatenate((m, -m[mirror]))
+    return spans, (xs, np.concatenate((y, y[mirror])), np.concatenate((coverage, coverage[mirror])))
+
+
+def circle_fills_batch(centers, radii, antialias=True):
+    """Заливка пакета кругов: строки (ys, x_starts, x_ends) и граница (xs, ys, coverage) всех кругов сразу.
+
+    Заливка и покрытие считаются один раз на каждый различный радиус и сдвигаются к центрам.
+    Покрытия одного пикселя от нескольких кругов складываются как при последовательном смешивании.
+    """
+    centers = np.rint(np.asarray(centers, dtype=float)).astype(np.int64).reshape(-1, 2)
+    radii = np.abs(np.broadcast_to(np.asarray(radii, dtype=float), (len(centers),)))
+    distinct, group = np.unique(radii, return_inverse=True)
+    spans = [[], [], []]
+    edges = [[], [], []]
+    for i, r in enumerate(distinct):
+        at = centers[group == i]
+        if antialias:
+            (ys, x_starts, x_ends), (xs, edge_ys, coverage) = ellipse_coverage(r, r)
+            edges[0].append((xs + at[:, :1]).ravel())
+            edges[1].append((edge_ys + at[:, 1:]).ravel())
+            edges[2].append(np.tile(coverage, len(at)))
+        else:
+            ys, x_starts, x_ends = ellipse_fill_spans(r, r)
+        spans[0].append((ys + at[:, 1:]).ravel())
+        spans[1].append((x_starts + at[:, :1]).ravel())
+        spans[2].append((x_ends + at[:, :1]).ravel())
+    spans = tuple(np.concatenate(part) if part else np.empty(0, np.int64) for part in spans)
+    if not antialias or not edges[0]:
+        return spans, (np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0))
+    xs, ys, coverage = (np.concatenate(part) for part in edges)
+    # Два смешивания с покрытиями a и b оставляют от прежнего цвета долю (1 - a)(1 - b)
+    x_min, y_min = xs.min(), ys.min()
+    keys = (ys - y_min) * (xs.max() - x_min + 1) + (xs - x_min)
+    keys, inverse = np.unique(keys, return_inverse=True)
+    remaining = np.ones(len(keys))
+    np.multiply.at(remaining, inverse, 1 - coverage)
+    rows, columns = np.divmod(keys, xs.max() - x_min + 1)
+    return spans, (columns + x_min, rows + y_min, 1 - remaining)
+
+
+# Параметры гиперболы и параболы квантуются до 1/16 клетки, чтобы ошибка оставалась целой
+SUBPIXEL = 16
+
+
+def hyperbola_quadrant(a, b, x_limit, y_limit):
+    """Точки ветви гиперболы x^2/a^2 - y^2/b^2 = 1 в первой четверти до выхода за x_limit или y_limit.
+
+    Средняя точка с целочисленной ошибкой: пока наклон больше 1, шаг по y, затем по x.
+    """
+    aq, bq = int(round(abs(a) * SUBPIXEL)), int(round(abs(b) * SUBPIXEL))
+    if aq == 0 or bq == 0:
+        raise ValueError("Hyperbola requires non-zero a and b")
+    A, B, S = aq * aq, bq * bq, SUBPIXEL * SUBPIXEL
+    # G(x, y) = S * (B x^2 - A y^2) - A B — уравнение, умноженное на a^2 b^2 S^3
+    xs, ys = [], []
+    x, y = int(round(abs(a))), 0
+    d = S * (B * (2 * x + 1) ** 2 - 4 * A * (y + 1) ** 2) - 4 * A * B  # 4G(x + 1/2, y + 1)
+    while x <= x_limit and y <= y_limit and B * x > A * y:
+        xs.append(x)
+        ys.append(y)
+        if d < 0:
+            d += 8 * S * B * (x + 1)
+            x += 1
+        d -= 4 * S * A * (2 * y + 3)
+        y += 1
+    e = S * (4 * B * (x + 1) ** 2 - A * (2 * y + 1) ** 2) - 4 * A * B  # 4G(x + 1, y + 1/2)
+    while x <= x_limit and y <= y_limit:
+        xs.append(x)
+        ys.append(y)
+        if e >= 0:
+            e -= 8 * S * A * (y + 1)
+            y += 1
+        e += 4 * S * B * (2 * x + 3)
+        x += 1
+    return np.array(xs, dtype=np.int64), np.array(ys, dtype=np.int64)
+
+
+def parabola_half(p, x_limit, y_limit):
+    """Точки правой половины параболы x^2 = 2py до выхода за x_limit или y_limit (при p < 0 — вниз)."""
+    P = int(round(abs(p) * SUBPIXEL))
+    xs, ys = [], []
+    x, y = 0, 0
+    if P == 0:
+        return np.zeros(1, np.int64), np.zeros(1, np.int64)
+    # G(x, y) = S x^2 - 2 P y — уравнение, умноженное на S
+    d = 4 * SUBPIXEL * (x + 1) ** 2 - 4 * P * (2 * y + 1)  # 4G(x + 1, y + 1/2)
+    while x <= x_limit and y <= y_limit and SUBPIXEL * x < P:
+        xs.append(x)
+        ys.append(y)
+        if d > 0:
+            d -= 8 * P
+            y += 1
+        d += 4 * SUBPIXEL * (2 * x + 3)
+        x += 1
+    e = SUBPIXEL * (2 * x + 1) ** 2 - 8 * P * (y + 1)  # 4G(x + 1/2, y + 1)
+    while x <= x_limit and y <= y_limit:
+        xs.append(x)
+        ys.append(y)
+        if e < 0:
+            e += 8 * SUBPIXEL * (x + 1)
+            x += 1
+        e -= 8 * P
+        y += 1
+    ys = np.array(ys, dtype=np.int64)
+    return np.array(xs, dtype=np.int64), ys if p >= 0 else -ys
+
+
 class ConicDrawer:
     def plot_pixel(self, ax, x, y, cell_size, alpha=1.0):
         """Отрисовать пиксель как прямоугольник с возможной прозрачностью."""
@@ -15,6 +260,7 @@ class ConicDrawer:
             )
             ax.add_patch(rect)
 
+    @profiled(phase=True)
     def setup_plot(self, ax, cell_size):
         """Инициализировать график с сеткой."""
         ax.clear()
@@ -33,125 +279,122 @@ class ConicDrawer:
                 rect = Rectangle((x, y), cell_size, cell_size, fill=False, edgecolor="gray")
                 ax.add_patch(rect)
 
-    def circle_bresenham(self, xc, yc, r, cell_size, ax, debug=False):
-        """Нарисовать окружность с помощью алгоритма Брезенхема."""
-        x = 0
-        y = r
-        d = 3 - 2 * r
-
-        def plot_circle_points(x, y):
-            self.plot_pixel(ax, xc + x, yc + y, cell_size)
-            self.plot_pixel(ax, xc - x, yc + y, cell_size)
-            self.plot_pixel(ax, xc + x, yc - y, cell_size)
-            self.plot_pixel(ax, xc - x, yc - y, cell_size)
-            self.plot_pixel(ax, xc + y, yc + x, cell_size)
-            self.plot_pixel(ax, xc - y, yc + x, cell_size)
-            self.plot_pixel(ax, xc + y, yc - x, cell_size)
-            self.plot_pixel(ax, xc - y, yc - x, cell_size)
-            if debug:
-                ax.figure.canvas.draw()
-                ax.figure.canvas.flush_events()
-
-        plot_circle_points(x, y)
-        while y >= x:
-            x += 1
-            if d > 0:
-                y -= 1
-                d = d + 4 * (x - y) + 10
-            else:
-                d = d + 4 * x + 6
-            plot_circle_points(x, y)
-
-    def ellipse_bresenham(self, xc, yc, a, b, cell_size, ax, debug=False):
-        """Нарисовать эллипс с помощью модифицированного алгоритма Брезенхема."""
-        a2 = a * a
-        b2 = b * b
-        two_a2 = 2 * a2
-        two_b2 = 2 * b2
-        x = 0
-        y = b
-        d = b2 - a2 * b + a2 / 4
-
-        def plot_ellipse_points(x, y):
-            self.plot_pixel(ax, xc + x, yc + y, cell_size)
-            self.plot_pixel(ax, xc - x, yc + y, cell_size)
-            self.plot_pixel(ax, xc + x, yc - y, cell_size)
-            self.plot_pixel(ax, xc - x, yc - y, cell_size)
-            if debug:
-                ax.figure.canvas.draw()
-                ax.figure.canvas.flush_events()
-
-        plot_ellipse_points(x, y)
-        while b2 * x <= a2 * y:
-            x += 1
-            if d < 0:
-                d += b2 * (2 * x + 1)
-            else:
-                y -= 1
-                d += b2 * (2 * x + 1) - a2 * (2 * y - 1)
-            plot_ellipse_points(x, y)
-
-        d = b2 * (x + 0.5) * (x + 0.5) + a2 * (y - 1) * (y - 1) - a2 * b2
-        while y > 0:
-            y -= 1
-            if d > 0:
-                d += a2 * (-2 * y + 1)
-            else:
-                x += 1
-                d += b2 * (2 * x + 1) + a2 * (-2 * y + 1)
-            plot_ellipse_points(x, y)
-
-    def hyperbola(self, xc, yc, a, b, cell_size, ax, debug=False):
-        """Нарисовать гиперболу по уравнению y^2 = 2px (где p вычисляется через a, b)."""
-        p = b * b / (2 * a)
-        x = 0
-        y = 0
-
-        def plot_hyperbola_points(x, y):
-            self.plot_pixel(ax, xc + x, yc + y, cell_size)
-            self.plot_pixel(ax, xc + x, yc - y, cell_size)
-            if debug:
-                ax.figure.canvas.draw()
-                ax.figure.canvas.flush_events()
-
-        plot_hyperbola_points(x, y)
-
-        limit = 50
-
-        delta = 0
-        while x < limit:
-            delta = y * y - 2 * p * x
-            if delta < 0:
-                y += 1
-            else:
-                x += 1
-            plot_hyperbola_points(x, y)
-
-    def parabola(self, xc, yc, p, cell_size, ax, debug=False):
-        """Нарисовать параболу (x-xc)^2 = 2p(y-yc)."""
-        x = 0
-        y = 0
-
-        def plot_parabola_points(x, y):
-            self.plot_pixel(ax, xc + x, yc + y, cell_size)
-            self.plot_pixel(ax, xc - x, yc + y, cell_size)
-            if debug:
-                ax.figure.canvas.draw()
-                ax.figure.canvas.flush_events()
-
-        plot_parabola_points(x, y)
-
-        limit = 50
-
-        delta = 0
-        while y < limit:
-            delta = x * x - 2 * p * y
-            if delta < 0:
-                x += 1
-            else:
-                y += 1
-            plot_parabola_points(x, y)
+    @profiled(phase=True)
+    def plot_pixels(self, ax, points, cell_size):
+        """Отрисовать набор пикселей одной коллекцией вместо отдельного прямоугольника на пиксель."""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        points = points[((points >= 0) & (points <= 100)).all(axis=1)]
+        PROFILER.count("pixels", len(points))
+        if len(points) == 0:
+            return
+        corners = np.array([[0, 0], [1, 0], [1, 1], [0, 1]])
+        verts = (points[:, None, :] + corners) * cell_size
+        ax.add_collection(PolyCollection(verts, facecolors="black", edgecolors="none"))
+
+    def symmetric_steps(self, ax, xc, yc, offsets, groups, cell_size):
+        """Шаги отладки: на каждом шаге — одна точка октанта (четверти) и ее симметричные копии."""
+        start = 0
+        for count in groups:
+            points = offsets[start:start + count] + (xc, yc)
+            self.plot_pixels(ax, points, cell_size)
+            start += count
+            yield "pixel", points
+
+    def circle_offsets(self, r, ordered=False):
+        """Смещения точек окружности и число копий на точку октанта; ordered — в порядке шагов алгоритма."""
+        xs, ys = circle_octant(r)
+        keep = _octant_keep(xs, ys)
+        offsets = mirror_octant(xs, ys) if not ordered else np.concatenate(
+            [mirror_octant(xs[i:i + 1], ys[i:i + 1]) for i in range(len(xs))])
+        return offsets, keep.sum(axis=0)
+
+    def ellipse_offsets(self, a, b, ordered=False):
+        xs, ys = ellipse_quadrant(a, b)
+        keep = _quadrant_keep(xs, ys)
+        offsets = mirror_quadrant(xs, ys) if not ordered else np.concatenate(
+            [mirror_quadrant(xs[i:i + 1], ys[i:i + 1]) for i in range(len(xs))])
+        return offsets, keep.sum(axis=0)
 
+    def hyperbola_offsets(self, xc, yc, a, b, cell_size, ordered=False, viewport=None):
+        x_min, x_max, y_min, y_max = viewport or self.viewport(xc, yc, cell_size)
+        xs, ys = hyperbola_quadrant(a, b, max(x_max, -x_min), max(y_max, -y_min))
+        keep = _quadrant_keep(xs, ys)
+        offsets = mirror_quadrant(xs, ys) if not ordered else np.concatenate(
+            [mirror_quadrant(xs[i:i + 1], ys[i:i + 1]) for i in range(len(xs))])
+        return offsets, keep.sum(axis=0)
+
+    def parabola_offsets(self, xc, yc, p, cell_size, ordered=False, viewport=None):
+        x_min, x_max, y_min, y_max = viewport or self.viewport(xc, yc, cell_size)
+        xs, ys = parabola_half(p, max(x_max, -x_min), y_max if p >= 0 else -y_min)
+        keep = np.array([np.ones(len(xs), bool), xs > 0])
+        halves = np.array([[xs, ys], [-xs, ys]]).transpose(0, 2, 1)
+        offsets = halves[keep] if not ordered else halves.transpose(1, 0, 2)[keep.T]
+        return offsets, keep.sum(axis=0)
+
+    def circle_bresenham(self, xc, yc, r, cell_size, ax):
+        """Нарисовать окружность: первый октант вычисляется массивом и отражается в остальные 7."""
+        offsets, _ = self.circle_offsets(r)
+        self.plot_pixels(ax, offsets + (xc, yc), cell_size)
+        return offsets + (xc, yc)
+
+    def ellipse_bresenham(self, xc, yc, a, b, cell_size, ax):
+        """Нарисовать эллипс: первая четверть вычисляется массивом и отражается в остальные 3."""
+        offsets, _ = self.ellipse_offsets(a, b)
+        self.plot_pixels(ax, offsets + (xc, yc), cell_size)
+        return offsets + (xc, yc)
+
+    def fill_ellipse(self, framebuffer, xc, yc, a, b, value=0, antialias=True):
+        """Залить эллипс в буфер кадра отрезками строк; со сглаживанием граница смешивается по покрытию."""
+        xc, yc = int(round(xc)), int(round(yc))
+        if not antialias:
+            ys, x_starts, x_ends = ellipse_fill_spans(a, b)
+            framebuffer.fill_spans(ys + yc, x_starts + xc, x_ends + xc, value)
+            return
+        (ys, x_starts, x_ends), (xs, edge_ys, coverage) = ellipse_coverage(a, b)
+        framebuffer.fill_spans(ys + yc, x_starts + xc, x_ends + xc, value)
+        framebuffer.blend_pixels(xs + xc, edge_ys + yc, value, coverage)
+
+    def fill_circle(self, framebuffer, xc, yc, r, value=0, antialias=True):
+        """Залить круг в буфер кадра (см. fill_ellipse)."""
+        self.fill_ellipse(framebuffer, xc, yc, r, r, value, antialias)
+
+    def fill_circles(self, framebuffer, centers, radii, value=0, antialias=True):
+        """Залить пакет кругов, например маркеры плотной диаграммы рассеяния: одна запись строк и одно смешивание."""
+        (ys, x_starts, x_ends), (xs, edge_ys, coverage) = circle_fills_batch(centers, radii, antialias)
+        framebuffer.fill_spans(ys, x_starts, x_ends, value)
+        if len(xs):
+            framebuffer.blend_pixels(xs, edge_ys, value, coverage)
+
+    def draw_circles(self, framebuffer, centers, radii, value=0):
+        """Нарисовать пакет окружностей в буфер кадра одной scatter-записью."""
+        points = circles_batch(centers, radii)
+        framebuffer.set_pixels(points[:, 0], points[:, 1], value)
+        return points
+
+    def draw_ellipses(self, framebuffer, centers, semi_axes, value=0):
+        """Нарисовать пакет эллипсов в буфер кадра одной scatter-записью."""
+        points = ellipses_batch(centers, semi_axes)
+        framebuffer.set_pixels(points[:, 0], points[:, 1], value)
+        return points
+
+    def viewport(self, xc, yc, cell_size):
+        """Видимая область в клетках относительно центра: (x_min, x_max, y_min, y_max)."""
+        cells = 100 / cell_size
+        return -xc, cells - xc, -yc, cells - yc
+
+    def hyperbola(self, xc, yc, a, b, cell_size, ax, viewport=None):
+        """Нарисовать гиперболу x^2/a^2 - y^2/b^2 = 1 с центром (xc, yc) в пределах видимой области."""
+        offsets, _ = self.hyperbola_offsets(xc, yc, a, b, cell_size, viewport=viewport)
+        self.plot_pixels(ax, offsets + (xc, yc), cell_size)
+        return offsets + (xc, yc)
+
+    def parabola(self, xc, yc, p, cell_size, ax, viewport=None):
+        """Нарисовать параболу (x-xc)^2 = 2p(y-yc) в пределах видимой области."""
+        offsets, _ = self.parabola_offsets(xc, yc, p, cell_size, viewport=viewport)
+        self.plot_pixels(ax, offsets + (xc, yc), cell_size)
+        return offsets + (xc, yc)
+
+    @profiled()
     def draw_conic(self, conic_type, xc, yc, a, b, p, cell_size, fig, ax):
         """Нарисовать линию второго порядка."""
         self.setup_plot(ax, cell_size)
@@ -164,14 +407,22 @@ class ConicDrawer:
         elif conic_type == "Parabola":
             self.parabola(xc, yc, p, cell_size, ax)
 
-    def start_debug(self, conic_type, xc, yc, a, b, p, cell_size, fig, ax):
-        """Нарисовать линию второго порядка в режиме отладки."""
+    def debug_steps(self, conic_type, xc, yc, a, b, p, cell_size, ax):
+        """Нарисовать линию второго порядка по шагам алгоритма."""
         self.setup_plot(ax, cell_size)
         if conic_type == "Circle":
-            self.circle_bresenham(xc, yc, a, cell_size, ax, debug=True)
+            offsets, groups = self.circle_offsets(a, ordered=True)
         elif conic_type == "Ellipse":
-            self.ellipse_bresenham(xc, yc, a, b, cell_size, ax, debug=True)
+            offsets, groups = self.ellipse_offsets(a, b, ordered=True)
         elif conic_type == "Hyperbola":
-            self.hyperbola(xc, yc, a, b, cell_size, ax, debug=True)
+            offsets, groups = self.hyperbola_offsets(xc, yc, a, b, cell_size, ordered=True)
         elif conic_type == "Parabola":
-            self.parabola(xc, yc, p, cell_size, ax, debug=True)
\ No newline at end of file
+            offsets, groups = self.parabola_offsets(xc, yc, p, cell_size, ordered=True)
+        else:
+            return
+        yield from self.symmetric_steps(ax, xc, yc, offsets, groups, cell_size)
+
+    def start_debug(self, conic_type, xc, yc, a, b, p, cell_size, fig, ax):
+        """Проигрыватель шагов построения линии второго порядка."""
+        return StepPlayer(ax, lambda: self.debug_steps(conic_type, xc, yc, a, b, p, cell_size, ax),
+                          "ConicDrawer.start_debug", interval=50)
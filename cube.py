@@ -1,122 +1,225 @@
 import numpy as np
 from matplotlib.patches import Rectangle
+from matplotlib.collections import LineCollection
+from matplotlib.animation import FuncAnimation
+from functools import lru_cache
 from math import cos, sin, radians
-import time
+from kernels import dda_segments
+from lines import wu_lines
+from mesh import load_mesh, faces_to_triangles
+from render3d import NEAR, FAR, clip_segments_mask, clip_triangles, to_screen, front_facing, flat_shading, ZBuffer
+from framebuffer import Framebuffer
+from profiling import profiled, PROFILER
+from player import StepPlayer
+
+CUBE_VERTICES = [
+    [-0.5, -0.5, -0.5], [0.5, -0.5, -0.5], [0.5, 0.5, -0.5], [-0.5, 0.5, -0.5],
+    [-0.5, -0.5, 0.5], [0.5, -0.5, 0.5], [0.5, 0.5, 0.5], [-0.5, 0.5, 0.5]
+]
+CUBE_EDGES = [
+    (0, 1), (1, 2), (2, 3), (3, 0),  # Нижняя грань
+    (4, 5), (5, 6), (6, 7), (7, 4),  # Верхняя грань
+    (0, 4), (1, 5), (2, 6), (3, 7)   # Боковые ребра
+]
+# Грани обходятся против часовой стрелки, если смотреть снаружи куба
+CUBE_FACES = [
+    (0, 3, 2, 1), (4, 5, 6, 7),
+    (0, 1, 5, 4), (3, 7, 6, 2),
+    (0, 4, 7, 3), (1, 2, 6, 5)
+]
+# Начиная с этого числа ребер draw_cube растеризует модель в буфер кадра вместо LineCollection
+RASTER_EDGE_LIMIT = 50000
+
+DEFAULT_TRANSFORM_PARAMS = {
+    'translate_x': 0, 'translate_y': 0, 'translate_z': 0,
+    'rotate_x': 0, 'rotate_y': 0, 'rotate_z': 0,
+    'scale': 1, 'perspective': 5,
+    'reflect_xy': False, 'reflect_xz': False, 'reflect_yz': False,
+    'transform_type': 'all'  # 'translate', 'rotate_x', 'rotate_y', 'rotate_z', 'scale', 'perspective', 'reflect', 'all'
+}
+TRANSFORM_KEYS = ('translate_x', 'translate_y', 'translate_z', 'rotate_x', 'rotate_y', 'rotate_z',
+                  'scale', 'perspective', 'reflect_xy', 'reflect_xz', 'reflect_yz', 'transform_type')
+
+
+def translation_matrix(dx, dy, dz):
+    return np.array([
+        [1, 0, 0, dx],
+        [0, 1, 0, dy],
+        [0, 0, 1, dz],
+        [0, 0, 0, 1]
+    ], dtype=float)
+
+
+def rotation_x_matrix(angle):
+    angle = radians(angle)
+    return np.array([
+        [1, 0, 0, 0],
+        [0, cos(angle), -sin(angle), 0],
+        [0, sin(angle), cos(angle), 0],
+        [0, 0, 0, 1]
+    ])
+
+
+def rotation_y_matrix(angle):
+    angle = radians(angle)
+    return np.array([
+        [cos(angle), 0, sin(angle), 0],
+        [0, 1, 0, 0],
+        [-sin(angle), 0, cos(angle), 0],
+        [0, 0, 0, 1]
+    ])
+
+
+def rotation_z_matrix(angle):
+    angle = radians(angle)
+    return np.array([
+        [cos(angle), -sin(angle), 0, 0],
+        [sin(angle), cos(angle), 0, 0],
+        [0, 0, 1, 0],
+        [0, 0, 0, 1]
+    ])
+
+
+def scaling_matrix(sx, sy, sz):
+    return np.diag([sx, sy, sz, 1]).astype(float)
+
+
+REFLECTIONS = {
+    'xy': np.diag([1.0, 1.0, -1.0, 1.0]),
+    'xz': np.diag([1.0, -1.0, 1.0, 1.0]),
+    'yz': np.diag([-1.0, 1.0, 1.0, 1.0]),
+}
+
+
+def perspective_matrix(distance):
+    if distance <= 0:
+        distance = 0.001
+    return np.array([
+        [1, 0, 0, 0],
+        [0, 1, 0, 0],
+        [0, 0, 1, 0],
+        [0, 0, -1 / distance, 1]
+    ])
+
+
+def transform_matrices(params):
+    """Матрицы преобразований в порядке применения для заданных параметров."""
+    transform_type = params.get('transform_type', 'all')
+    matrices = []
+    if transform_type in ['all', 'scale']:
+        matrices.append(('scale', scaling_matrix(params['scale'], params['scale'], params['scale'])))
+    for axis, build in (('rotate_x', rotation_x_matrix), ('rotate_y', rotation_y_matrix),
+                        ('rotate_z', rotation_z_matrix)):
+        if transform_type in ['all', axis]:
+            matrices.append((axis, build(params[axis])))
+    if transform_type in ['all', 'translate']:
+        matrices.append(('translate', translation_matrix(
+            params['translate_x'], params['translate_y'], params['translate_z'])))
+    if transform_type in ['all', 'reflect']:
+        for plane in ('xy', 'xz', 'yz'):
+            if params['reflect_' + plane]:
+                matrices.append(('reflect_' + plane, REFLECTIONS[plane]))
+    if transform_type in ['all', 'perspective']:
+        matrices.append(('perspective', perspective_matrix(params['perspective'])))
+    return matrices
+
+
+def transform_key(params):
+    return tuple(params[key] for key in TRANSFORM_KEYS)
+
+
+@lru_cache(maxsize=512)
+def compose_transform(key):
+    """Составная матрица 4x4 для кортежа параметров (см. TRANSFORM_KEYS); результат кэшируется."""
+    # До перспективы все преобразования аффинные (w = 1), поэтому одно деление на w в конце
+    # эквивалентно делению после каждого шага
+    matrix = np.eye(4)
+    for name, step in transform_matrices(dict(zip(TRANSFORM_KEYS, key))):
+        matrix = step @ matrix
+    matrix.setflags(write=False)
+    return matrix
+
+
+def instance_matrices(translations, scales=1.0, view_params=None):
+    """Стопка матриц (N, 4, 4): масштаб и перенос каждого экземпляра, затем общий вид view_params."""
+    translations = np.asarray(translations, dtype=float).reshape(-1, 3)
+    scales = np.broadcast_to(np.asarray(scales, dtype=float), (len(translations),))
+    view = dict(DEFAULT_TRANSFORM_PARAMS)
+    view.update(view_params or {})
+    models = np.zeros((len(translations), 4, 4))
+    models[:, [0, 1, 2], [0, 1, 2]] = scales[:, None]
+    models[:, :3, 3] = translations
+    models[:, 3, 3] = 1
+    return np.matmul(compose_transform(transform_key(view)), models)
+
 
 class CubeDrawer:
     def __init__(self):
-        self.vertices = np.array([
-            [-0.5, -0.5, -0.5], [0.5, -0.5, -0.5], [0.5, 0.5, -0.5], [-0.5, 0.5, -0.5],
-            [-0.5, -0.5, 0.5], [0.5, -0.5, 0.5], [0.5, 0.5, 0.5], [-0.5, 0.5, 0.5]
-        ], dtype=float)
-        self.edges = [
-            (0, 1), (1, 2), (2, 3), (3, 0),  # Нижняя грань
-            (4, 5), (5, 6), (6, 7), (7, 4),  # Верхняя грань
-            (0, 4), (1, 5), (2, 6), (3, 7)   # Боковые ребра
-        ]
+        self.use_cube()
+        self.animation = None
+        self.transform_params = dict(DEFAULT_TRANSFORM_PARAMS)
+
+    def set_geometry(self, vertices, edges, triangles=None):
+        """Заменить модель: вершины (V, 3), пары индексов ребер и треугольники граней (T, 3)."""
+        self.vertices = np.array(vertices, dtype=float).reshape(-1, 3)
+        self.edges = edges
+        self.triangles = np.empty((0, 3), dtype=np.int64) if triangles is None else np.asarray(triangles)
         self.original_vertices = self.vertices.copy()
-        self.transform_params = {
-            'translate_x': 0, 'translate_y': 0, 'translate_z': 0,
-            'rotate_x': 0, 'rotate_y': 0, 'rotate_z': 0,
-            'scale': 1, 'perspective': 5,
-            'reflect_xy': False, 'reflect_xz': False, 'reflect_yz': False,
-            'transform_type': 'all'  # 'translate', 'rotate_x', 'rotate_y', 'rotate_z', 'scale', 'perspective', 'reflect', 'all'
-        }
+        # Однородные координаты исходных вершин и буферы результата не пересоздаются между кадрами
+        self._homogeneous = np.hstack((self.original_vertices, np.ones((len(self.original_vertices), 1))))
+        self._transformed = np.empty_like(self._homogeneous)
+        self._vertices = np.empty_like(self.original_vertices)
+        self._projected = np.empty((len(self.original_vertices), 2))
+        self._edge_index = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        # Ребра и ребра треугольников кодируются одним числом для проверки видимости через np.isin
+        self._edge_keys = self._pair_keys(self._edge_index)
+        triangle_keys = self._pair_keys(self.triangles[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2))
+        self._edge_has_face = np.isin(self._edge_keys, triangle_keys)
+        # Для каждого ребра треугольника — индекс ребра модели (диагонали разбиения граней не найдутся)
+        self._triangle_edge_found = np.isin(triangle_keys, self._edge_keys)
+        order = np.argsort(self._edge_keys)
+        self._triangle_edge = order[np.searchsorted(self._edge_keys[order], triangle_keys[self._triangle_edge_found])]
+
+    def load_mesh(self, path):
+        """Загрузить модель OBJ/PLY, приведенную к размеру куба, вместо куба."""
+        self.mesh = load_mesh(path).normalized()
+        self.set_geometry(self.mesh.vertices, self.mesh.edges, self.mesh.triangles)
+        return self.mesh
+
+    def use_cube(self):
+        self.mesh = None
+        self.set_geometry(CUBE_VERTICES, CUBE_EDGES, faces_to_triangles([np.array(CUBE_FACES)]))
+
+    def _pair_keys(self, pairs):
+        pairs = np.sort(pairs, axis=1)
+        return pairs[:, 0] * max(len(self.original_vertices), 1) + pairs[:, 1]
 
     def reset(self):
         self.vertices = self.original_vertices.copy()
-        self.transform_params = {
-            'translate_x': 0, 'translate_y': 0, 'translate_z': 0,
-            'rotate_x': 0, 'rotate_y': 0, 'rotate_z': 0,
-            'scale': 1, 'perspective': 5,
-            'reflect_xy': False, 'reflect_xz': False, 'reflect_yz': False,
-            'transform_type': 'all'
-        }
+        self.transform_params = dict(DEFAULT_TRANSFORM_PARAMS)
 
     def translate(self, dx, dy, dz):
-        translation_matrix = np.array([
-            [1, 0, 0, dx],
-            [0, 1, 0, dy],
-            [0, 0, 1, dz],
-            [0, 0, 0, 1]
-        ])
-        self.apply_transform(translation_matrix)
+        self.apply_transform(translation_matrix(dx, dy, dz))
 
     def rotate_x(self, angle):
-        angle = radians(angle)
-        rotation_matrix = np.array([
-            [1, 0, 0, 0],
-            [0, cos(angle), -sin(angle), 0],
-            [0, sin(angle), cos(angle), 0],
-            [0, 0, 0, 1]
-        ])
-        self.apply_transform(rotation_matrix)
+        self.apply_transform(rotation_x_matrix(angle))
 
     def rotate_y(self, angle):
-        angle = radians(angle)
-        rotation_matrix = np.array([
-            [cos(angle), 0, sin(angle), 0],
-            [0, 1, 0, 0],
-            [-sin(angle), 0, cos(angle), 0],
-            [0, 0, 0, 1]
-        ])
-        self.apply_transform(rotation_matrix)
+        self.apply_transform(rotation_y_matrix(angle))
 
     def rotate_z(self, angle):
-        angle = radians(angle)
-        rotation_matrix = np.array([
-            [cos(angle), -sin(angle), 0, 0],
-            [sin(angle), cos(angle), 0, 0],
-            [0, 0, 1, 0],
-            [0, 0, 0, 1]
-        ])
-        self.apply_transform(rotation_matrix)
+        self.apply_transform(rotation_z_matrix(angle))
 
     def scale(self, sx, sy, sz):
-        scaling_matrix = np.array([
-            [sx, 0, 0, 0],
-            [0, sy, 0, 0],
-            [0, 0, sz, 0],
-            [0, 0, 0, 1]
-        ])
-        self.apply_transform(scaling_matrix)
+        self.apply_transform(scaling_matrix(sx, sy, sz))
 
     def reflect(self, plane):
-        if plane == 'xy':
-            matrix = np.array([
-                [1, 0, 0, 0],
-                [0, 1, 0, 0],
-                [0, 0, -1, 0],
-                [0, 0, 0, 1]
-            ])
-        elif plane == 'xz':
-            matrix = np.array([
-                [1, 0, 0, 0],
-                [0, -1, 0, 0],
-                [0, 0, 1, 0],
-                [0, 0, 0, 1]
-            ])
-        elif plane == 'yz':
-            matrix = np.array([
-                [-1, 0, 0, 0],
-                [0, 1, 0, 0],
-                [0, 0, 1, 0],
-                [0, 0, 0, 1]
-            ])
-        else:
+        if plane not in REFLECTIONS:
             return
-        self.apply_transform(matrix)
+        self.apply_transform(REFLECTIONS[plane])
 
     def apply_perspective(self, distance):
-        if distance <= 0:
-            distance = 0.001
-        perspective_matrix = np.array([
-            [1, 0, 0, 0],
-            [0, 1, 0, 0],
-            [0, 0, 1, 0],
-            [0, 0, -1 / distance, 1]
-        ])
-        self.apply_transform(perspective_matrix)
+        self.apply_transform(perspective_matrix(distance))
 
     def apply_transform(self, matrix):
         homogeneous_vertices = np.hstack((self.vertices, np.ones((len(self.vertices), 1))))
@@ -124,15 +227,88 @@ class CubeDrawer:
         w = transformed_vertices[:, 3]
         self.vertices = transformed_vertices[:, :3] / w[:, np.newaxis]
 
+    def apply_composed(self, matrix):
+        """Применить составную матрицу к исходным вершинам одним умножением в заранее выделенный буфер."""
+        np.matmul(self._homogeneous, matrix.T, out=self._transformed)
+        np.divide(self._transformed[:, :3], self._transformed[:, 3:], out=self._vertices)
+        self.vertices = self._vertices
+        return self.vertices
+
+    def clip_coordinates(self, matrix):
+        """Однородные координаты вершин после составной матрицы без деления на w."""
+        return np.matmul(self._homogeneous, matrix.T, out=self._transformed)
+
+    def batch_edge_segments(self, clip, matrices, width=100, height=100, cull=True, near=NEAR, far=FAR):
+        """Отрезки ребер (N, E, 2, 2) для N наборов однородных вершин (N, V, 4) и маска видимых (N, E)."""
+        segments = clip[:, self._edge_index]
+        visible = clip_segments_mask(segments, near, far)
+        if cull and len(self.triangles):
+            count = len(self.triangles)
+            triangles, ids = clip_triangles(clip[:, self.triangles].reshape(-1, 3, 4), near, far)
+            xy, _ = to_screen(triangles, width, height)
+            front = np.zeros(len(clip) * count, dtype=bool)
+            front[ids[front_facing(xy, (np.linalg.det(matrices) < 0)[ids // count])]] = True
+            # Ребро видно, если к нему примыкает хотя бы одна лицевая грань; ребра без граней видны всегда
+            adjacent = np.zeros(visible.shape, dtype=np.int64)
+            np.add.at(adjacent, (slice(None), self._triangle_edge),
+                      np.repeat(front.reshape(len(clip), count), 3, axis=1)[:, self._triangle_edge_found])
+            visible &= ~self._edge_has_face | (adjacent > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            xy, _ = to_screen(segments, width, height)
+        return xy, visible
+
+    def visible_edge_segments(self, matrix, width=100, height=100, cull=True, near=NEAR, far=FAR):
+        """Отрезки ребер (E, 2, 2) после отсечения по near/far; при cull — только ребра лицевых граней."""
+        segments, visible = self.batch_edge_segments(self.clip_coordinates(matrix)[None], matrix[None],
+                                                     width, height, cull, near, far)
+        return segments[0][visible[0]]
+
+    def batch_faces(self, framebuffer, clip, matrices, cell_size=1, color=(200, 200, 200), near=NEAR, far=FAR):
+        """Залить лицевые грани N наборов вершин (N, V, 4) в буфер кадра с общим тестом глубины."""
+        zbuffer = ZBuffer(framebuffer)
+        count = max(len(self.triangles), 1)
+        triangles, ids = clip_triangles(clip[:, self.triangles].reshape(-1, 3, 4), near, far)
+        xy, inverse_w = to_screen(triangles)
+        front = front_facing(xy, (np.linalg.det(matrices) < 0)[ids // count])
+        colors = flat_shading(triangles[front, :, :3] * inverse_w[front, :, None], color)
+        zbuffer.draw_triangles(xy[front] / cell_size, inverse_w[front], colors)
+        return zbuffer
+
+    def render_faces(self, framebuffer, matrix, cell_size=1, color=(200, 200, 200), near=NEAR, far=FAR):
+        """Залить лицевые грани в буфер кадра с тестом глубины; возвращает ZBuffer."""
+        return self.batch_faces(framebuffer, self.clip_coordinates(matrix)[None], matrix[None],
+                                cell_size, color, near, far)
+
+    def instance_clip(self, matrices):
+        """Однородные координаты (N, V, 4) модели для стопки матриц (N, 4, 4) одним умножением."""
+        return np.matmul(self._homogeneous, np.asarray(matrices, dtype=float).transpose(0, 2, 1))
+
+    def instance_vertices(self, matrices, width=100, height=100):
+        """Экранные координаты (N, V, 2) всех экземпляров модели после деления на w."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            xy, _ = to_screen(self.instance_clip(matrices), width, height)
+        return xy
+
+    def draw_instances(self, cell_size, ax, matrices, raster=None, solid=False, cull=True):
+        """Нарисовать N экземпляров модели одной коллекцией отрезков или одним растром."""
+        matrices = np.asarray(matrices, dtype=float).reshape(-1, 4, 4)
+        clip = self.instance_clip(matrices)
+        segments, visible = self.batch_edge_segments(clip, matrices, cull=cull or solid)
+        segments = segments[visible]
+        self.setup_plot(ax, cell_size)
+        self.draw_segments(ax, cell_size, segments, raster, clip if solid else None, matrices)
+
     def get_projected_vertices(self, width=100, height=100):
-        projected = []
+        return [tuple(vertex) for vertex in self.project(width, height).tolist()]
+
+    def project(self, width=100, height=100):
+        """Экранные координаты вершин массивом (V, 2) в заранее выделенном буфере."""
         scale = min(width, height) / 3
-        for vertex in self.vertices:
-            x = vertex[0] * scale + width / 2
-            y = -vertex[1] * scale + height / 2
-            projected.append((x, y))
-        return projected
+        np.multiply(self.vertices[:, :2], (scale, -scale), out=self._projected)
+        self._projected += (width / 2, height / 2)
+        return self._projected
 
+    @profiled(phase=True)
     def setup_plot(self, ax, cell_size):
         ax.clear()
         ax.set_aspect("equal")
@@ -148,58 +324,108 @@ class CubeDrawer:
                 rect = Rectangle((x, y), cell_size, cell_size, fill=False, edgecolor="gray")
                 ax.add_patch(rect)
 
-    def draw_cube(self, cell_size, ax, transform_params=None, debug=False):
+    def build_transformations(self, transform_params=None):
         self.reset()
         if transform_params:
             self.transform_params.update(transform_params)
-        params = self.transform_params
-        transform_type = params.get('transform_type', 'all')
-
-        transformations = []
-        if transform_type in ['all', 'scale']:
-            scale_val = params['scale']
-            transformations.append(('scale', lambda: self.scale(scale_val, scale_val, scale_val)))
-        if transform_type in ['all', 'rotate_x']:
-            transformations.append(('rotate_x', lambda: self.rotate_x(params['rotate_x'])))
-        if transform_type in ['all', 'rotate_y']:
-            transformations.append(('rotate_y', lambda: self.rotate_y(params['rotate_y'])))
-        if transform_type in ['all', 'rotate_z']:
-            transformations.append(('rotate_z', lambda: self.rotate_z(params['rotate_z'])))
-        if transform_type in ['all', 'translate']:
-            transformations.append(('translate', lambda: self.translate(
-                params['translate_x'], params['translate_y'], params['translate_z'])))
-        if transform_type in ['all', 'reflect']:
-            if params['reflect_xy']:
-                transformations.append(('reflect_xy', lambda: self.reflect('xy')))
-            if params['reflect_xz']:
-                transformations.append(('reflect_xz', lambda: self.reflect('xz')))
-            if params['reflect_yz']:
-                transformations.append(('reflect_yz', lambda: self.reflect('yz')))
-        if transform_type in ['all', 'perspective']:
-            transformations.append(('perspective', lambda: self.apply_perspective(params['perspective'])))
+        return [(name, lambda matrix=matrix: self.apply_transform(matrix))
+                for name, matrix in transform_matrices(self.transform_params)]
+
+    def composed_matrix(self, transform_params=None):
+        self.reset()
+        if transform_params:
+            self.transform_params.update(transform_params)
+        return compose_transform(transform_key(self.transform_params))
+
+    def transform(self, transform_params=None, width=100, height=100):
+        self.apply_composed(self.composed_matrix(transform_params))
+        return self.get_projected_vertices(width, height)
+
+    def edge_segments(self, width=100, height=100):
+        vertices = self.project(width, height)
+        return vertices[self._edge_index]
+
+    @profiled(phase=True)
+    def rasterize_edges(self, framebuffer, segments, cell_size=1, value=0, antialias=False):
+        """Растеризовать отрезки ребер в буфер кадра одним векторным проходом ЦДА или, с antialias, Ву."""
+        if antialias:
+            # Центры пикселей Ву — целые координаты, а клетка x занимает [x, x + 1)
+            return wu_lines(framebuffer, segments / cell_size - 0.5, value)
+        cells = dda_segments(segments / cell_size)
+        framebuffer.set_pixels(cells[:, 0], cells[:, 1], value)
+        return framebuffer
+
+    def draw_frame(self, ax, cell_size, matrix, raster=None, solid=False, cull=True, antialias=False):
+        segments = self.visible_edge_segments(matrix, cull=cull or solid)
+        clip = self.clip_coordinates(matrix)[None] if solid else None
+        self.draw_segments(ax, cell_size, segments, raster, clip, matrix[None], antialias)
 
+    def draw_segments(self, ax, cell_size, segments, raster=None, clip=None, matrices=None, antialias=False):
+        """Вывести отрезки (K, 2, 2) коллекцией или растром; при заданных clip сначала заливаются грани.
+
+        antialias растеризует ребра сглаженными по Ву за один проход с накоплением покрытия.
+        """
+        PROFILER.count("edges", len(segments))
+        if raster is None:
+            raster = antialias or len(segments) >= RASTER_EDGE_LIMIT
+        if not raster and clip is None:
+            ax.add_collection(LineCollection(segments, colors='black'))
+            return
+        size = -(-100 // cell_size)
+        framebuffer = Framebuffer(size, size)
+        if clip is not None:
+            self.batch_faces(framebuffer, clip, matrices, cell_size)
+        if raster:
+            self.rasterize_edges(framebuffer, segments, cell_size, antialias=antialias)
+        ax.imshow(framebuffer.pixels, origin='lower', interpolation='nearest',
+                  extent=(0, size * cell_size, 0, size * cell_size))
+        if not raster:
+            ax.add_collection(LineCollection(segments, colors='black'))
+        ax.set_xlim(0, 100)
+        ax.set_ylim(0, 100)
+
+    @profiled()
+    def draw_cube(self, cell_size, ax, transform_params=None, raster=None, solid=False, cull=True, antialias=False):
+        matrix = self.composed_matrix(transform_params)
         self.setup_plot(ax, cell_size)
-        if debug:
-            for name, transform in transformations:
-                transform()
-                vertices = self.get_projected_vertices()
-                ax.clear()
-                self.setup_plot(ax, cell_size)
-                for edge in self.edges:
-                    x1, y1 = vertices[edge[0]]
-                    x2, y2 = vertices[edge[1]]
-                    ax.plot([x1, x2], [y1, y2], color='black')
-                ax.figure.canvas.draw()
-                ax.figure.canvas.flush_events()
-                time.sleep(0.5)
-        else:
-            for name, transform in transformations:
-                transform()
-            vertices = self.get_projected_vertices()
-            for edge in self.edges:
-                x1, y1 = vertices[edge[0]]
-                x2, y2 = vertices[edge[1]]
-                ax.plot([x1, x2], [y1, y2], color='black')
-
-    def start_debug(self, cell_size, ax, transform_params=None):
-        self.draw_cube(cell_size, ax, transform_params, debug=True)
\ No newline at end of file
+        self.draw_frame(ax, cell_size, matrix, raster, solid, cull, antialias)
+
+    def debug_steps(self, cell_size, ax, transform_params=None, raster=None, solid=False, cull=True):
+        """Применять преобразования по одному; шаг показывает накопленную матрицу, и отсечение работает на каждом."""
+        self.build_transformations(transform_params)
+        matrix = np.eye(4)
+        for name, step in transform_matrices(self.transform_params):
+            matrix = step @ matrix
+            self.setup_plot(ax, cell_size)
+            self.draw_frame(ax, cell_size, matrix, raster, solid, cull)
+            yield "transform", name
+
+    def start_debug(self, cell_size, ax, transform_params=None, solid=False):
+        return StepPlayer(ax, lambda: self.debug_steps(cell_size, ax, transform_params, solid=solid),
+                          "CubeDrawer.start_debug", interval=500)
+
+    def animate(self, cell_size, ax, transform_params=None, axis='rotate_y', frames=360, interval=1):
+        """Вращать куб вокруг оси axis: кадр — одно умножение матриц и обновление отрезков с блиттингом."""
+        self.reset()
+        if transform_params:
+            self.transform_params.update(transform_params)
+        base = dict(self.transform_params)
+        start_angle = base[axis]
+        self.setup_plot(ax, cell_size)
+        lines = LineCollection([], colors='black', animated=True)
+        ax.add_collection(lines)
+
+        def update(frame):
+            base[axis] = start_angle + 360 * frame / frames
+            lines.set_segments(self.visible_edge_segments(compose_transform(transform_key(base))))
+            return (lines,)
+
+        if self.animation is not None:
+            self.animation.event_source.stop()
+        self.animation = FuncAnimation(ax.figure, update, frames=frames, interval=interval, blit=True)
+        return self.animation
+
+    def stop_animation(self):
+        if self.animation is not None:
+            self.animation.event_source.stop()
+            self.animation = None
\ No newline at end of file
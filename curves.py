@@ -1,7 +1,295 @@
 import numpy as np
+from collections import OrderedDict
+from numpy.lib.stride_tricks import sliding_window_view
 from matplotlib.patches import Rectangle
+from framebuffer import Framebuffer
+from profiling import profiled, PROFILER
+from player import StepPlayer
+
+# Матрицы кривых в степенном базисе T = [t^3, t^2, t, 1]
+HERMITE_MATRIX = np.array([  # геометрия [P1, P4, R1, R4]
+    [2, -2, 1, 1],
+    [-3, 3, -2, -1],
+    [0, 0, 1, 0],
+    [1, 0, 0, 0]
+])
+BEZIER_MATRIX = np.array([
+    [-1, 3, -3, 1],
+    [3, -6, 3, 0],
+    [-3, 3, 0, 0],
+    [1, 0, 0, 0]
+])
+BSPLINE_MATRIX = (1/6) * np.array([
+    [-1, 3, -3, 1],
+    [3, -6, 3, 0],
+    [-3, 0, 3, 0],
+    [1, 4, 1, 0]
+])
+BASIS_MATRICES = {"Hermite": HERMITE_MATRIX, "Bezier": BEZIER_MATRIX, "BSpline": BSPLINE_MATRIX}
+
+
+def power_basis(t_values):
+    return np.column_stack([t_values ** 3, t_values ** 2, t_values, np.ones_like(t_values)])
+
+
+class PlanCache:
+    """LRU-кэш планов вычисления кривых: матрица весов T @ M по ключу (тип кривой, число отсчетов)."""
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._plans = OrderedDict()
+
+    def get(self, curve_type, steps):
+        key = (curve_type, steps)
+        plan = self._plans.get(key)
+        if plan is not None:
+            self.hits += 1
+            self._plans.move_to_end(key)
+            return plan
+        self.misses += 1
+        plan = power_basis(np.linspace(0, 1, steps)) @ BASIS_MATRICES[curve_type]
+        plan.flags.writeable = False
+        self._plans[key] = plan
+        if len(self._plans) > self.maxsize:
+            self._plans.popitem(last=False)
+        return plan
+
+    def clear(self):
+        self._plans.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._plans), "maxsize": self.maxsize}
+
+
+PLAN_CACHE = PlanCache()
+
+
+def bspline_windows(points):
+    """Окна по 4 контрольные точки для каждого сегмента замкнутого сплайна, без копирования: (n, 2, 4)."""
+    control = np.asarray(points, dtype=float)
+    extended = np.concatenate((control, control[:3]))
+    return sliding_window_view(extended, 4, axis=0)
+
+
+def evaluate_bspline(points, steps=50):
+    """Точки всех сегментов замкнутого кубического В-сплайна одним матричным умножением: (len(points) * steps, 2)."""
+    windows = bspline_windows(points)
+    result = np.empty((len(windows), steps, windows.shape[1]))
+    np.matmul(PLAN_CACHE.get("BSpline", steps), windows.transpose(0, 2, 1), out=result)
+    return result.reshape(-1, windows.shape[1])
+
+
+def de_casteljau(control, t_values):
+    """Точки кривых Безье произвольной степени по алгоритму де Кастельжо.
+
+    control — (..., n + 1, d), можно передать сразу пакет кривых; t_values — (m,).
+    Результат — (..., m, d).
+    """
+    control = np.asarray(control, dtype=float)
+    t = np.asarray(t_values, dtype=float)[:, None, None]
+    pts = np.repeat(control[..., None, :, :], t.shape[0], axis=-3)
+    n = control.shape[-2] - 1
+    # Только выпуклые комбинации соседних точек — без разложения по степеням t
+    for k in range(n):
+        pts[..., :n - k, :] = (1 - t) * pts[..., :n - k, :] + t * pts[..., 1:n - k + 1, :]
+    return pts[..., 0, :]
+
+
+def clamped_knots(count, degree):
+    """Равномерный узловой вектор с (degree + 1)-кратными концами: кривая проходит через крайние точки."""
+    inner = np.linspace(0, 1, count - degree + 1)
+    return np.concatenate((np.zeros(degree), inner, np.ones(degree)))
+
+
+def uniform_knots(count, degree):
+    """Равномерный открытый узловой вектор без кратных узлов."""
+    return np.arange(count + degree + 1, dtype=float)
+
+
+def de_boor(control, knots, degree, t_values, weights=None):
+    """Точки B-сплайна (NURBS, если заданы веса) произвольной степени по алгоритму де Бура.
+
+    control — (..., n, d) для пакета кривых с общим узловым вектором из n + degree + 1 узлов,
+    t_values — (m,) в пределах [knots[degree], knots[n]]. Результат — (..., m, d).
+    """
+    control = np.asarray(control, dtype=float)
+    knots = np.asarray(knots, dtype=float)
+    t = np.asarray(t_values, dtype=float)
+    n = control.shape[-2]
+    if len(knots) != n + degree + 1:
+        raise ValueError("Knot vector must contain len(points) + degree + 1 values")
+    if weights is not None:
+        # Рациональный случай считается в однородных координатах (w * P, w)
+        weights = np.broadcast_to(np.asarray(weights, dtype=float)[..., None], control.shape[:-1] + (1,))
+        control = np.concatenate((control * weights, weights), axis=-1)
+    span = np.clip(np.searchsorted(knots, t, side="right") - 1, degree, n - 1)
+    d = control[..., span[:, None] - degree + np.arange(degree + 1), :]
+    for r in range(1, degree + 1):
+        j = np.arange(r, degree + 1)
+        i = span[:, None] - degree + j
+        left = knots[i]
+        denom = knots[i + degree - r + 1] - left
+        alpha = np.divide(t[:, None] - left, denom, out=np.zeros_like(denom), where=denom != 0)[..., None]
+        d[..., r:, :] = (1 - alpha) * d[..., r - 1:-1, :] + alpha * d[..., r:, :]
+    result = d[..., degree, :]
+    if weights is not None:
+        result = result[..., :-1] / result[..., -1:]
+    return result
+
+
+def adaptive_parameters(evaluate, tolerance=0.5, initial=8, max_depth=16):
+    """Значения t, при которых ломаная отклоняется от кривой не более чем на tolerance пикселей."""
+    ts = np.linspace(0, 1, initial + 1)
+    pts = evaluate(ts)
+    accepted = [ts]
+    a, b = ts[:-1], ts[1:]
+    pa, pb = pts[:-1], pts[1:]
+    for _ in range(max_depth):
+        if len(a) == 0:
+            break
+        mid = (a + b) / 2
+        pm = evaluate(mid)
+        chord = pb - pa
+        length = np.hypot(chord[:, 0], chord[:, 1])
+        offset = pm - pa
+        cross = np.abs(chord[:, 0] * offset[:, 1] - chord[:, 1] * offset[:, 0])
+        # Для вырожденной хорды берется расстояние до ее начала
+        distance = np.where(length > 0, cross / np.where(length > 0, length, 1),
+                            np.hypot(offset[:, 0], offset[:, 1]))
+        split = distance > tolerance
+        accepted.append(mid[split])
+        a, b = np.concatenate((a[split], mid[split])), np.concatenate((mid[split], b[split]))
+        pa, pb = np.concatenate((pa[split], pm[split])), np.concatenate((pm[split], pb[split]))
+    return np.unique(np.concatenate(accepted))
+
+
+def cubic_steps(pieces, matrix, tolerance=0.5, max_steps=2 ** 12 + 1):
+    """Число равномерных отсчетов на кусок кубической кривой для отклонения ломаной не больше tolerance.
+
+    pieces — (k, 4, d). Хорда шага h по t отклоняется не более чем на h² / 8 · max|P''|, а P'' кубической
+    кривой линейна по t, поэтому ее максимум берется на концах куска.
+    """
+    coeffs = matrix @ np.asarray(pieces, dtype=float)
+    second = np.maximum(np.linalg.norm(2 * coeffs[..., 1, :], axis=-1),
+                        np.linalg.norm(6 * coeffs[..., 0, :] + 2 * coeffs[..., 1, :], axis=-1))
+    count = np.maximum(np.ceil(np.sqrt(second / (8 * tolerance))), 1)
+    # Степень двойки: при перетаскивании точек число отсчетов меняется редко и план берется из PLAN_CACHE
+    count = 2 ** np.ceil(np.log2(count))
+    return np.minimum(count + 1, max_steps).astype(np.int64)
+
+
+def cubic_points(curve_type, pieces, tolerance=0.5):
+    """Точки кусков (k, 4, d) кубической кривой подряд, по cubic_steps отсчетов на кусок."""
+    pieces = np.asarray(pieces, dtype=float)
+    steps = cubic_steps(pieces, BASIS_MATRICES[curve_type], tolerance)
+    offsets = np.cumsum(steps) - steps
+    result = np.empty((steps.sum(), pieces.shape[-1]))
+    # Куски с одинаковым числом отсчетов считаются одним матричным умножением по общему плану
+    for count in np.unique(steps):
+        group = np.flatnonzero(steps == count)
+        values = np.matmul(PLAN_CACHE.get(curve_type, int(count)), pieces[group])
+        result[(offsets[group][:, None] + np.arange(count)).ravel()] = values.reshape(-1, pieces.shape[-1])
+    return result
+
+
+def cubic_pieces(curve_type, points):
+    """Геометрия кусков кубической кривой: (k, 4, d), для В-сплайна — по сегменту на контрольную точку."""
+    control = np.asarray(points, dtype=float)
+    if curve_type == "BSpline":
+        return bspline_windows(control).transpose(0, 2, 1)
+    return control[None]
+
+
+def rasterize_polyline(points):
+    """Клетки растра вдоль ломаной: вершины соединяются отрезками Брезенхема, повторы удаляются."""
+    return rasterize_polylines(np.asarray(points, dtype=float)[None])
+
+
+def rasterize_polylines(polylines):
+    """Клетки растра пакета ломаных (k, m, 2) одной длины; соседние ломаные между собой не соединяются."""
+    cells = np.floor(np.asarray(polylines, dtype=float)).astype(np.int64)
+    if cells.shape[1] < 2 or len(cells) == 0:
+        return cells.reshape(-1, cells.shape[-1])
+    start = cells[:, :-1].reshape(-1, cells.shape[-1])
+    end = cells[:, 1:].reshape(-1, cells.shape[-1])
+    delta = end - start
+    steps = np.abs(delta).max(axis=1)
+    counts = np.maximum(steps, 1)
+    segment = np.repeat(np.arange(len(steps)), counts)
+    i = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    n = counts[segment][:, None]
+    # Целочисленное округление d * i / n, как в приращениях Брезенхема
+    offsets = (2 * delta[segment] * i[:, None] + n) // (2 * n)
+    raster = np.vstack((start[segment] + offsets, cells[:, -1]))
+    # Повторы ищутся по линейному номеру клетки: одномерный unique намного быстрее построчного
+    low = raster.min(axis=0)
+    keys = np.ravel_multi_index(tuple((raster - low).T), tuple(raster.max(axis=0) - low + 1))
+    _, first = np.unique(keys, return_index=True)
+    return raster[np.sort(first)]
+
+
+class EditableBSpline:
+    """Замкнутый В-сплайн, хранящий отсчеты по сегментам для пересчета только затронутых участков."""
+
+    def __init__(self, points, steps=50):
+        self.control = np.array(points, dtype=float)
+        self.steps = steps
+        self.samples = evaluate_bspline(self.control, steps).reshape(len(self.control), steps, -1)
+        self.bounds = self._segment_bounds(self.samples)
+
+    @property
+    def points(self):
+        return self.samples.reshape(-1, self.samples.shape[-1])
+
+    def _segment_bounds(self, samples):
+        cells = np.floor(samples)
+        return np.concatenate((cells.min(axis=1), cells.max(axis=1)), axis=1).astype(np.int64)
+
+    def affected_segments(self, index):
+        # Сегмент i строится по точкам i..i+3, поэтому точка влияет на 4 предыдущих сегмента
+        return np.unique((index - np.arange(4)) % len(self.control))
+
+    def move_point(self, index, point):
+        """Сдвинуть контрольную точку и вернуть грязную область (x_min, y_min, x_max, y_max) в клетках."""
+        segments = self.affected_segments(index)
+        old_bounds = self.bounds[segments]
+        self.control[index] = point
+        windows = bspline_windows(self.control)[segments]
+        self.samples[segments] = np.matmul(PLAN_CACHE.get("BSpline", self.steps), windows.transpose(0, 2, 1))
+        self.bounds[segments] = self._segment_bounds(self.samples[segments])
+        both = np.concatenate((old_bounds, self.bounds[segments]))
+        return tuple(int(v) for v in (*both[:, :2].min(axis=0), *both[:, 2:].max(axis=0)))
+
+    def render(self, framebuffer, region=None, value=0, background=255):
+        """Растеризовать сплайн в буфер кадра; при заданной области перерисовать только ее."""
+        if region is None:
+            framebuffer.clear(background)
+            cells = rasterize_polylines(self.samples)
+        else:
+            x_min, y_min, x_max, y_max = region
+            framebuffer.fill_rect(x_min, y_min, x_max, y_max, background)
+            # Через область могут проходить и неизмененные сегменты — растеризуем все пересекающие ее
+            hit = ((self.bounds[:, 0] <= x_max) & (self.bounds[:, 2] >= x_min) &
+                   (self.bounds[:, 1] <= y_max) & (self.bounds[:, 3] >= y_min))
+            cells = rasterize_polylines(self.samples[hit])
+            inside = ((cells[:, 0] >= x_min) & (cells[:, 0] <= x_max) &
+                      (cells[:, 1] >= y_min) & (cells[:, 1] <= y_max))
+            cells = cells[inside]
+        framebuffer.set_pixels(cells[:, 0], cells[:, 1], value)
+
 
 class CurveDrawer:
+    def __init__(self):
+        self.editable_spline = None
+        self.spline_framebuffer = None
+        self.spline_image = None
+        self.spline_cell_size = None
+
+    @profiled(phase=True)
     def plot_pixel(self, ax, x, y, cell_size, alpha=1.0):
         """Отрисовать пиксель как прямоугольник с возможной прозрачностью."""
         if alpha > 0 and 0 <= x <= 100 and 0 <= y <= 100:
@@ -14,6 +302,7 @@ class CurveDrawer:
             )
             ax.add_patch(rect)
 
+    @profiled(phase=True)
     def setup_plot(self, ax, cell_size):
         """Инициализировать график с сеткой."""
         ax.clear()
@@ -33,105 +322,173 @@ class CurveDrawer:
                 rect = Rectangle((x, y), cell_size, cell_size, fill=False, edgecolor="gray")
                 ax.add_patch(rect)
 
-    def hermite_curve(self, P1, P4, R1, R4, cell_size, ax, steps=100, debug=False):
-        """Нарисовать кривую Эрмита."""
-        t = np.linspace(0, 1, steps)
-        h00 = 2 * t**3 - 3 * t**2 + 1
-        h10 = t**3 - 2 * t**2 + t
-        h01 = -2 * t**3 + 3 * t**2
-        h11 = t**3 - t**2
+    def plot_points(self, ax, points, cell_size):
+        PROFILER.count("pixels", len(points))
+        for point in points:
+            self.plot_pixel(ax, point[0], point[1], cell_size)
 
-        x = h00 * P1[0] + h10 * R1[0] + h01 * P4[0] + h11 * R4[0]
-        y = h00 * P1[1] + h10 * R1[1] + h01 * P4[1] + h11 * R4[1]
+    def point_steps(self, ax, points, cell_size):
+        """Шаги отладки: по одной точке кривой."""
+        for point in points:
+            self.plot_points(ax, [point], cell_size)
+            yield "pixel", point
 
-        curve_points = np.column_stack((x, y))
-        for point in curve_points:
-            self.plot_pixel(ax, point[0], point[1], cell_size)
-            if debug:
-                ax.figure.canvas.draw()
-                ax.figure.canvas.flush_events()
-        return curve_points
+    def hermite_points(self, P1, P4, R1, R4, steps=100, tolerance=None):
+        """Точки кривой Эрмита (при заданном tolerance — с числом отсчетов по cubic_steps)."""
+        geometry = np.array([P1, P4, R1, R4], dtype=float)
+        if tolerance is None:
+            return PLAN_CACHE.get("Hermite", steps) @ geometry
+        return rasterize_polyline(cubic_points("Hermite", geometry[None], tolerance))
 
-    def bezier_curve(self, P1, P2, P3, P4, cell_size, ax, steps=100, debug=False):
-        """Нарисовать кривую Безье."""
-        t_values = np.linspace(0, 1, steps)
-        T = np.column_stack([t_values ** 3, t_values ** 2, t_values, np.ones_like(t_values)])
-        bezier_matrix = np.array([
-            [-1, 3, -3, 1],
-            [3, -6, 3, 0],
-            [-3, 3, 0, 0],
-            [1, 0, 0, 0]
-        ])
-        points_matrix = np.array([P1, P2, P3, P4])
-        result = T @ bezier_matrix @ points_matrix
-        curve_points = result
-        for point in curve_points:
-            self.plot_pixel(ax, point[0], point[1], cell_size)
-            if debug:
-                ax.figure.canvas.draw()
-                ax.figure.canvas.flush_events()
-        return curve_points
+    def bezier_points(self, P1, P2, P3, P4, steps=100, tolerance=None):
+        """Точки кривой Безье (при заданном tolerance — с числом отсчетов по cubic_steps)."""
+        points_matrix = np.array([P1, P2, P3, P4], dtype=float)
+        if tolerance is None:
+            return PLAN_CACHE.get("Bezier", steps) @ points_matrix
+        return rasterize_polyline(cubic_points("Bezier", points_matrix[None], tolerance))
 
-    def bspline_curve(self, points, cell_size, ax, steps=50, debug=False):
-        """Нарисовать В-сплайн."""
+    def bspline_points(self, points, steps=50, tolerance=None):
+        """Точки В-сплайна (при заданном tolerance — с числом отсчетов по cubic_steps на сегмент)."""
         if len(points) < 4:
             return []
-        extended_points = points + points[:3]
-        curve_points = []
-        for i in range(len(points)):
-            segment = np.array(extended_points[i:i + 4])
-            t_values = np.linspace(0, 1, steps)
-            T = np.column_stack([t_values ** 3, t_values ** 2, t_values, np.ones_like(t_values)])
-            basis_matrix = (1/6) * np.array([
-                [-1, 3, -3, 1],
-                [3, -6, 3, 0],
-                [-3, 0, 3, 0],
-                [1, 4, 1, 0]
-            ])
-            result = T @ basis_matrix @ segment
-            curve_points.append(result)
-        curve_ps = curve_points[0]
-        for i in range(1, len(curve_points)):
-            curve_ps = np.vstack((curve_ps, curve_points[i]))
-        for point in curve_ps:
-            self.plot_pixel(ax, point[0], point[1], cell_size)
-            if debug:
-                ax.figure.canvas.draw()
-                ax.figure.canvas.flush_events()
-        return curve_ps
+        if tolerance is None:
+            return evaluate_bspline(points, steps)
+        return rasterize_polyline(cubic_points("BSpline", cubic_pieces("BSpline", points), tolerance))
 
-    def draw_curve(self, curve_type, points, cell_size, ax):
-        """Нарисовать кривую указанного типа."""
-        self.setup_plot(ax, cell_size)
+    def sample_points(self, evaluate, steps=100, tolerance=None):
+        """Точки кривой, заданной функцией evaluate(t) на отрезке t ∈ [0, 1]."""
+        if tolerance is None:
+            return evaluate(np.linspace(0, 1, steps))
+        return rasterize_polyline(evaluate(adaptive_parameters(evaluate, tolerance)))
+
+    def bezier_n_points(self, points, steps=100, tolerance=None):
+        control = np.asarray(points, dtype=float)
+        return self.sample_points(lambda t: de_casteljau(control, t), steps, tolerance)
+
+    def nurbs_points(self, points, degree=3, knots=None, weights=None, steps=100, tolerance=None):
+        control = np.asarray(points, dtype=float)
+        knots = clamped_knots(len(control), degree) if knots is None else np.asarray(knots, dtype=float)
+        start, end = knots[degree], knots[len(control)]
+
+        def evaluate(t_values):
+            return de_boor(control, knots, degree, start + (end - start) * t_values, weights)
+
+        return self.sample_points(evaluate, steps, tolerance)
+
+    def spline_points(self, curve_type, points, degree=3, knots=None, weights=None, tolerance=0.5):
+        """Точки кривой "BezierN", "BSplineOpen", "BSplineClamped" или "NURBS"."""
+        if curve_type == "BezierN":
+            if len(points) < 2:
+                raise ValueError("Bezier curve requires at least 2 control points")
+            return self.bezier_n_points(points, tolerance=tolerance)
+        if len(points) <= degree:
+            raise ValueError(f"B-spline of degree {degree} requires at least {degree + 1} control points")
+        if knots is None and curve_type == "BSplineOpen":
+            knots = uniform_knots(len(points), degree)
+        if curve_type == "NURBS" and weights is None:
+            weights = np.ones(len(points))
+        return self.nurbs_points(points, degree, knots, weights, tolerance=tolerance)
+
+    def curve_points(self, curve_type, points, tolerance=0.5, degree=3, knots=None, weights=None):
+        """Точки кривой указанного типа (см. draw_curve)."""
         if curve_type == "Hermite":
             if len(points) != 4:
                 raise ValueError("Hermite curve requires 2 points and 2 derivatives (4 vectors)")
-            P1, P4, R1, R4 = points
-            self.hermite_curve(P1, P4, R1, R4, cell_size, ax)
-        elif curve_type == "Bezier":
+            return self.hermite_points(*points, tolerance=tolerance)
+        if curve_type == "Bezier":
             if len(points) != 4:
                 raise ValueError("Bezier curve requires exactly 4 control points")
-            P1, P2, P3, P4 = points
-            self.bezier_curve(P1, P2, P3, P4, cell_size, ax)
-        elif curve_type == "BSpline":
-            if len(points) < 4:
-                return
-            self.bspline_curve(points, cell_size, ax)
-
-    def start_debug(self, curve_type, points, cell_size, ax):
-        """Нарисовать кривую в режиме отладки."""
+            return self.bezier_points(*points, tolerance=tolerance)
+        if curve_type == "BSpline":
+            return self.bspline_points(points, tolerance=tolerance)
+        if curve_type in ("BezierN", "BSplineOpen", "BSplineClamped", "NURBS"):
+            return self.spline_points(curve_type, points, degree, knots, weights, tolerance)
+        return []
+
+    def hermite_curve(self, P1, P4, R1, R4, cell_size, ax, steps=100, tolerance=None):
+        """Нарисовать кривую Эрмита."""
+        curve_points = self.hermite_points(P1, P4, R1, R4, steps, tolerance)
+        self.plot_points(ax, curve_points, cell_size)
+        return curve_points
+
+    def bezier_curve(self, P1, P2, P3, P4, cell_size, ax, steps=100, tolerance=None):
+        """Нарисовать кривую Безье."""
+        curve_points = self.bezier_points(P1, P2, P3, P4, steps, tolerance)
+        self.plot_points(ax, curve_points, cell_size)
+        return curve_points
+
+    def bspline_curve(self, points, cell_size, ax, steps=50, tolerance=None):
+        """Нарисовать В-сплайн."""
+        curve_ps = self.bspline_points(points, steps, tolerance)
+        self.plot_points(ax, curve_ps, cell_size)
+        return curve_ps
+
+    def sample_curve(self, evaluate, cell_size, ax, steps=100, tolerance=None):
+        """Нарисовать кривую, заданную функцией evaluate(t) на отрезке t ∈ [0, 1]."""
+        curve_points = self.sample_points(evaluate, steps, tolerance)
+        self.plot_points(ax, curve_points, cell_size)
+        return curve_points
+
+    def bezier_n_curve(self, points, cell_size, ax, steps=100, tolerance=None):
+        """Нарисовать кривую Безье степени len(points) - 1."""
+        curve_points = self.bezier_n_points(points, steps, tolerance)
+        self.plot_points(ax, curve_points, cell_size)
+        return curve_points
+
+    def nurbs_curve(self, points, cell_size, ax, degree=3, knots=None, weights=None, steps=100, tolerance=None):
+        """Нарисовать B-сплайн с произвольными узлами (NURBS при заданных весах)."""
+        curve_points = self.nurbs_points(points, degree, knots, weights, steps, tolerance)
+        self.plot_points(ax, curve_points, cell_size)
+        return curve_points
+
+    def draw_spline(self, curve_type, points, cell_size, ax, degree=3, knots=None, weights=None, tolerance=0.5):
+        self.plot_points(ax, self.spline_points(curve_type, points, degree, knots, weights, tolerance), cell_size)
+
+    @profiled()
+    def edit_bspline(self, points, cell_size, ax, steps=50):
+        """Перерисовать В-сплайн, пересчитав только сегменты с изменившимися контрольными точками."""
+        spline = self.editable_spline
+        if (spline is None or len(spline.control) != len(points) or spline.steps != steps
+                or self.spline_cell_size != cell_size or self.spline_image not in ax.images):
+            self.setup_plot(ax, cell_size)
+            spline = self.editable_spline = EditableBSpline(points, steps)
+            size = -(-100 // int(max(1, cell_size)))
+            self.spline_framebuffer = Framebuffer(size, size, channels=4, background=0)
+            self.spline_cell_size = cell_size
+            spline.render(self.spline_framebuffer, value=(0, 0, 0, 255), background=0)
+            self.spline_image = ax.imshow(self.spline_framebuffer.pixels, origin="lower", interpolation="nearest",
+                                          extent=(0, size * cell_size, 0, size * cell_size), zorder=0)
+            ax.set_xlim(0, 100)
+            ax.set_ylim(0, 100)
+            return None
+        region = None
+        changed = np.flatnonzero((spline.control != np.asarray(points, dtype=float)).any(axis=1))
+        for index in changed:
+            dirty = spline.move_point(index, points[index])
+            region = dirty if region is None else (min(region[0], dirty[0]), min(region[1], dirty[1]),
+                                                   max(region[2], dirty[2]), max(region[3], dirty[3]))
+        if region is not None:
+            spline.render(self.spline_framebuffer, region, value=(0, 0, 0, 255), background=0)
+            self.spline_image.set_data(self.spline_framebuffer.pixels)
+        return region
+
+    @profiled()
+    def draw_curve(self, curve_type, points, cell_size, ax, tolerance=0.5, degree=3, knots=None, weights=None):
+        """Нарисовать кривую указанного типа с допуском отклонения tolerance (в пикселях).
+
+        Кроме кубических "Hermite", "Bezier", "BSpline" поддерживаются "BezierN" (любая степень),
+        "BSplineOpen", "BSplineClamped" и "NURBS" с параметрами degree, knots, weights.
+        """
         self.setup_plot(ax, cell_size)
-        if curve_type == "Hermite":
-            if len(points) != 4:
-                raise ValueError("Hermite curve requires 2 points and 2 derivatives (4 vectors)")
-            P1, P4, R1, R4 = points
-            self.hermite_curve(P1, P4, R1, R4, cell_size, ax, debug=True)
-        elif curve_type == "Bezier":
-            if len(points) != 4:
-                raise ValueError("Bezier curve requires exactly 4 control points")
-            P1, P2, P3, P4 = points
-            self.bezier_curve(P1, P2, P3, P4, cell_size, ax, debug=True)
-        elif curve_type == "BSpline":
-            if len(points) < 4:
-                return
-            self.bspline_curve(points, cell_size, ax, debug=True)
\ No newline at end of file
+        self.plot_points(ax, self.curve_points(curve_type, points, tolerance, degree, knots, weights), cell_size)
+
+    def debug_steps(self, curve_points, cell_size, ax):
+        """Нарисовать готовые точки кривой по одной за шаг."""
+        self.setup_plot(ax, cell_size)
+        yield from self.point_steps(ax, curve_points, cell_size)
+
+    def start_debug(self, curve_type, points, cell_size, ax, tolerance=0.5, degree=3, knots=None, weights=None):
+        """Проигрыватель шагов построения кривой; точки вычисляются сразу, ошибки сообщаются до показа."""
+        curve_points = self.curve_points(curve_type, points, tolerance, degree, knots, weights)
+        return StepPlayer(ax, lambda: self.debug_steps(curve_points, cell_size, ax), "CurveDrawer.start_debug",
+                          interval=50)
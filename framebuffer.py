@@ -0,0 +1,502 @@
+import numpy as np
+from multiprocessing import shared_memory
+
+# Высота полосы строк, которой буфер в отображаемом файле заполняется по порядку
+BAND_ROWS = 256
+
+
+def _per_pixel(value, channels):
+    """value задает цвет каждого пикселя, а не один цвет на все."""
+    return np.ndim(value) > (0 if channels is None else 1)
+
+
+class Framebuffer:
+    """Растровый буфер кадра поверх массива numpy (строка — y, столбец — x)."""
+
+    def __init__(self, width, height, channels=3, dtype=np.uint8, background=255, buffer=None):
+        self.width = int(width)
+        self.height = int(height)
+        self.channels = channels
+        self.dtype = np.dtype(dtype)
+        shape = (self.height, self.width) if channels is None else (self.height, self.width, channels)
+        if buffer is None:
+            self.pixels = np.empty(shape, dtype=self.dtype)
+            self.pixels[...] = background
+        else:
+            self.pixels = np.ndarray(shape, dtype=self.dtype, buffer=buffer)
+
+    @property
+    def shape(self):
+        return self.pixels.shape
+
+    def clear(self, value=255):
+        self.pixels[...] = value
+
+    def get_pixels(self, xs, ys):
+        """Прочитать набор пикселей (точки должны лежать в буфере)."""
+        return self.pixels[np.asarray(ys, dtype=np.int64), np.asarray(xs, dtype=np.int64)]
+
+    def to_array(self, region=None):
+        """Пиксели буфера или прямоугольника region = (x_min, y_min, x_max, y_max) (границы включаются)."""
+        if region is None:
+            return self.pixels
+        x_min, y_min, x_max, y_max = region
+        return self.pixels[y_min:y_max + 1, x_min:x_max + 1]
+
+    def set_pixel(self, x, y, value):
+        x, y = int(x), int(y)
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.pixels[y, x] = value
+
+    def set_pixels(self, xs, ys, value):
+        """Записать набор пикселей одной операцией, отбросив точки вне буфера; value — цвет или цвета пикселей."""
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        if _per_pixel(value, self.channels):
+            value = np.asarray(value)[inside]
+        self.pixels[ys[inside], xs[inside]] = value
+
+    def blend_pixels(self, xs, ys, value, coverage):
+        """Смешать цвет value с буфером по покрытию coverage (0..1) для каждого пикселя."""
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        coverage = np.asarray(coverage, dtype=np.float32)
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        xs, ys, coverage = xs[inside], ys[inside], coverage[inside]
+        if self.channels is not None:
+            coverage = coverage[:, None]
+        current = self.pixels[ys, xs].astype(np.float32)
+        blended = current + (np.asarray(value, dtype=np.float32) - current) * coverage
+        if np.issubdtype(self.dtype, np.integer):
+            blended = np.rint(blended)
+        self.pixels[ys, xs] = blended.astype(self.dtype)
+
+    def fill_span(self, y, x_start, x_end, value):
+        """Закрасить горизонтальный отрезок [x_start, x_end] строки y."""
+        y = int(y)
+        if not 0 <= y < self.height:
+            return
+        x_start = max(int(x_start), 0)
+        x_end = min(int(x_end), self.width - 1)
+        if x_start <= x_end:
+            self.pixels[y, x_start:x_end + 1] = value
+
+    def fill_rect(self, x_min, y_min, x_max, y_max, value):
+        """Закрасить прямоугольник [x_min, x_max] x [y_min, y_max] (границы включаются)."""
+        x_min, y_min = max(int(x_min), 0), max(int(y_min), 0)
+        x_max, y_max = min(int(x_max), self.width - 1), min(int(y_max), self.height - 1)
+        if x_min <= x_max and y_min <= y_max:
+            self.pixels[y_min:y_max + 1, x_min:x_max + 1] = value
+
+    def fill_spans(self, ys, x_starts, x_ends, value):
+        """Закрасить набор отрезков строк одной операцией (границы включаются, выход за буфер отсекается)."""
+        ys = np.asarray(ys, dtype=np.int64)
+        x_starts = np.maximum(np.asarray(x_starts, dtype=np.int64), 0)
+        x_ends = np.minimum(np.asarray(x_ends, dtype=np.int64), self.width - 1)
+        counts = np.where((ys >= 0) & (ys < self.height), np.maximum(x_ends - x_starts + 1, 0), 0)
+        total = int(counts.sum())
+        if total == 0:
+            return
+        owner = np.repeat(np.arange(len(ys)), counts)
+        xs = x_starts[owner] + np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        self.pixels[ys[owner], xs] = value
+
+
+def srgb_to_linear(values):
+    """8-битные значения sRGB (0..255) в линейную яркость 0..1."""
+    c = np.asarray(values, dtype=np.float32) / 255
+    return np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+
+
+def linear_to_srgb(values):
+    """Линейную яркость 0..1 в 8-битные значения sRGB."""
+    c = np.clip(values, 0, 1)
+    c = np.where(c <= 0.0031308, c * 12.92, 1.055 * c ** (1 / 2.4) - 0.055)
+    return np.rint(c * 255).astype(np.uint8)
+
+
+class AccumulationBuffer:
+    """Покрытие пикселей в float32: вклады сглаженных примитивов складываются, а в 8 бит переводятся один раз.
+
+    origin — положение левого нижнего пикселя в буфере кадра, чтобы накапливать только окрестность примитивов.
+    """
+
+    def __init__(self, width, height, origin=(0, 0)):
+        self.width = int(width)
+        self.height = int(height)
+        self.origin = (int(origin[0]), int(origin[1]))
+        self.coverage = np.zeros((self.height, self.width), dtype=np.float32)
+
+    def clear(self):
+        self.coverage[...] = 0
+
+    def add(self, xs, ys, coverage):
+        """Прибавить покрытие пикселей (в координатах буфера кадра); повторы одного пикселя суммируются."""
+        xs = np.asarray(xs, dtype=np.int64) - self.origin[0]
+        ys = np.asarray(ys, dtype=np.int64) - self.origin[1]
+        coverage = np.asarray(coverage, dtype=np.float64)
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        index = ys[inside] * self.width + xs[inside]
+        total = np.bincount(index, weights=coverage[inside], minlength=self.width * self.height)
+        self.coverage += total.reshape(self.height, self.width).astype(np.float32)
+
+    def resolve(self, framebuffer=None, value=0, background=255):
+        """Смешать цвет value с 8-битным буфером кадра по накопленному покрытию (не больше 1).
+
+        Смешивание идет в линейном пространстве с кодированием sRGB на выходе, поэтому
+        яркость края соответствует его покрытию. Без framebuffer создается новый буфер с фоном background.
+        """
+        x0, y0 = self.origin
+        if framebuffer is None:
+            framebuffer = Framebuffer(x0 + self.width, y0 + self.height, background=background)
+        if framebuffer.dtype != np.uint8:
+            raise ValueError("Resolve requires an 8-bit framebuffer")
+        if x0 < 0 or y0 < 0 or x0 + self.width > framebuffer.width or y0 + self.height > framebuffer.height:
+            raise ValueError("Accumulation buffer does not fit the framebuffer")
+        ys, xs = np.nonzero(self.coverage)
+        alpha = np.minimum(self.coverage[ys, xs], 1)
+        xs, ys = xs + x0, ys + y0
+        if framebuffer.channels is not None:
+            alpha = alpha[:, None]
+        current = srgb_to_linear(framebuffer.get_pixels(xs, ys))
+        target = srgb_to_linear(value)
+        framebuffer.set_pixels(xs, ys, linear_to_srgb(current + (target - current) * alpha))
+        return framebuffer
+
+
+class TiledFramebuffer:
+    """Буфер кадра из плиток tile_size x tile_size, которые выделяются при первой записи.
+
+    Интерфейс записи тот же, что у Framebuffer, поэтому рисовальщики пишут в него без изменений.
+    Память пропорциональна затронутой площади, а очистка стоит O(числа выделенных плиток):
+    невыделенная плитка целиком залита фоном.
+    """
+
+    def __init__(self, width, height, channels=3, dtype=np.uint8, background=255, tile_size=256):
+        if tile_size <= 0:
+            raise ValueError("Tile size must be positive")
+        self.width = int(width)
+        self.height = int(height)
+        self.channels = channels
+        self.dtype = np.dtype(dtype)
+        self.background = background
+        self.tile_size = int(tile_size)
+        self.columns = -(-self.width // self.tile_size)
+        self.rows = -(-self.height // self.tile_size)
+        self.tiles = {}  # (tx, ty) -> массив плитки
+
+    @property
+    def shape(self):
+        return (self.height, self.width) if self.channels is None else (self.height, self.width, self.channels)
+
+    @property
+    def nbytes(self):
+        return sum(tile.nbytes for tile in self.tiles.values())
+
+    def clear(self, value=255):
+        self.tiles.clear()
+        self.background = value
+
+    def tile(self, tx, ty, allocate=False):
+        """Плитка (tx, ty); без allocate невыделенная плитка дает None."""
+        tile = self.tiles.get((tx, ty))
+        if tile is None and allocate:
+            size = self.tile_size
+            shape = (size, size) if self.channels is None else (size, size, self.channels)
+            tile = self.tiles[(tx, ty)] = np.empty(shape, dtype=self.dtype)
+            tile[...] = self.background
+        return tile
+
+    def tile_bounds(self, tx, ty):
+        """Прямоугольник плитки в буфере (x_min, y_min, x_max, y_max), обрезанный краем буфера."""
+        size = self.tile_size
+        return tx * size, ty * size, min((tx + 1) * size, self.width) - 1, min((ty + 1) * size, self.height) - 1
+
+    def iter_tiles(self):
+        """Выделенные плитки по строкам: (tx, ty, пиксели без выхода за край буфера)."""
+        for tx, ty in sorted(self.tiles, key=lambda key: (key[1], key[0])):
+            x_min, y_min, x_max, y_max = self.tile_bounds(tx, ty)
+            yield tx, ty, self.tiles[(tx, ty)][:y_max - y_min + 1, :x_max - x_min + 1]
+
+    def to_array(self, region=None):
+        """Собрать плотную копию буфера или прямоугольника region (границы включаются)."""
+        if region is None:
+            region = (0, 0, self.width - 1, self.height - 1)
+        x_min, y_min = max(int(region[0]), 0), max(int(region[1]), 0)
+        x_max, y_max = min(int(region[2]), self.width - 1), min(int(region[3]), self.height - 1)
+        shape = (max(y_max - y_min + 1, 0), max(x_max - x_min + 1, 0))
+        result = np.empty(shape if self.channels is None else (*shape, self.channels), dtype=self.dtype)
+        result[...] = self.background
+        size = self.tile_size
+        for (tx, ty), tile in self.tiles.items():
+            x0, y0 = max(tx * size, x_min), max(ty * size, y_min)
+            x1, y1 = min((tx + 1) * size - 1, x_max), min((ty + 1) * size - 1, y_max)
+            if x0 <= x1 and y0 <= y1:
+                result[y0 - y_min:y1 - y_min + 1, x0 - x_min:x1 - x_min + 1] = \
+                    tile[y0 - ty * size:y1 - ty * size + 1, x0 - tx * size:x1 - tx * size + 1]
+        return result
+
+    def _groups(self, xs, ys):
+        """Разбить точки по плиткам: (порядок точек, [(tx, ty, начало, конец)])."""
+        size = self.tile_size
+        keys = (ys // size) * self.columns + xs // size
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        stops = np.r_[starts[1:], len(keys)]
+        return order, [(int(keys[a] % self.columns), int(keys[a] // self.columns), a, b)
+                       for a, b in zip(starts, stops)]
+
+    def get_pixels(self, xs, ys):
+        """Прочитать набор пикселей (точки должны лежать в буфере); невыделенные плитки дают фон."""
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        result = np.empty((len(xs),) + self.shape[2:], dtype=self.dtype)
+        result[...] = self.background
+        if not len(xs):
+            return result
+        size = self.tile_size
+        order, groups = self._groups(xs, ys)
+        for tx, ty, start, stop in groups:
+            tile = self.tiles.get((tx, ty))
+            if tile is not None:
+                index = order[start:stop]
+                result[index] = tile[ys[index] - ty * size, xs[index] - tx * size]
+        return result
+
+    def set_pixel(self, x, y, value):
+        self.set_pixels([x], [y], value)
+
+    def set_pixels(self, xs, ys, value):
+        """Записать набор пикселей по плиткам, отбросив точки вне буфера; value — цвет или цвета пикселей."""
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        per_pixel = _per_pixel(value, self.channels)
+        if per_pixel:
+            value = np.asarray(value)[inside]
+        xs, ys = xs[inside], ys[inside]
+        if not len(xs):
+            return
+        size = self.tile_size
+        order, groups = self._groups(xs, ys)
+        for tx, ty, start, stop in groups:
+            index = order[start:stop]
+            tile = self.tile(tx, ty, allocate=True)
+            tile[ys[index] - ty * size, xs[index] - tx * size] = value[index] if per_pixel else value
+
+    def blend_pixels(self, xs, ys, value, coverage):
+        """Смешать цвет value с буфером по покрытию coverage (0..1) для каждого пикселя."""
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        coverage = np.asarray(coverage, dtype=np.float32)
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        xs, ys, coverage = xs[inside], ys[inside], coverage[inside]
+        if self.channels is not None:
+            coverage = coverage[:, None]
+        current = self.get_pixels(xs, ys).astype(np.float32)
+        blended = current + (np.asarray(value, dtype=np.float32) - current) * coverage
+        if np.issubdtype(self.dtype, np.integer):
+            blended = np.rint(blended)
+        self.set_pixels(xs, ys, blended.astype(self.dtype))
+
+    def fill_span(self, y, x_start, x_end, value):
+        """Закрасить горизонтальный отрезок [x_start, x_end] строки y."""
+        self.fill_spans([y], [x_start], [x_end], value)
+
+    def fill_rect(self, x_min, y_min, x_max, y_max, value):
+        """Закрасить прямоугольник [x_min, x_max] x [y_min, y_max] (границы включаются).
+
+        Заливка фоном не выделяет новых плиток, а целиком покрытые плитки освобождает.
+        """
+        x_min, y_min = max(int(x_min), 0), max(int(y_min), 0)
+        x_max, y_max = min(int(x_max), self.width - 1), min(int(y_max), self.height - 1)
+        if x_min > x_max or y_min > y_max:
+            return
+        size = self.tile_size
+        background = np.array_equal(value, self.background)
+        for ty in range(y_min // size, y_max // size + 1):
+            for tx in range(x_min // size, x_max // size + 1):
+                x0, y0 = max(x_min, tx * size), max(y_min, ty * size)
+                x1, y1 = min(x_max, (tx + 1) * size - 1), min(y_max, (ty + 1) * size - 1)
+                if background:
+                    if (x0, y0, x1, y1) == self.tile_bounds(tx, ty):
+                        self.tiles.pop((tx, ty), None)
+                        continue
+                    if (tx, ty) not in self.tiles:
+                        continue
+                tile = self.tile(tx, ty, allocate=True)
+                tile[y0 - ty * size:y1 - ty * size + 1, x0 - tx * size:x1 - tx * size + 1] = value
+
+    def fill_spans(self, ys, x_starts, x_ends, value):
+        """Закрасить набор отрезков строк: отрезки режутся по границам плиток и пишутся плитка за плиткой."""
+        ys = np.asarray(ys, dtype=np.int64)
+        x_starts = np.maximum(np.asarray(x_starts, dtype=np.int64), 0)
+        x_ends = np.minimum(np.asarray(x_ends, dtype=np.int64), self.width - 1)
+        keep = (ys >= 0) & (ys < self.height) & (x_starts <= x_ends)
+        ys, x_starts, x_ends = ys[keep], x_starts[keep], x_ends[keep]
+        if not len(ys):
+            return
+        size = self.tile_size
+        # Кусок отрезка на каждый столбец плиток, который он пересекает
+        first = x_starts // size
+        pieces = x_ends // size - first + 1
+        owner = np.repeat(np.arange(len(ys)), pieces)
+        column = first[owner] + np.arange(len(owner)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+        ys = ys[owner]
+        starts = np.maximum(x_starts[owner], column * size)
+        ends = np.minimum(x_ends[owner], column * size + size - 1)
+        order, groups = self._groups(starts, ys)
+        for tx, ty, start, stop in groups:
+            index = order[start:stop]
+            counts = ends[index] - starts[index] + 1
+            total = int(counts.sum())
+            local = np.repeat(index, counts)
+            xs = starts[local] + np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            tile = self.tile(tx, ty, allocate=True)
+            tile[ys[local] - ty * size, xs - tx * size] = value
+
+
+class SharedFramebuffer(Framebuffer):
+    """Буфер кадра в разделяемой памяти: рабочие процессы пишут в него без копирования результата."""
+
+    def __init__(self, width, height, channels=3, dtype=np.uint8, background=255, name=None):
+        dtype = np.dtype(dtype)
+        nbytes = int(width) * int(height) * (channels or 1) * dtype.itemsize
+        self._owner = name is None
+        if self._owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        super().__init__(width, height, channels, dtype, buffer=self.shm.buf)
+        if self._owner:
+            self.clear(background)
+
+    @property
+    def descriptor(self):
+        """Описание буфера для передачи в другой процесс (имя сегмента и геометрия)."""
+        return self.shm.name, self.width, self.height, self.channels, self.dtype.str
+
+    @classmethod
+    def attach(cls, descriptor):
+        name, width, height, channels, dtype = descriptor
+        return cls(width, height, channels, dtype, name=name)
+
+    def close(self):
+        # Представление numpy держит ссылку на буфер сегмента, без его удаления close() упадет
+        self.pixels = None
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class MappedFramebuffer(Framebuffer):
+    """Буфер кадра в файле через numpy.memmap для растров, которые не помещаются в память.
+
+    Файл .npy открывается другими программами без копирования (np.load(path, mmap_mode="r")),
+    остальные пути — сырые пиксели по строкам. Записи упорядочиваются по строкам, а заливки
+    идут полосами по band_rows строк, поэтому страницы файла затрагиваются последовательно.
+    mode="w+" создает файл, "r+" открывает существующий (размеры .npy берутся из заголовка).
+    """
+
+    def __init__(self, path, width=None, height=None, channels=3, dtype=np.uint8, background=255,
+                 mode="w+", band_rows=BAND_ROWS):
+        if band_rows <= 0:
+            raise ValueError("Band height must be positive")
+        self.path = str(path)
+        self.mode = mode
+        self.band_rows = int(band_rows)
+        npy = self.path.endswith(".npy")
+        if mode == "w+":
+            if width is None or height is None:
+                raise ValueError("Width and height are required to create a mapped framebuffer")
+            shape = (int(height), int(width)) if channels is None else (int(height), int(width), channels)
+            if npy:
+                self.map = np.lib.format.open_memmap(self.path, mode="w+", dtype=dtype, shape=shape)
+            else:
+                self.map = np.memmap(self.path, dtype=dtype, mode="w+", shape=shape)
+        elif npy:
+            self.map = np.load(self.path, mmap_mode=mode)
+            height, width = self.map.shape[:2]
+            channels = self.map.shape[2] if self.map.ndim == 3 else None
+            dtype = self.map.dtype
+        else:
+            if width is None or height is None:
+                raise ValueError("Width and height are required to open a raw mapped framebuffer")
+            shape = (int(height), int(width)) if channels is None else (int(height), int(width), channels)
+            self.map = np.memmap(self.path, dtype=dtype, mode=mode, shape=shape)
+        super().__init__(width, height, channels, dtype, buffer=self.map)
+        # Новый файл заполнен нулями, нулевой фон записывать не нужно
+        if mode == "w+" and np.any(background):
+            self.clear(background)
+
+    @property
+    def descriptor(self):
+        """Описание буфера для передачи в другой процесс (путь к файлу и геометрия)."""
+        return self.path, self.width, self.height, self.channels, self.dtype.str, self.band_rows
+
+    @classmethod
+    def attach(cls, descriptor):
+        path, width, height, channels, dtype, band_rows = descriptor
+        return cls(path, width, height, channels, dtype, mode="r+", band_rows=band_rows)
+
+    def bands(self, y_start=0, y_stop=None):
+        """Полосы строк [начало, конец) по порядку."""
+        y_stop = self.height if y_stop is None else y_stop
+        for start in range(y_start, y_stop, self.band_rows):
+            yield start, min(start + self.band_rows, y_stop)
+
+    def clear(self, value=255):
+        for start, stop in self.bands():
+            self.pixels[start:stop] = value
+
+    def _row_order(self, xs, ys):
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        order = np.argsort(ys * self.width + xs, kind="stable")
+        return xs[order], ys[order], order
+
+    def set_pixels(self, xs, ys, value):
+        """Записать набор пикселей в порядке строк; value — цвет или цвета пикселей."""
+        xs, ys, order = self._row_order(xs, ys)
+        if _per_pixel(value, self.channels):
+            value = np.asarray(value)[order]
+        super().set_pixels(xs, ys, value)
+
+    def blend_pixels(self, xs, ys, value, coverage):
+        xs, ys, order = self._row_order(xs, ys)
+        super().blend_pixels(xs, ys, value, np.asarray(coverage)[order])
+
+    def fill_spans(self, ys, x_starts, x_ends, value):
+        """Закрасить набор отрезков строк полосами сверху вниз (пиксели разворачиваются по одной полосе)."""
+        ys = np.asarray(ys, dtype=np.int64)
+        order = np.lexsort((np.asarray(x_starts), ys))
+        ys = ys[order]
+        x_starts = np.asarray(x_starts, dtype=np.int64)[order]
+        x_ends = np.asarray(x_ends, dtype=np.int64)[order]
+        bounds = np.searchsorted(ys, np.arange(0, self.height + self.band_rows, self.band_rows))
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            if a < b:
+                super().fill_spans(ys[a:b], x_starts[a:b], x_ends[a:b], value)
+
+    def flush(self):
+        if self.map is not None and self.mode != "r":
+            self.map.flush()
+
+    def close(self):
+        self.flush()
+        self.pixels = None
+        self.map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,14 +1,16 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-import asyncio
+from tkinter import ttk, messagebox, filedialog
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
 from lines import LineDrawer
 from conics import ConicDrawer
 from curves import CurveDrawer
 from cube import CubeDrawer
-from polygon import PolygonEditor
+from keyframes import KeyframeAnimation
+from polygon import PolygonEditor, FILL_COLORS
 from voronoi_delaunay import VoronoiDelaunay
+from scene import Scene, LineNode, ConicNode, CurveNode, CubeNode, PolygonNode, PointSetNode
+from profiling import PROFILER
 
 class GraphicEditor:
     def __init__(self, root):
@@ -22,6 +24,7 @@ class GraphicEditor:
         self.cube_drawer = CubeDrawer()
         self.polygon_editor = PolygonEditor()
         self.voronoi_delaunay = VoronoiDelaunay()
+        self.scene = Scene()
         self.fig = Figure()
         self.ax = self.fig.add_subplot(111)
         self.canvas = FigureCanvasTkAgg(self.fig, master=root)
@@ -83,11 +86,88 @@ class GraphicEditor:
         ttk.Combobox(button_frame, textvariable=self.polygon_mode_var,
                      values=["По умолчанию", "Нормали", "Грэхем", "Джарвис", "Пересечения",
                              "Проверка точки", "Простая развертка", "Развертка с активными ребрами",
-                             "Заливка с затравкой", "Построчная заливка"], width=25).pack(side=tk.LEFT, padx=5)
+                             "Заливка с затравкой", "Построчная заливка", "Отсечение",
+                             "Отсечение отрезков"], width=25).pack(side=tk.LEFT, padx=5)
         tk.Label(button_frame, text="Цвет заливки:", bg="lavenderblush2").pack(side=tk.LEFT, padx=5)
         self.fill_color_var = tk.StringVar(value="black")
         ttk.Combobox(button_frame, textvariable=self.fill_color_var,
                      values=["black", "green", "blue", "yellow", "purple"], width=8).pack(side=tk.LEFT, padx=5)
+        self.retain_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(button_frame, text="Сцена", variable=self.retain_var,
+                       bg="lavenderblush2").pack(side=tk.LEFT, padx=5)
+
+        # Управление проигрыванием шагов отладки
+        self.player = None
+        player_frame = tk.Frame(root, bg="lavenderblush2")
+        player_frame.pack(fill=tk.X, pady=5)
+        ttk.Button(player_frame, text="Назад", command=lambda: self.control_player("back")).pack(side=tk.LEFT, padx=5)
+        ttk.Button(player_frame, text="Пуск/Пауза",
+                   command=lambda: self.control_player("toggle")).pack(side=tk.LEFT, padx=5)
+        ttk.Button(player_frame, text="Шаг", command=lambda: self.control_player("step")).pack(side=tk.LEFT, padx=5)
+        ttk.Button(player_frame, text="В конец", command=lambda: self.control_player("skip")).pack(side=tk.LEFT, padx=5)
+        tk.Label(player_frame, text="Скорость:", bg="lavenderblush2").pack(side=tk.LEFT, padx=5)
+        self.speed_var = tk.DoubleVar(value=0)
+        tk.Scale(player_frame, variable=self.speed_var, from_=-3, to=6, resolution=1, orient=tk.HORIZONTAL,
+                 showvalue=False, command=self.set_player_speed, bg="lavenderblush2",
+                 highlightthickness=0).pack(side=tk.LEFT, padx=5)
+        self.step_label = tk.Label(player_frame, text="", bg="lavenderblush2")
+        self.step_label.pack(side=tk.LEFT, padx=5)
+
+        status_frame = tk.Frame(root, bg="lavenderblush2")
+        status_frame.pack(fill=tk.X, pady=5)
+        self.profile_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(status_frame, text="Профилирование", variable=self.profile_var, command=self.toggle_profiling,
+                       bg="lavenderblush2").pack(side=tk.LEFT, padx=5)
+        ttk.Button(status_frame, text="Трасса", command=self.save_trace).pack(side=tk.LEFT, padx=5)
+        self.status_label = tk.Label(status_frame, text="", anchor="w", justify=tk.LEFT, wraplength=600,
+                                     bg="lavenderblush2")
+        self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        PROFILER.listeners.append(self.show_profile)
+
+    def toggle_profiling(self):
+        PROFILER.enabled = self.profile_var.get()
+        if not PROFILER.enabled:
+            self.status_label.config(text="")
+
+    def show_profile(self, record):
+        self.status_label.config(text=record.summary())
+
+    def save_trace(self):
+        if not PROFILER.records:
+            messagebox.showinfo("Трасса", "Нет замеров: включите профилирование и нарисуйте фигуру")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Trace Event JSON", "*.json")])
+        if not path:
+            return
+        try:
+            PROFILER.save_trace(path)
+        except OSError as e:
+            messagebox.showerror("Ошибка", str(e))
+
+    def start_player(self, player):
+        self.player = player
+        player.listeners.append(self.show_player_step)
+        player.set_speed(2 ** self.speed_var.get())
+        player.play()
+
+    def stop_player(self):
+        if self.player is not None:
+            self.player.stop()
+            self.player = None
+            self.step_label.config(text="")
+
+    def control_player(self, action):
+        if self.player is not None:
+            getattr(self.player, action)()
+
+    def set_player_speed(self, value):
+        # Шкала логарифмическая: от 1/8 до 64 шагов за исходный интервал
+        if self.player is not None:
+            self.player.set_speed(2 ** float(value))
+
+    def show_player_step(self, player):
+        total = player.length if player.length is not None else "?"
+        self.step_label.config(text=f"Шаг {player.frame + 1}/{total}")
 
     def set_shape(self, shape):
         self.shape_var.set(shape)
@@ -239,6 +319,65 @@ class GraphicEditor:
         tk.Label(self.input_frame, text="Размер ячейки", bg="lavenderblush2").grid(row=4, column=0, padx=5, pady=5)
         self.entry_cell_size = tk.Entry(self.input_frame, width=10)
         self.entry_cell_size.grid(row=4, column=1, padx=5, pady=5)
+        ttk.Button(self.input_frame, text="Анимация", command=self.animate_cube).grid(row=4, column=2, padx=5, pady=5)
+        ttk.Button(self.input_frame, text="Загрузить модель", command=self.load_mesh).grid(row=5, column=0, padx=5, pady=5)
+        ttk.Button(self.input_frame, text="Куб", command=self.cube_drawer.use_cube).grid(row=5, column=1, padx=5, pady=5)
+        ttk.Button(self.input_frame, text="Экспорт", command=self.export_cube_animation).grid(row=4, column=3, padx=5, pady=5)
+        self.cube_solid_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.input_frame, text="Грани", variable=self.cube_solid_var,
+                       bg="lavenderblush2").grid(row=5, column=2, padx=5, pady=5)
+
+    def get_cube_params(self):
+        return {
+            'translate_x': float(self.entry_tx.get()),
+            'translate_y': float(self.entry_ty.get()),
+            'translate_z': float(self.entry_tz.get()),
+            'rotate_x': float(self.entry_rx.get()),
+            'rotate_y': float(self.entry_ry.get()),
+            'rotate_z': float(self.entry_rz.get()),
+            'scale': float(self.entry_scale.get()),
+            'perspective': float(self.entry_perspective.get())
+        }
+
+    def load_mesh(self):
+        path = filedialog.askopenfilename(filetypes=[("Модели", "*.obj *.ply"), ("Все файлы", "*.*")])
+        if not path:
+            return
+        try:
+            mesh = self.cube_drawer.load_mesh(path)
+            messagebox.showinfo("Модель", f"Вершин: {len(mesh.vertices)}, ребер: {len(mesh.edges)}")
+        except (OSError, ValueError, KeyError) as e:
+            messagebox.showerror("Ошибка", f"Не удалось загрузить модель: {e}")
+
+    def animate_cube(self):
+        self.stop_player()
+        try:
+            cell_size = int(float(self.entry_cell_size.get()))
+            if cell_size < 1:
+                raise ValueError("Размер ячейки должен быть >= 1")
+            # Плавный переход из исходного положения в заданное по ключевым кадрам
+            animation = KeyframeAnimation(self.cube_drawer, [(0, {}), (1, self.get_cube_params())])
+            animation.play(self.ax, cell_size)
+            self.canvas.draw()
+        except ValueError as e:
+            messagebox.showerror("Ошибка", str(e))
+
+    def export_cube_animation(self):
+        try:
+            cell_size = int(float(self.entry_cell_size.get()))
+            if cell_size < 1:
+                raise ValueError("Размер ячейки должен быть >= 1")
+            path = filedialog.asksaveasfilename(defaultextension=".gif",
+                                                filetypes=[("GIF", "*.gif"), ("NumPy", "*.npy")])
+            if not path:
+                return
+            animation = KeyframeAnimation(self.cube_drawer, [(0, {}), (1, self.get_cube_params())])
+            if path.lower().endswith(".npy"):
+                animation.save_npy(path)
+            else:
+                animation.save_gif(path, cell_size)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Ошибка", str(e))
 
     def setup_polygon_inputs(self):
         tk.Label(self.input_frame, text="Точки многоугольника (x, y) через пробел, по одной на строку", bg="lavenderblush2").grid(row=0, column=0, columnspan=4, padx=5, pady=5)
@@ -281,12 +420,76 @@ class GraphicEditor:
         is_convex = self.polygon_editor.is_convex_polygon(points)
         messagebox.showinfo("Проверка выпуклости", f"Многоугольник {'выпуклый' if is_convex else 'не выпуклый'}")
 
+    def create_scene_node(self, shape, cell_size):
+        if shape == "Line":
+            method = {"DDA": 1, "Bresenham": 2, "Wu": 3}[self.algorithm.get()]
+            return LineNode(float(self.entry_x0.get()), float(self.entry_y0.get()),
+                            float(self.entry_x1.get()), float(self.entry_y1.get()), method)
+        if shape in ["Circle", "Ellipse", "Hyperbola", "Parabola"]:
+            xc = float(self.entry_xc.get())
+            yc = float(self.entry_yc.get())
+            if shape == "Circle":
+                return ConicNode(shape, xc, yc, a=float(self.entry_r.get()))
+            if shape == "Parabola":
+                return ConicNode(shape, xc, yc, p=float(self.entry_p.get()))
+            return ConicNode(shape, xc, yc, a=float(self.entry_a.get()), b=float(self.entry_b.get()))
+        if shape in ["Hermite", "Bezier", "BSpline"]:
+            points = self.get_curve_points()
+            return CurveNode(shape, points) if points else None
+        if shape == "Cube":
+            return CubeNode(self.get_cube_params())
+        if shape == "Polygon":
+            points = self.get_polygon_points(self.entry_points)
+            if not points:
+                return None
+            filled = self.polygon_mode_var.get() in ["Простая развертка", "Развертка с активными ребрами",
+                                                     "Заливка с затравкой", "Построчная заливка"]
+            color = self.fill_color_var.get()
+            # Узлы сцены задаются в клетках, а вершины вводятся в единицах графика
+            cells = [(x / cell_size, y / cell_size) for x, y in points]
+            return PolygonNode(cells, filled=filled, color=FILL_COLORS.get(color, (0, 0, 0)))
+        if shape in ["Delaunay", "Voronoi"]:
+            points = self.get_polygon_points(self.entry_points)
+            if not points or len(points) < 3:
+                return None
+            return PointSetNode([(x / cell_size, y / cell_size) for x, y in points], mode=shape.lower())
+        return None
+
+    def draw_to_scene(self, shape, cell_size):
+        if self.scene.cell_size != cell_size:
+            self.scene.resize(cell_size)
+        node = self.create_scene_node(shape, self.scene.cell_size)
+        if node is None:
+            messagebox.showerror("Ошибка", "Недостаточно данных для добавления фигуры в сцену")
+            return
+        self.scene.add(node)
+        self.scene.show(self.ax)
+        self.draw_canvas()
+
     def draw_shape(self):
+        # Замер охватывает разбор ввода, вызов рисовальщика и итоговую перерисовку холста
+        with PROFILER.call("draw_shape", self.ax, {"shape": self.shape_var.get()}):
+            self.render_shape()
+
+    def debug_shape(self):
+        with PROFILER.call("debug_shape", self.ax, {"shape": self.shape_var.get()}):
+            self.render_debug_shape()
+
+    def draw_canvas(self):
+        with PROFILER.phase("canvas.draw"):
+            self.canvas.draw()
+
+    def render_shape(self):
+        self.cube_drawer.stop_animation()
+        self.stop_player()
         try:
             shape = self.shape_var.get()
             cell_size = int(float(self.entry_cell_size.get()))
             if cell_size < 1:
                 raise ValueError("Размер ячейки должен быть >= 1")
+            if self.retain_var.get():
+                self.draw_to_scene(shape, cell_size)
+                return
             if shape == "Line":
                 x0 = float(self.entry_x0.get())
                 y0 = float(self.entry_y0.get())
@@ -311,22 +514,17 @@ class GraphicEditor:
                 elif shape == "Parabola":
                     p = float(self.entry_p.get())
                     self.conic_drawer.draw_conic("Parabola", xc, yc, 0, 0, p, cell_size, self.fig, self.ax)
-            elif shape in ["Hermite", "Bezier", "BSpline"]:
+            elif shape == "BSpline":
+                points = self.get_curve_points()
+                if points and len(points) >= 4:
+                    self.curve_drawer.edit_bspline(points, cell_size, self.ax)
+            elif shape in ["Hermite", "Bezier"]:
                 points = self.get_curve_points()
                 if points:
                     self.curve_drawer.draw_curve(shape, points, cell_size, self.ax)
             elif shape == "Cube":
-                transform_params = {
-                    'translate_x': float(self.entry_tx.get()),
-                    'translate_y': float(self.entry_ty.get()),
-                    'translate_z': float(self.entry_tz.get()),
-                    'rotate_x': float(self.entry_rx.get()),
-                    'rotate_y': float(self.entry_ry.get()),
-                    'rotate_z': float(self.entry_rz.get()),
-                    'scale': float(self.entry_scale.get()),
-                    'perspective': float(self.entry_perspective.get())
-                }
-                self.cube_drawer.draw_cube(cell_size, self.ax, transform_params)
+                transform_params = self.get_cube_params()
+                self.cube_drawer.draw_cube(cell_size, self.ax, transform_params, solid=self.cube_solid_var.get())
             elif shape == "Polygon":
                 points = self.get_polygon_points(self.entry_points)
                 segment_points = self.get_polygon_points(self.entry_segment) or []
@@ -343,8 +541,18 @@ class GraphicEditor:
                 if mode == "Проверка точки" and len(segment_points) != 1:
                     messagebox.showwarning("Предупреждение", "Для проверки точки нужна ровно одна точка")
                     return
-                asyncio.run(self.polygon_editor.draw_polygon(points, segment_points, cell_size, self.ax,
-                                                            mode=mode, fill_color=self.fill_color_var.get()))
+                if mode == "Отсечение" and len(segment_points) < 2:
+                    messagebox.showwarning("Предупреждение",
+                                           "Для отсечения нужно окно: 2 точки (прямоугольник) или многоугольник")
+                    return
+                if mode == "Отсечение отрезков" and (len(segment_points) < 2 or len(segment_points) % 2):
+                    messagebox.showwarning("Предупреждение", "Для отсечения отрезков нужны пары точек")
+                    return
+                if mode == "Отсечение отрезков" and not self.polygon_editor.is_convex_polygon(points):
+                    messagebox.showwarning("Предупреждение", "Отрезки отсекаются только выпуклым многоугольником")
+                    return
+                self.polygon_editor.draw_polygon(points, segment_points, cell_size, self.ax,
+                                                 mode=mode, fill_color=self.fill_color_var.get())
             elif shape in ["Delaunay", "Voronoi"]:
                 points = self.get_polygon_points(self.entry_points)
                 if points and len(points) >= 3:
@@ -359,14 +567,17 @@ class GraphicEditor:
                     if len(unique_points) < 3:
                         messagebox.showerror("Ошибка", "Нужно минимум 3 уникальные точки в области [0, 100]")
                         return
-                    asyncio.run(self.voronoi_delaunay.draw(unique_points, cell_size, self.ax, mode=shape.lower()))
+                    self.voronoi_delaunay.draw(unique_points, cell_size, self.ax, mode=shape.lower())
                 else:
                     messagebox.showerror("Ошибка", "Нужно минимум 3 точки")
-            self.canvas.draw()
+            self.draw_canvas()
         except ValueError as e:
             messagebox.showerror("Ошибка", f"Пожалуйста, введите корректные числа: {str(e)}")
 
-    def debug_shape(self):
+    def render_debug_shape(self):
+        self.cube_drawer.stop_animation()
+        self.stop_player()
+        player = None
         try:
             shape = self.shape_var.get()
             cell_size = int(float(self.entry_cell_size.get()))
@@ -378,40 +589,31 @@ class GraphicEditor:
                 x1 = float(self.entry_x1.get())
                 y1 = float(self.entry_y1.get())
                 method = {"DDA": 1, "Bresenham": 2, "Wu": 3}[self.algorithm.get()]
-                self.line_drawer.start_debug(method, x0, y0, x1, y1, cell_size, self.fig, self.ax)
+                player = self.line_drawer.start_debug(method, x0, y0, x1, y1, cell_size, self.fig, self.ax)
             elif shape in ["Circle", "Ellipse", "Hyperbola", "Parabola"]:
                 xc = float(self.entry_xc.get())
                 yc = float(self.entry_yc.get())
                 if shape == "Circle":
                     r = float(self.entry_r.get())
-                    self.conic_drawer.start_debug("Circle", xc, yc, r, 0, 0, cell_size, self.fig, self.ax)
+                    player = self.conic_drawer.start_debug("Circle", xc, yc, r, 0, 0, cell_size, self.fig, self.ax)
                 elif shape == "Ellipse":
                     a = float(self.entry_a.get())
                     b = float(self.entry_b.get())
-                    self.conic_drawer.start_debug("Ellipse", xc, yc, a, b, 0, cell_size, self.fig, self.ax)
+                    player = self.conic_drawer.start_debug("Ellipse", xc, yc, a, b, 0, cell_size, self.fig, self.ax)
                 elif shape == "Hyperbola":
                     a = float(self.entry_a.get())
                     b = float(self.entry_b.get())
-                    self.conic_drawer.start_debug("Hyperbola", xc, yc, a, b, 0, cell_size, self.fig, self.ax)
+                    player = self.conic_drawer.start_debug("Hyperbola", xc, yc, a, b, 0, cell_size, self.fig, self.ax)
                 elif shape == "Parabola":
                     p = float(self.entry_p.get())
-                    self.conic_drawer.start_debug("Parabola", xc, yc, 0, 0, p, cell_size, self.fig, self.ax)
+                    player = self.conic_drawer.start_debug("Parabola", xc, yc, 0, 0, p, cell_size, self.fig, self.ax)
             elif shape in ["Hermite", "Bezier", "BSpline"]:
                 points = self.get_curve_points()
                 if points:
-                    self.curve_drawer.start_debug(shape, points, cell_size, self.ax)
+                    player = self.curve_drawer.start_debug(shape, points, cell_size, self.ax)
             elif shape == "Cube":
-                transform_params = {
-                    'translate_x': float(self.entry_tx.get()),
-                    'translate_y': float(self.entry_ty.get()),
-                    'translate_z': float(self.entry_tz.get()),
-                    'rotate_x': float(self.entry_rx.get()),
-                    'rotate_y': float(self.entry_ry.get()),
-                    'rotate_z': float(self.entry_rz.get()),
-                    'scale': float(self.entry_scale.get()),
-                    'perspective': float(self.entry_perspective.get())
-                }
-                self.cube_drawer.start_debug(cell_size, self.ax, transform_params)
+                transform_params = self.get_cube_params()
+                player = self.cube_drawer.start_debug(cell_size, self.ax, transform_params, solid=self.cube_solid_var.get())
             elif shape == "Polygon":
                 points = self.get_polygon_points(self.entry_points)
                 segment_points = self.get_polygon_points(self.entry_segment) or []
@@ -428,8 +630,18 @@ class GraphicEditor:
                 if mode == "Проверка точки" and len(segment_points) != 1:
                     messagebox.showwarning("Предупреждение", "Для проверки точки нужна ровно одна точка")
                     return
-                asyncio.run(self.polygon_editor.draw_polygon(points, segment_points, cell_size, self.ax,
-                                                            mode=mode, fill_color=self.fill_color_var.get(), debug=True))
+                if mode == "Отсечение" and len(segment_points) < 2:
+                    messagebox.showwarning("Предупреждение",
+                                           "Для отсечения нужно окно: 2 точки (прямоугольник) или многоугольник")
+                    return
+                if mode == "Отсечение отрезков" and (len(segment_points) < 2 or len(segment_points) % 2):
+                    messagebox.showwarning("Предупреждение", "Для отсечения отрезков нужны пары точек")
+                    return
+                if mode == "Отсечение отрезков" and not self.polygon_editor.is_convex_polygon(points):
+                    messagebox.showwarning("Предупреждение", "Отрезки отсекаются только выпуклым многоугольником")
+                    return
+                player = self.polygon_editor.start_debug(points, segment_points, cell_size, self.ax,
+                                                         mode=mode, fill_color=self.fill_color_var.get())
             elif shape in ["Delaunay", "Voronoi"]:
                 points = self.get_polygon_points(self.entry_points)
                 if points and len(points) >= 3:
@@ -445,16 +657,20 @@ class GraphicEditor:
                         messagebox.showerror("Ошибка", "Нужно минимум 3 уникальные точки в области [0, 100]")
                         return
                     try:
-                        asyncio.run(self.voronoi_delaunay.draw(unique_points, cell_size, self.ax, mode=shape.lower(), debug=True))
+                        player = self.voronoi_delaunay.start_debug(unique_points, cell_size, self.ax, mode=shape.lower())
                     except Exception as e:
                         messagebox.showerror("Ошибка отладки", f"Не удалось выполнить отладку: {str(e)}")
                 else:
                     messagebox.showerror("Ошибка", "Нужно минимум 3 точки")
-            self.canvas.draw()
+            if player is not None:
+                self.start_player(player)
         except ValueError as e:
             messagebox.showerror("Ошибка", f"Пожалуйста, введите корректные числа: {str(e)}")
 
     def clear_canvas(self):
+        self.cube_drawer.stop_animation()
+        self.stop_player()
+        self.scene.clear()
         self.ax.clear()
         self.canvas.draw()
 
@@ -0,0 +1,1288 @@
+import math
+import heapq
+import itertools
+import numpy as np
+from profiling import PROFILER
+
+# Вычислительные ядра без matplotlib: каждое возвращает массивы (клетки, индексы, отрезки, треугольники).
+# Ядра с суффиксом _steps — генераторы шагов (kind, data) для режима отладки; результат алгоритма
+# возвращается из генератора и забирается через run_steps или yield from.
+
+
+def run_steps(steps):
+    """Прогнать генератор шагов без отрисовки и вернуть результат алгоритма."""
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+
+class StepStream:
+    """Итерация по шагам ядра; после исчерпания результат алгоритма доступен в value."""
+
+    def __init__(self, steps):
+        self.steps = steps
+        self.value = None
+
+    def __iter__(self):
+        self.value = yield from self.steps
+
+
+def dda_pixels(x0, y0, x1, y1):
+    """Пиксели (x, y, alpha) отрезка по алгоритму ЦДА."""
+    dx = x1 - x0
+    dy = y1 - y0
+    steps = max(abs(dx), abs(dy)) or 1
+    dx = dx / steps
+    dy = dy / steps
+    x = x0 + 0.5 * (1 if dx > 0 else -1 if dx < 0 else 0)
+    y = y0 + 0.5 * (1 if dy > 0 else -1 if dy < 0 else 0)
+
+    pixels = [(int(x), int(y), 1.0)]
+    for _ in range(int(steps)):
+        x += dx
+        y += dy
+        pixels.append((int(x), int(y), 1.0))
+    return pixels
+
+
+def bresenham_pixels(x0, y0, x1, y1):
+    """Пиксели (x, y, alpha) отрезка по алгоритму Брезенхема."""
+    x0, y0, x1, y1 = int(x0), int(y0), int(x1), int(y1)
+    dx = abs(x1 - x0)
+    dy = abs(y1 - y0)
+    sx = 1 if x0 < x1 else -1
+    sy = 1 if y0 < y1 else -1
+    x, y = x0, y0
+
+    pixels = [(x, y, 1.0)]
+    if dx > dy:
+        err = 2 * dy - dx
+        while x != x1:
+            x += sx
+            if err >= 0:
+                y += sy
+                err -= 2 * dx
+            err += 2 * dy
+            pixels.append((x, y, 1.0))
+    else:
+        err = 2 * dx - dy
+        while y != y1:
+            y += sy
+            if err >= 0:
+                x += sx
+                err -= 2 * dy
+            err += 2 * dx
+            pixels.append((x, y, 1.0))
+    return pixels
+
+
+def wu_pixels(x0, y0, x1, y1):
+    """Пары пикселей (x, y, alpha) сглаженного отрезка по Ву."""
+    cells, coverage = wu_segments([[(x0, y0), (x1, y1)]])
+    return [(int(x), int(y), float(alpha)) for (x, y), alpha in zip(cells, coverage)]
+
+
+def wu_segments(segments, return_index=False):
+    """Клетки сглаженных по Ву отрезков (N, 2) и их покрытие (N,); при return_index — и номер отрезка.
+
+    На каждый столбец главной оси приходится пара клеток. Покрытие крайних столбцов умножается
+    на долю столбца, которую отрезок действительно проходит, поэтому стыки ломаной не темнеют;
+    отрезок нулевой длины дает одну точку.
+    """
+    segments = np.asarray(segments, dtype=float).reshape(-1, 2, 2)
+    delta = segments[:, 1] - segments[:, 0]
+    steep = np.abs(delta[:, 1]) > np.abs(delta[:, 0])
+    # У крутых отрезков главная ось — y: считаем в переставленных координатах
+    major = np.where(steep[:, None, None], segments[..., ::-1], segments)
+    major = np.where((major[:, 0, 0] > major[:, 1, 0])[:, None, None], major[:, ::-1], major)
+    x0, y0 = major[:, 0, 0], major[:, 0, 1]
+    x1, y1 = major[:, 1, 0], major[:, 1, 1]
+    dx = x1 - x0
+    gradient = np.divide(y1 - y0, dx, out=np.zeros_like(dx), where=dx != 0)
+    first = np.floor(x0 + 0.5).astype(np.int64)
+    counts = np.floor(x1 + 0.5).astype(np.int64) - first + 1
+    owner = np.repeat(np.arange(len(segments)), counts)
+    x = first[owner] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    # Доля столбца [x - 0.5, x + 0.5] между концами отрезка
+    gap = np.clip(np.minimum(x1[owner], x + 0.5) - np.maximum(x0[owner], x - 0.5), 0, 1)
+    gap = np.where(dx[owner] > 0, gap, 1)
+    y = y0[owner] + gradient[owner] * (x - x0[owner])
+    row = np.floor(y)
+    fraction = y - row
+    row = row.astype(np.int64)
+    cells = np.empty((2 * len(x), 2), dtype=np.int64)
+    cells[:, 0] = np.repeat(x, 2)
+    cells[0::2, 1] = row
+    cells[1::2, 1] = row + 1
+    coverage = np.empty(2 * len(x))
+    coverage[0::2] = (1 - fraction) * gap
+    coverage[1::2] = fraction * gap
+    owner = np.repeat(owner, 2)
+    swapped = steep[owner]
+    cells[swapped] = cells[swapped, ::-1]
+    return (cells, coverage, owner) if return_index else (cells, coverage)
+
+
+def dda_segments(segments, return_index=False):
+    """Клетки (N, 2) пакета отрезков по ЦДА; при return_index — и номер отрезка каждой клетки."""
+    segments = np.floor(np.asarray(segments, dtype=float)).astype(np.int64).reshape(-1, 2, 2)
+    start = segments[:, 0]
+    delta = segments[:, 1] - start
+    steps = np.abs(delta).max(axis=1)
+    counts = steps + 1
+    owner = np.repeat(np.arange(len(segments)), counts)
+    t = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    # У вырожденного отрезка ноль шагов: деление на 1 оставляет одну клетку
+    fraction = t / np.maximum(steps, 1)[owner]
+    cells = start[owner] + np.rint(fraction[:, None] * delta[owner]).astype(np.int64)
+    return (cells, owner) if return_index else cells
+
+
+LINE_METHODS = {1: dda_pixels, 2: bresenham_pixels, 3: wu_pixels}
+
+
+def line_cells(method, x0, y0, x1, y1):
+    """Клетки отрезка (N, 2) и их покрытие (N,) для метода 1 (ЦДА), 2 (Брезенхем) или 3 (Ву)."""
+    pixels = np.array(LINE_METHODS.get(method, dda_pixels)(x0, y0, x1, y1), dtype=float).reshape(-1, 3)
+    return pixels[:, :2].astype(np.int64), pixels[:, 2]
+
+
+def scanline_spans(points, y_start=None, y_stop=None):
+    """Отрезки заливки многоугольника (y, x_start, x_end) для строк [y_start, y_stop)."""
+    pts = np.asarray(points, dtype=float)
+    p1 = pts
+    p2 = np.roll(pts, -1, axis=0)
+    keep = p1[:, 1] != p2[:, 1]
+    p1, p2 = p1[keep], p2[keep]
+    swap = (p1[:, 1] > p2[:, 1])[:, None]
+    lower = np.where(swap, p2, p1)
+    upper = np.where(swap, p1, p2)
+    inv_m = (upper[:, 0] - lower[:, 0]) / (upper[:, 1] - lower[:, 1])
+    # Ребро пересекает строку y при ymin <= y < ymax, как в таблице активных ребер
+    first = np.ceil(lower[:, 1]).astype(np.int64)
+    stop = np.ceil(upper[:, 1]).astype(np.int64)
+    if y_start is not None:
+        first = np.maximum(first, y_start)
+    if y_stop is not None:
+        stop = np.minimum(stop, y_stop)
+    counts = np.maximum(stop - first, 0)
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty
+    edge = np.repeat(np.arange(len(counts)), counts)
+    ys = first[edge] + np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    xs = lower[edge, 0] + (ys - lower[edge, 1]) * inv_m[edge]
+    order = np.lexsort((xs, ys))
+    ys, xs = ys[order], np.trunc(xs[order]).astype(np.int64)
+    return ys[0::2], xs[0::2], xs[1::2]
+
+
+def spans_to_cells(ys, x_starts, x_ends):
+    """Развернуть отрезки строк (границы включаются) в клетки (N, 2)."""
+    ys = np.asarray(ys, dtype=np.int64)
+    x_starts = np.asarray(x_starts, dtype=np.int64)
+    counts = np.maximum(np.asarray(x_ends, dtype=np.int64) - x_starts + 1, 0)
+    owner = np.repeat(np.arange(len(ys)), counts)
+    xs = x_starts[owner] + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.column_stack((xs, ys[owner]))
+
+
+def scanline_cells(points):
+    """Клетки заливки многоугольника построчной разверткой (без отсечения по растру)."""
+    return spans_to_cells(*scanline_spans(points))
+
+
+STROKE_JOINS = ("miter", "round", "bevel")
+STROKE_CAPS = ("butt", "square", "round")
+
+
+def _arc_steps(half_width):
+    """Число точек дуги до 180° с отклонением хорды от окружности не больше четверти клетки."""
+    return max(2, int(np.ceil(np.pi * np.sqrt(max(half_width, 0.0) / 2))) + 1)
+
+
+def _fans(centers, start_angles, sweeps, radius, steps):
+    """Выпуклые секторы (K, steps + 1, 2): центр и дуга от start_angles на sweeps радиан."""
+    angles = start_angles[:, None] + sweeps[:, None] * np.linspace(0, 1, steps)
+    arc = centers[:, None] + radius * np.stack((np.cos(angles), np.sin(angles)), axis=-1)
+    return np.concatenate((centers[:, None], arc), axis=1)
+
+
+def _pad_pieces(pieces):
+    """Выровнять число вершин выпуклых кусков повтором последней вершины и сложить в один массив."""
+    pieces = [piece for piece in pieces if len(piece)]
+    if not pieces:
+        return np.empty((0, 3, 2))
+    size = max(piece.shape[1] for piece in pieces)
+    return np.concatenate([np.concatenate((piece, np.repeat(piece[:, -1:], size - piece.shape[1], axis=1)), axis=1)
+                           for piece in pieces])
+
+
+def stroke_polygons(points, width, join="miter", cap="butt", closed=False, miter_limit=4.0):
+    """Обводка ломаной толщиной width как набор выпуклых многоугольников (K, V, 2).
+
+    Куски — прямоугольники звеньев, стыки (miter, round, bevel) и концы (butt, square, round);
+    их объединение и есть обводка, поэтому самопересечения ломаной не требуют правила ненулевой обмотки.
+    Острый стык с отношением длины острия к полутолщине больше miter_limit срезается, как bevel.
+    """
+    if width <= 0:
+        raise ValueError("Stroke width must be positive")
+    if join not in STROKE_JOINS:
+        raise ValueError(f"Unknown join: {join}")
+    if cap not in STROKE_CAPS:
+        raise ValueError(f"Unknown cap: {cap}")
+    pts = np.asarray(points, dtype=float).reshape(-1, 2)
+    if len(pts) > 1:
+        pts = pts[np.concatenate(([True], (np.diff(pts, axis=0) != 0).any(axis=1)))]
+    if closed and len(pts) > 2 and (pts[0] == pts[-1]).all():
+        pts = pts[:-1]
+    half = width / 2
+    steps = _arc_steps(half)
+    if len(pts) < 2:
+        if len(pts) == 0 or cap == "butt":
+            return np.empty((0, 3, 2))
+        if cap == "round":
+            return _fans(pts, np.zeros(1), np.full(1, 2 * np.pi), half, 2 * steps)[:, 1:]
+        return pts[:, None] + half * np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]])
+
+    closed = closed and len(pts) > 2
+    starts = pts
+    ends = np.roll(pts, -1, axis=0)
+    if not closed:
+        starts, ends = starts[:-1], ends[:-1]
+    directions = ends - starts
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+    normals = np.column_stack((-directions[:, 1], directions[:, 0]))
+    if not closed and cap == "square":
+        starts = starts.copy()
+        ends = ends.copy()
+        starts[0] -= directions[0] * half
+        ends[-1] += directions[-1] * half
+    offset = normals * half
+    pieces = [np.stack((starts + offset, ends + offset, ends - offset, starts - offset), axis=1)]
+
+    # Стык i — между звеньями i - 1 и i в вершине звена i
+    if closed:
+        incoming, outgoing, corners = np.roll(np.arange(len(normals)), 1), np.arange(len(normals)), pts
+    else:
+        incoming, outgoing, corners = np.arange(len(normals) - 1), np.arange(1, len(normals)), pts[1:-1]
+    n0, n1 = normals[incoming], normals[outgoing]
+    cross = directions[incoming, 0] * directions[outgoing, 1] - directions[incoming, 1] * directions[outgoing, 0]
+    turn = np.abs(cross) > 1e-12
+    # Внешняя сторона поворота налево — правая (-n), направо — левая (+n)
+    side = -np.sign(cross[turn])[:, None]
+    corners, n0, n1 = corners[turn], n0[turn] * side, n1[turn] * side
+    outer0 = corners + n0 * half
+    outer1 = corners + n1 * half
+    if join == "round":
+        start = np.arctan2(n0[:, 1], n0[:, 0])
+        sweep = np.arctan2(n0[:, 0] * n1[:, 1] - n0[:, 1] * n1[:, 0], (n0 * n1).sum(axis=1))
+        pieces.append(_fans(corners, start, sweep, half, steps))
+    else:
+        bisector = n0 + n1
+        tip = corners + bisector * (half / (1 + (n0 * n1).sum(axis=1)))[:, None]
+        # Отношение длины острия к полутолщине равно 2 / |n0 + n1|
+        sharp = np.linalg.norm(bisector, axis=1) * miter_limit < 2
+        if join == "bevel":
+            sharp[:] = True
+        tip[sharp] = outer1[sharp]
+        pieces.append(np.stack((corners, outer0, tip, outer1), axis=1))
+
+    if not closed and cap == "round":
+        start_angles = np.arctan2(normals[[0, -1], 1], normals[[0, -1], 0]) + np.array([0, np.pi])
+        pieces.append(_fans(np.array([starts[0], ends[-1]]), start_angles, np.full(2, np.pi), half, 2 * steps - 1))
+    return _pad_pieces(pieces)
+
+
+def convex_spans(polygons, y_start=None, y_stop=None):
+    """Отрезки строк (y, x_start, x_end) для пакета выпуклых многоугольников (K, V, 2) одним проходом.
+
+    Строка y заливается там, где центры клеток x_start..x_end лежат внутри куска;
+    ребро пересекает строку при ymin <= y < ymax, как в scanline_spans.
+    """
+    polygons = np.asarray(polygons, dtype=float)
+    empty = np.empty(0, dtype=np.int64)
+    if polygons.size == 0:
+        return empty, empty, empty
+    p1 = polygons.reshape(-1, 2)
+    p2 = np.roll(polygons, -1, axis=1).reshape(-1, 2)
+    piece = np.repeat(np.arange(len(polygons)), polygons.shape[1])
+    keep = p1[:, 1] != p2[:, 1]
+    p1, p2, piece = p1[keep], p2[keep], piece[keep]
+    swap = (p1[:, 1] > p2[:, 1])[:, None]
+    lower = np.where(swap, p2, p1)
+    upper = np.where(swap, p1, p2)
+    inv_m = (upper[:, 0] - lower[:, 0]) / (upper[:, 1] - lower[:, 1])
+    first = np.ceil(lower[:, 1]).astype(np.int64)
+    stop = np.ceil(upper[:, 1]).astype(np.int64)
+    if y_start is not None:
+        first = np.maximum(first, y_start)
+    if y_stop is not None:
+        stop = np.minimum(stop, y_stop)
+    counts = np.maximum(stop - first, 0)
+    total = int(counts.sum())
+    if total == 0:
+        return empty, empty, empty
+    edge = np.repeat(np.arange(len(counts)), counts)
+    ys = first[edge] + np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    xs = lower[edge, 0] + (ys - lower[edge, 1]) * inv_m[edge]
+    owner = piece[edge]
+    # Выпуклый кусок пересекает строку одним отрезком: от наименьшего до наибольшего пересечения
+    order = np.lexsort((owner, ys))
+    ys, xs, owner = ys[order], xs[order], owner[order]
+    boundary = np.flatnonzero(np.concatenate(([True], (ys[1:] != ys[:-1]) | (owner[1:] != owner[:-1]))))
+    x_starts = np.ceil(np.minimum.reduceat(xs, boundary)).astype(np.int64)
+    x_ends = np.floor(np.maximum.reduceat(xs, boundary)).astype(np.int64)
+    ys = ys[boundary]
+    visible = x_starts <= x_ends
+    return ys[visible], x_starts[visible], x_ends[visible]
+
+
+def stroke_spans(points, width, join="miter", cap="butt", closed=False, miter_limit=4.0):
+    """Отрезки строк обводки ломаной (см. stroke_polygons и convex_spans)."""
+    return convex_spans(stroke_polygons(points, width, join, cap, closed, miter_limit))
+
+
+def orientation(p, q, r):
+    """Ориентация тройки точек: -1 — поворот против часовой стрелки, 1 — по часовой, 0 — на одной прямой."""
+    val = (q[1] - p[1]) * (r[0] - q[0]) - (q[0] - p[0]) * (r[1] - q[1])
+    if val == 0:
+        return 0
+    return 1 if val > 0 else -1
+
+
+def segment_intersection(p1, p2, q1, q2):
+    """Точка пересечения отрезков p1p2 и q1q2 или None; для наложенных отрезков — общий конец."""
+    def on_segment(p, q, r):
+        return (q[0] <= max(p[0], r[0]) and q[0] >= min(p[0], r[0]) and
+                q[1] <= max(p[1], r[1]) and q[1] >= min(p[1], r[1]))
+
+    o1 = orientation(p1, p2, q1)
+    o2 = orientation(p1, p2, q2)
+    o3 = orientation(q1, q2, p1)
+    o4 = orientation(q1, q2, p2)
+
+    if o1 != o2 and o3 != o4:
+        denom = ((p1[0] - p2[0]) * (q1[1] - q2[1]) - (p1[1] - p2[1]) * (q1[0] - q2[0]))
+        if denom == 0:
+            return None
+        t = ((p1[0] - q1[0]) * (q1[1] - q2[1]) - (p1[1] - q1[1]) * (q1[0] - q2[0])) / denom
+        u = -((p1[0] - p2[0]) * (p1[1] - q1[1]) - (p1[1] - p2[1]) * (p1[0] - q1[0])) / denom
+        if 0 <= t <= 1 and 0 <= u <= 1:
+            x = p1[0] + t * (p2[0] - p1[0])
+            y = p1[1] + t * (p2[1] - p1[1])
+            return (x, y)
+        return None
+
+    if o1 == 0 and o2 == 0 and o3 == 0 and o4 == 0:
+        if on_segment(p1, q1, p2):
+            return q1
+        if on_segment(p1, q2, p2):
+            return q2
+        if on_segment(q1, p1, q2):
+            return p1
+        if on_segment(q1, p2, q2):
+            return p2
+    return None
+
+
+def graham_steps(points):
+    """Шаги Грэхема (монотонная цепь): ("push", i), ("pop", i) и ("upper", None) перед верхней цепью.
+
+    Возвращает индексы вершин оболочки против часовой стрелки.
+    """
+    order = sorted(range(len(points)), key=lambda i: tuple(points[i]))
+    if len(order) < 3:
+        return order
+    chains = []
+    for chain_order in (order, order[::-1]):
+        if chains:
+            yield "upper", None
+        stack = []
+        for i in chain_order:
+            while len(stack) > 1 and orientation(points[stack[-2]], points[stack[-1]], points[i]) != -1:
+                yield "pop", stack.pop()
+            stack.append(i)
+            yield "push", i
+        chains.append(stack)
+    lower, upper = chains
+    # Крайние точки входят в обе цепи
+    return lower[:-1] + upper[:-1]
+
+
+def graham_hull(points):
+    return np.array(run_steps(graham_steps(points)), dtype=np.int64)
+
+
+def jarvis_steps(points):
+    """Шаги Джарвиса: ("hull", i) для каждой найденной вершины; возвращает индексы вершин оболочки."""
+    n = len(points)
+    if n < 3:
+        return list(range(n))
+    start = min(range(n), key=lambda i: (points[i][0], points[i][1]))
+    hull = []
+    p = start
+    # Совпадающие точки могут не замкнуть обход, поэтому вершин не больше n
+    while len(hull) < n:
+        hull.append(p)
+        yield "hull", p
+        q = (p + 1) % n
+        for i in range(n):
+            if orientation(points[p], points[i], points[q]) == -1:
+                q = i
+        p = q
+        if p == start:
+            break
+    return hull
+
+
+def jarvis_hull(points):
+    return np.array(run_steps(jarvis_steps(points)), dtype=np.int64)
+
+
+def intersection_steps(points, segment):
+    """Шаги поиска пересечений отрезка с ребрами многоугольника: ("hit", (x, y)); возвращает список точек."""
+    hits = []
+    n = len(points)
+    for i in range(n):
+        hit = segment_intersection(segment[0], segment[1], points[i], points[(i + 1) % n])
+        if hit:
+            hits.append(hit)
+            yield "hit", hit
+    return hits
+
+
+def polygon_intersections(points, segment):
+    return np.array(run_steps(intersection_steps(points, segment)), dtype=float).reshape(-1, 2)
+
+
+def crossing_steps(points, point):
+    """Шаги проверки точки лучом: ("cross", (i, j)) для каждого пересеченного ребра; возвращает признак."""
+    x, y = point
+    n = len(points)
+    inside = False
+    j = n - 1
+    for i in range(n):
+        if ((points[i][1] > y) != (points[j][1] > y)) and \
+           (x < (points[j][0] - points[i][0]) * (y - points[i][1]) /
+                (points[j][1] - points[i][1] + 1e-10) + points[i][0]):
+            inside = not inside
+            yield "cross", (i, j)
+        j = i
+    return inside
+
+
+def points_in_polygon(polygon, points):
+    """Проверка пакета точек (P, 2) тем же лучом, что и crossing_steps: маска (P,)."""
+    polygon = np.asarray(polygon, dtype=float).reshape(-1, 2)
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    xi, yi = polygon[:, 0], polygon[:, 1]
+    xj, yj = np.roll(xi, 1), np.roll(yi, 1)
+    x, y = points[:, :1], points[:, 1:]
+    crosses = ((yi > y) != (yj > y)) & (x < (xj - xi) * (y - yi) / (yj - yi + 1e-10) + xi)
+    return crosses.sum(axis=1) % 2 == 1
+
+
+def _signed_area(points):
+    x, y = points[:, 0], points[:, 1]
+    return (np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2
+
+
+def _counterclockwise(points):
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    return points[::-1] if _signed_area(points) < 0 else points
+
+
+def convex_window(window):
+    """Окно отсечения против часовой стрелки: прямоугольник (x_min, y_min, x_max, y_max) или выпуклый многоугольник."""
+    if np.ndim(window) == 1:
+        x_min, y_min, x_max, y_max = window
+        return np.array([(x_min, y_min), (x_max, y_min), (x_max, y_max), (x_min, y_max)], dtype=float)
+    window = _counterclockwise(window)
+    edges = np.roll(window, -1, axis=0) - window
+    turns = edges[:, 0] * np.roll(edges[:, 1], -1) - edges[:, 1] * np.roll(edges[:, 0], -1)
+    if len(window) < 3 or np.any(turns < 0):
+        raise ValueError("Clip window must be a convex polygon")
+    return window
+
+
+def _clip_half_plane(points, owner, a, b):
+    """Отсечь многоугольники, записанные подряд (вершины points, номера owner), полуплоскостью слева от a→b.
+
+    Для ребра из вершины i в следующую выдается точка пересечения с границей, если ребро ее
+    пересекает, и следующая вершина, если она внутри — все ребра обрабатываются одной операцией.
+    """
+    if not len(points):
+        return points, owner
+    d = (b[0] - a[0]) * (points[:, 1] - a[1]) - (b[1] - a[1]) * (points[:, 0] - a[0])
+    index = np.arange(len(points))
+    change = owner[1:] != owner[:-1]
+    nxt = index + 1
+    nxt[np.r_[change, True]] = index[np.r_[True, change]]
+    inside = d >= 0
+    crossing = inside != inside[nxt]
+    counts = crossing.astype(np.int64) + inside[nxt]
+    src = np.repeat(index, counts)
+    k = np.arange(len(src)) - np.repeat(np.cumsum(counts) - counts, counts)
+    result = points[nxt[src]]
+    hit = crossing[src] & (k == 0)
+    i, j = src[hit], nxt[src[hit]]
+    t = d[i] / (d[i] - d[j])
+    result[hit] = points[i] + t[:, None] * (points[j] - points[i])
+    # На стороне вдоль оси точка пересечения ставится ровно на границу: иначе ошибка округления
+    # (-0.9999999999999929 вместо -1) меняет усечение x в scanline_spans
+    if a[0] == b[0]:
+        result[hit, 0] = a[0]
+    elif a[1] == b[1]:
+        result[hit, 1] = a[1]
+    return result, owner[src]
+
+
+def sutherland_hodgman_steps(subject, window):
+    """Шаги отсечения многоугольника выпуклым окном: ("edge", (i, многоугольник после i-го ребра окна)).
+
+    Возвращает отсеченный многоугольник (M, 2); пустой, если от него ничего не осталось.
+    """
+    window = convex_window(window)
+    points = np.asarray(subject, dtype=float).reshape(-1, 2)
+    owner = np.zeros(len(points), dtype=np.int64)
+    for i in range(len(window)):
+        points, owner = _clip_half_plane(points, owner, window[i], window[(i + 1) % len(window)])
+        yield "edge", (i, points)
+    return points if len(points) >= 3 else np.empty((0, 2))
+
+
+def sutherland_hodgman(subject, window):
+    return run_steps(sutherland_hodgman_steps(subject, window))
+
+
+def clip_polygons(polygons, window):
+    """Пакетное отсечение многоугольников выпуклым окном (Сазерленд — Ходжман по всем вершинам сразу).
+
+    Многоугольники вне окна по охватывающему прямоугольнику отбрасываются, целиком внутри —
+    возвращаются без изменений, отсекаются только пересекающие границу. Возвращает список
+    отсеченных многоугольников и номера исходных (многоугольники без площади пропускаются).
+    """
+    window = convex_window(window)
+    polygons = [np.asarray(p, dtype=float).reshape(-1, 2) for p in polygons]
+    source = np.array([i for i, p in enumerate(polygons) if len(p) >= 3], dtype=np.int64)
+    if not len(source):
+        return [], source
+    counts = np.array([len(polygons[i]) for i in source])
+    points = np.concatenate([polygons[i] for i in source])
+    starts = np.cumsum(counts) - counts
+    low = np.minimum.reduceat(points, starts)
+    high = np.maximum.reduceat(points, starts)
+    outside = np.any((high < window.min(axis=0)) | (low > window.max(axis=0)), axis=1)
+    a, b = window, np.roll(window, -1, axis=0)
+    d = ((b[:, 0] - a[:, 0]) * (points[:, 1:] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (points[:, :1] - a[:, 0]))
+    inside = np.logical_and.reduceat(np.all(d >= 0, axis=1), starts)
+    straddling = np.flatnonzero(~outside & ~inside)
+    owner = np.repeat(np.arange(len(source)), counts)
+    keep = np.isin(owner, straddling)
+    clipped, clipped_owner = points[keep], owner[keep]
+    for i in range(len(window)):
+        clipped, clipped_owner = _clip_half_plane(clipped, clipped_owner, a[i], b[i])
+    result = {int(k): polygons[source[k]] for k in np.flatnonzero(inside & ~outside)}
+    if len(clipped):
+        breaks = np.flatnonzero(clipped_owner[1:] != clipped_owner[:-1]) + 1
+        for k, part in zip(clipped_owner[np.r_[0, breaks]], np.split(clipped, breaks)):
+            if len(part) >= 3:
+                result[int(k)] = part
+    order = sorted(result)
+    return [result[k] for k in order], source[order]
+
+
+def cyrus_beck_steps(segments, edge_points, normals):
+    """Шаги отсечения отрезков (N, 4) выпуклым многоугольником по точкам ребер и внутренним нормалям (E, 2).
+
+    Каждое ребро сужает интервалы параметров всех отрезков сразу: ("edge", (i, t_enter, t_exit)).
+    Возвращает t_enter, t_exit (N,) и маску видимых отрезков; видимая часть — [t_enter, t_exit].
+    """
+    segments = np.asarray(segments, dtype=float).reshape(-1, 4)
+    start, direction = segments[:, :2], segments[:, 2:] - segments[:, :2]
+    t_enter = np.zeros(len(segments))
+    t_exit = np.ones(len(segments))
+    visible = np.ones(len(segments), dtype=bool)
+    for i, (point, normal) in enumerate(zip(np.asarray(edge_points, dtype=float), np.asarray(normals, dtype=float))):
+        # Точка start + t * direction внутри полуплоскости ребра, пока numerator + t * denominator >= 0
+        numerator = (start[:, 0] - point[0]) * normal[0] + (start[:, 1] - point[1]) * normal[1]
+        denominator = direction[:, 0] * normal[0] + direction[:, 1] * normal[1]
+        parallel = denominator == 0
+        visible &= ~parallel | (numerator >= 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = -numerator / denominator
+        np.maximum(t_enter, t, out=t_enter, where=denominator > 0)
+        np.minimum(t_exit, t, out=t_exit, where=denominator < 0)
+        yield "edge", (i, t_enter, t_exit)
+    return t_enter, t_exit, visible & (t_enter <= t_exit)
+
+
+def cyrus_beck(segments, edge_points, normals):
+    return run_steps(cyrus_beck_steps(segments, edge_points, normals))
+
+
+def liang_barsky(segments, window):
+    """Отсечение отрезков (N, 4) прямоугольником (x_min, y_min, x_max, y_max) — Кирус — Бек для осевых нормалей.
+
+    Нормали сторон — оси координат, поэтому скалярные произведения сводятся к разностям.
+    Возвращает t_enter, t_exit (N,) и маску видимых отрезков.
+    """
+    segments = np.asarray(segments, dtype=float).reshape(-1, 4)
+    x_min, y_min, x_max, y_max = window
+    x0, y0 = segments[:, 0], segments[:, 1]
+    dx, dy = segments[:, 2] - x0, segments[:, 3] - y0
+    p = np.stack((-dx, dx, -dy, dy))
+    q = np.stack((x0 - x_min, x_max - x0, y0 - y_min, y_max - y0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = q / p
+    t_enter = np.max(np.where(p < 0, r, 0), axis=0, initial=0)
+    t_exit = np.min(np.where(p > 0, r, 1), axis=0, initial=1)
+    visible = np.all((p != 0) | (q >= 0), axis=0) & (t_enter <= t_exit)
+    return t_enter, t_exit, visible
+
+
+def _axis_rectangle(window):
+    """Прямоугольник (x_min, y_min, x_max, y_max), если окно — прямоугольник со сторонами вдоль осей."""
+    (x_min, y_min), (x_max, y_max) = window.min(axis=0), window.max(axis=0)
+    corners = {(x_min, y_min), (x_max, y_min), (x_max, y_max), (x_min, y_max)}
+    if len(window) == 4 and set(map(tuple, window.tolist())) == corners:
+        return x_min, y_min, x_max, y_max
+    return None
+
+
+def clip_segments(segments, window, edge_points=None, normals=None):
+    """Интервалы видимости отрезков (N, 4) в выпуклом окне: t_enter, t_exit и маска видимых.
+
+    Прямоугольник со сторонами вдоль осей отсекается Лиангом — Барски, остальные выпуклые
+    многоугольники — Кирусом — Беком; заранее вычисленные точки ребер и нормали можно передать.
+    """
+    if np.ndim(window) == 1:
+        return liang_barsky(segments, window)
+    rectangle = _axis_rectangle(np.asarray(window, dtype=float).reshape(-1, 2))
+    if rectangle is not None:
+        return liang_barsky(segments, rectangle)
+    if edge_points is None or normals is None:
+        window = convex_window(window)
+        edges = np.roll(window, -1, axis=0) - window
+        edge_points, normals = window, np.column_stack((-edges[:, 1], edges[:, 0]))
+    return cyrus_beck(segments, edge_points, normals)
+
+
+def clipped_segments(segments, t_enter, t_exit, visible):
+    """Видимые части отрезков (M, 4) по интервалам параметров."""
+    segments = np.asarray(segments, dtype=float).reshape(-1, 4)[visible]
+    start, direction = segments[:, :2], segments[:, 2:] - segments[:, :2]
+    return np.hstack((start + t_enter[visible, None] * direction, start + t_exit[visible, None] * direction))
+
+
+def weiler_atherton_steps(subject, clip):
+    """Шаги отсечения многоугольника subject многоугольником clip (оба могут быть невыпуклыми).
+
+    Выдает ("intersection", (x, y)) для пересечений контуров и ("polygon", (M, 2)) для каждой
+    части пересечения; возвращает список частей. Контуры обходятся против часовой стрелки:
+    из входящего пересечения идем по subject до выходящего, затем по clip до следующего входящего.
+    """
+    subject = _counterclockwise(subject)
+    clip = _counterclockwise(clip)
+    # Сдвиг subject на долю единицы убирает вырожденные случаи (вершина на ребре, общие ребра);
+    # в результат попадают исходные вершины, а точки пересечения смещаются не больше чем на сдвиг
+    scale = max(np.ptp(np.vstack((subject, clip)), axis=0).max(), 1.0)
+    moved = subject + np.array([1.0, 0.618034]) * scale * 1e-9
+    r = np.roll(moved, -1, axis=0) - moved
+    s = np.roll(clip, -1, axis=0) - clip
+    qp = clip[None, :, :] - moved[:, None, :]
+    denom = r[:, None, 0] * s[None, :, 1] - r[:, None, 1] * s[None, :, 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (qp[..., 0] * s[None, :, 1] - qp[..., 1] * s[None, :, 0]) / denom
+        u = (qp[..., 0] * r[:, None, 1] - qp[..., 1] * r[:, None, 0]) / denom
+    hit = (denom != 0) & (t > 0) & (t < 1) & (u > 0) & (u < 1)
+    edge_s, edge_c = np.nonzero(hit)
+    t, u = t[hit], u[hit]
+    points = moved[edge_s] + t[:, None] * r[edge_s]
+    entering = denom[hit] < 0
+    for point in points[np.lexsort((t, edge_s))]:
+        yield "intersection", (float(point[0]), float(point[1]))
+    if not len(points):
+        if points_in_polygon(clip, moved[:1])[0]:
+            parts = [subject]
+        elif points_in_polygon(moved, clip[:1])[0]:
+            parts = [clip]
+        else:
+            parts = []
+        for part in parts:
+            yield "polygon", part
+        return parts
+    # Списки обхода: вершины контура и пересечения на его ребрах по возрастанию параметра;
+    # элемент — (точка, номер пересечения или -1)
+    def ring(vertices, edges, params):
+        nodes = []
+        for i, vertex in enumerate(vertices):
+            nodes.append((vertex, -1))
+            on_edge = np.flatnonzero(edges == i)
+            for k in on_edge[np.argsort(params[on_edge])]:
+                nodes.append((points[k], k))
+        where = {k: position for position, (_, k) in enumerate(nodes) if k >= 0}
+        return nodes, where
+
+    subject_ring, subject_at = ring(subject, edge_s, t)
+    clip_ring, clip_at = ring(clip, edge_c, u)
+    visited = np.zeros(len(points), dtype=bool)
+    parts = []
+    for start in np.flatnonzero(entering):
+        if visited[start]:
+            continue
+        part = []
+        k, on_subject = start, True
+        while True:
+            visited[k] = True
+            nodes, at = (subject_ring, subject_at) if on_subject else (clip_ring, clip_at)
+            position = at[k]
+            part.append(nodes[position][0])
+            position = (position + 1) % len(nodes)
+            while nodes[position][1] < 0:
+                part.append(nodes[position][0])
+                position = (position + 1) % len(nodes)
+            k, on_subject = nodes[position][1], not on_subject
+            if k == start:
+                break
+        part = np.array(part)
+        # Вдоль общих ребер сдвиг оставляет щели толщиной в сдвиг — это не части пересечения
+        if abs(_signed_area(part)) > scale ** 2 * 1e-7:
+            parts.append(part)
+            yield "polygon", part
+    return parts
+
+
+def weiler_atherton(subject, clip):
+    return run_steps(weiler_atherton_steps(subject, clip))
+
+
+def _cells(cells):
+    return np.array(cells, dtype=np.int64).reshape(-1, 2)
+
+
+def basic_scanline_steps(points):
+    """Простая развертка: ("intersection", (x, y)) для пересечений строки с ребрами и ("pixel", (x, y))."""
+    min_y = min(p[1] for p in points)
+    max_y = max(p[1] for p in points)
+    edges = []
+    for i in range(len(points)):
+        p1 = points[i]
+        p2 = points[(i + 1) % len(points)]
+        if p1[1] != p2[1]:
+            edges.append((p1, p2) if p1[1] < p2[1] else (p2, p1))
+    cells = []
+    for y in range(int(min_y), int(max_y) + 1):
+        intersections = []
+        for p1, p2 in edges:
+            if p1[1] <= y < p2[1]:
+                x = p1[0] + (p2[0] - p1[0]) * (y - p1[1]) / (p2[1] - p1[1])
+                intersections.append(x)
+                yield "intersection", (x, y)
+        intersections.sort()
+        for j in range(0, len(intersections) - 1, 2):
+            for x in range(int(intersections[j]), int(intersections[j + 1]) + 1):
+                cells.append((x, y))
+                yield "pixel", (x, y)
+    return _cells(cells)
+
+
+def active_edge_steps(points):
+    """Развертка с таблицей активных ребер: ("activate", (xs, y)) при добавлении ребра и ("pixel", (x, y))."""
+    min_y = min(p[1] for p in points)
+    max_y = max(p[1] for p in points)
+    edge_table = []
+    for i in range(len(points)):
+        p1 = points[i]
+        p2 = points[(i + 1) % len(points)]
+        if p1[1] == p2[1]:
+            continue
+        if p1[1] < p2[1]:
+            ymin, ymax, x = p1[1], p2[1], p1[0]
+        else:
+            ymin, ymax, x = p2[1], p1[1], p2[0]
+        edge_table.append((ymin, ymax, x, (p2[0] - p1[0]) / (p2[1] - p1[1])))
+    edge_table.sort(key=lambda e: e[0])
+    active_edges = []
+    cells = []
+    y = int(min_y)
+    while y <= int(max_y) and (active_edges or edge_table):
+        while edge_table and edge_table[0][0] <= y:
+            active_edges.append(edge_table.pop(0))
+            yield "activate", ([edge[2] for edge in active_edges], y)
+        active_edges = [e for e in active_edges if e[1] > y]
+        active_edges.sort(key=lambda e: e[2])
+        for i in range(0, len(active_edges), 2):
+            x_start = int(active_edges[i][2])
+            x_end = int(active_edges[i + 1][2]) if i + 1 < len(active_edges) else x_start
+            for x in range(x_start, x_end + 1):
+                cells.append((x, y))
+                yield "pixel", (x, y)
+        active_edges = [(ymin, ymax, x + inv_m, inv_m) for ymin, ymax, x, inv_m in active_edges]
+        y += 1
+    return _cells(cells)
+
+
+def region_mask(image, seed):
+    """Маска пикселей растра (H, W) или (H, W, C) того же цвета, что и затравка."""
+    image = np.asarray(image)
+    x, y = int(seed[0]), int(seed[1])
+    equal = image == image[y, x]
+    return equal.all(axis=-1) if image.ndim == 3 else equal
+
+
+def flood_fill_steps(image, seed):
+    """Заливка с затравкой по 4 соседям через стек: ("pixel", (x, y)); возвращает клетки области."""
+    mask = region_mask(image, seed)
+    height, width = mask.shape
+    stack = [(int(seed[0]), int(seed[1]))]
+    cells = []
+    while stack:
+        x, y = stack.pop()
+        if 0 <= x < width and 0 <= y < height and mask[y, x]:
+            mask[y, x] = False
+            cells.append((x, y))
+            yield "pixel", (x, y)
+            stack.extend([(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)])
+    return _cells(cells)
+
+
+def scanline_flood_steps(image, seed):
+    """Построчная заливка с затравкой: ("pixel", (x, y)) по отрезкам строк; возвращает клетки области."""
+    mask = region_mask(image, seed)
+    height, width = mask.shape
+    stack = [(int(seed[0]), int(seed[1]))]
+    cells = []
+    while stack:
+        x, y = stack.pop()
+        left_x = x
+        while left_x >= 0 and mask[y, left_x]:
+            left_x -= 1
+        left_x += 1
+        span_above = False
+        span_below = False
+        current_x = left_x
+        while current_x < width and mask[y, current_x]:
+            mask[y, current_x] = False
+            cells.append((current_x, y))
+            yield "pixel", (current_x, y)
+            if y > 0:
+                if not span_above and mask[y - 1, current_x]:
+                    stack.append((current_x, y - 1))
+                    span_above = True
+                elif span_above and not mask[y - 1, current_x]:
+                    span_above = False
+            if y < height - 1:
+                if not span_below and mask[y + 1, current_x]:
+                    stack.append((current_x, y + 1))
+                    span_below = True
+                elif span_below and not mask[y + 1, current_x]:
+                    span_below = False
+            current_x += 1
+    return _cells(cells)
+
+
+def flood_region(image, seed):
+    """Область заливки с затравкой целиком: маска (H, W), наращиваемая сдвигами массива."""
+    mask = region_mask(image, seed)
+    region = np.zeros_like(mask)
+    region[int(seed[1]), int(seed[0])] = True
+    while True:
+        grown = region.copy()
+        grown[1:] |= region[:-1]
+        grown[:-1] |= region[1:]
+        grown[:, 1:] |= region[:, :-1]
+        grown[:, :-1] |= region[:, 1:]
+        grown &= mask
+        if np.array_equal(grown, region):
+            return region
+        region = grown
+
+
+class Point:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+class Event:
+    def __init__(self, x, p, a):
+        self.x = x
+        self.p = p
+        self.a = a
+        self.valid = True
+
+class Arc:
+    def __init__(self, p, a=None, b=None):
+        self.p = p
+        self.pprev = a
+        self.pnext = b
+        self.e = None
+        self.s0 = None
+        self.s1 = None
+
+class Segment:
+    def __init__(self, p):
+        self.start = p
+        self.end = None
+        self.done = False
+
+    def finish(self, p):
+        if self.done: return
+        self.end = p
+        self.done = True
+
+class PriorityQueue:
+    def __init__(self):
+        self.pq = []
+        self.entry_finder = {}
+        self.counter = itertools.count()
+
+    def push(self, item):
+        if item in self.entry_finder: return
+        count = next(self.counter)
+        entry = [item.x, count, item]
+        self.entry_finder[item] = entry
+        heapq.heappush(self.pq, entry)
+        PROFILER.count("heap_push")
+
+    def remove_entry(self, item):
+        entry = self.entry_finder.pop(item)
+        entry[-1] = 'Removed'
+
+    def pop(self):
+        while self.pq:
+            priority, count, item = heapq.heappop(self.pq)
+            PROFILER.count("heap_pop")
+            if item != 'Removed':
+                del self.entry_finder[item]
+                return item
+        raise KeyError('pop from an empty priority queue')
+
+    def top(self):
+        while self.pq:
+            priority, count, item = heapq.heappop(self.pq)
+            PROFILER.count("heap_pop")
+            if item != 'Removed':
+                del self.entry_finder[item]
+                self.push(item)
+                return item
+        raise KeyError('top from an empty priority queue')
+
+    def empty(self):
+        return not self.pq
+
+
+class FortuneVoronoi:
+    """Диаграмма Вороного алгоритмом Форчуна; шаги:
+
+    ("queued", p) — площадка поставлена в очередь, ("breakpoint", z) — новая дуга разбила старую,
+    ("arc", p) — дуга добавлена в конец береговой линии, ("site", p) и ("circle", p) — обработанные
+    события, ("finish", p) — незавершенное ребро доведено за пределы области.
+    """
+
+    def __init__(self):
+        self.output = []  # list of line segments for Voronoi
+        self.arc = None  # binary tree for parabola arcs
+        self.points = PriorityQueue()  # site events
+        self.event = PriorityQueue()  # circle events
+        self.x0 = 0.0
+        self.x1 = 100.0
+        self.y0 = 0.0
+        self.y1 = 100.0
+
+    def voronoi_steps(self, points):
+        self.output = []
+        self.arc = None
+        self.points = PriorityQueue()
+        self.event = PriorityQueue()
+        self.x0 = 0.0
+        self.x1 = 100.0
+        self.y0 = 0.0
+        self.y1 = 100.0
+
+        for pts in points:
+            point = Point(pts[0], pts[1])
+            self.points.push(point)
+            yield "queued", point
+
+        while not self.points.empty():
+            if not self.event.empty() and (self.event.top().x <= self.points.top().x):
+                yield from self.process_event()
+            else:
+                yield from self.process_point()
+
+        while not self.event.empty():
+            yield from self.process_event()
+
+        yield from self.finish_edges()
+        return self.output
+
+    def voronoi_segments(self, points):
+        """Ребра диаграммы, обрезанные по области [0, 100] x [0, 100]: массив (S, 2, 2)."""
+        run_steps(self.voronoi_steps(points))
+        segments = [((segment.start.x, segment.start.y), (segment.end.x, segment.end.y))
+                    for segment in self.output if self.clip_segment(segment) and segment.end is not None]
+        return np.array(segments, dtype=float).reshape(-1, 2, 2)
+
+    def process_point(self):
+        p = self.points.pop()
+        PROFILER.count("site_events")
+        yield from self.arc_insert(p)
+        yield "site", p
+
+    def process_event(self):
+        e = self.event.pop()
+        PROFILER.count("circle_events" if e.valid else "stale_events")
+        if e.valid:
+            s = Segment(e.p)
+            self.output.append(s)
+            a = e.a
+            if a.pprev is not None:
+                a.pprev.pnext = a.pnext
+                a.pprev.s1 = s
+            if a.pnext is not None:
+                a.pnext.pprev = a.pprev
+                a.pnext.s0 = s
+            if a.s0 is not None: a.s0.finish(e.p)
+            if a.s1 is not None: a.s1.finish(e.p)
+            if a.pprev is not None: self.check_circle_event(a.pprev, e.x)
+            if a.pnext is not None: self.check_circle_event(a.pnext, e.x)
+            yield "circle", e.p
+
+    def arc_insert(self, p):
+        if self.arc is None:
+            self.arc = Arc(p)
+            return
+        i = self.arc
+        while i is not None:
+            flag, z = self.intersect(p, i)
+            if flag:
+                flag, zz = self.intersect(p, i.pnext)
+                if (i.pnext is not None) and (not flag):
+                    i.pnext.pprev = Arc(i.p, i, i.pnext)
+                    i.pnext = i.pnext.pprev
+                else:
+                    i.pnext = Arc(i.p, i)
+                i.pnext.s1 = i.s1
+                i.pnext.pprev = Arc(p, i, i.pnext)
+                i.pnext = i.pnext.pprev
+                i = i.pnext
+                seg = Segment(z)
+                self.output.append(seg)
+                i.pprev.s1 = i.s0 = seg
+                seg = Segment(z)
+                self.output.append(seg)
+                i.pnext.s0 = i.s1 = seg
+                self.check_circle_event(i, p.x)
+                self.check_circle_event(i.pprev, p.x)
+                self.check_circle_event(i.pnext, p.x)
+                yield "breakpoint", z
+                return
+            i = i.pnext
+        i = self.arc
+        while i.pnext is not None:
+            i = i.pnext
+        i.pnext = Arc(p, i)
+        x = self.x0
+        y = (i.pnext.p.y + i.p.y) / 2.0
+        start = Point(x, y)
+        seg = Segment(start)
+        i.s1 = i.pnext.s0 = seg
+        self.output.append(seg)
+        yield "arc", p
+
+    def check_circle_event(self, i, x0):
+        if (i.e is not None) and (i.e.x != x0):
+            i.e.valid = False
+        i.e = None
+        if (i.pprev is None) or (i.pnext is None): return
+        flag, x, o = self.circle(i.pprev.p, i.p, i.pnext.p)
+        if flag and (x > x0):
+            i.e = Event(x, o, i)
+            self.event.push(i.e)
+
+    def circle(self, a, b, c):
+        if ((b.x - a.x) * (c.y - a.y) - (c.x - a.x) * (b.y - a.y)) > 0: return False, None, None
+        A = b.x - a.x
+        B = b.y - a.y
+        C = c.x - a.x
+        D = c.y - a.y
+        E = A * (a.x + b.x) + B * (a.y + b.y)
+        F = C * (a.x + c.x) + D * (a.y + c.y)
+        G = 2 * (A * (c.y - b.y) - B * (c.x - b.x))
+        if abs(G) < 1e-10: return False, None, None
+        ox = (D * E - B * F) / G
+        oy = (A * F - C * E) / G
+        x = ox + math.sqrt((a.x - ox) ** 2 + (a.y - oy) ** 2)
+        o = Point(ox, oy)
+        return True, x, o
+
+    def intersect(self, p, i):
+        if i is None: return False, None
+        if abs(i.p.x - p.x) < 1e-10: return False, None
+        a = b = 0.0
+        if i.pprev is not None:
+            a = self.intersection(i.pprev.p, i.p, p.x).y
+        if i.pnext is not None:
+            b = self.intersection(i.p, i.pnext.p, p.x).y
+        if ((i.pprev is None) or (a <= p.y)) and ((i.pnext is None) or (p.y <= b)):
+            py = p.y
+            px = ((i.p.x) ** 2 + (i.p.y - py) ** 2 - p.x ** 2) / (2 * i.p.x - 2 * p.x)
+            return True, Point(px, py)
+        return False, None
+
+    def intersection(self, p0, p1, l):
+        p = p0
+        if abs(p0.x - p1.x) < 1e-10:
+            py = (p0.y + p1.y) / 2.0
+        elif abs(p1.x - l) < 1e-10:
+            py = p1.y
+        elif abs(p0.x - l) < 1e-10:
+            py = p0.y
+            p = p1
+        else:
+            z0 = 2.0 * (p0.x - l)
+            z1 = 2.0 * (p1.x - l)
+            a = 1.0 / z0 - 1.0 / z1
+            b = -2.0 * (p0.y / z0 - p1.y / z1)
+            c = (p0.y ** 2 + p0.x ** 2 - l ** 2) / z0 - (p1.y ** 2 + p1.x ** 2 - l ** 2) / z1
+            if abs(a) < 1e-10: return Point((p0.x + p1.x) / 2, (p0.y + p1.y) / 2)
+            py = (-b - math.sqrt(b * b - 4 * a * c)) / (2 * a)
+        px = (p.x ** 2 + (p.y - py) ** 2 - l ** 2) / (2 * p.x - 2 * l)
+        return Point(px, py)
+
+    def finish_edges(self):
+        l = self.x1 + 10.0
+        i = self.arc
+        while i.pnext is not None:
+            if i.s1 is not None:
+                p = self.intersection(i.p, i.pnext.p, l)
+                i.s1.finish(p)
+                yield "finish", p
+            i = i.pnext
+
+    def clip_segment(self, segment):
+        """Обрезает сегмент до области [0, 100] x [0, 100]."""
+        if segment.end is None:
+            return None
+        p1, p2 = (segment.start.x, segment.start.y), (segment.end.x, segment.end.y)
+        def clip_line(x0, y0, x1, y1):
+            def compute_code(x, y):
+                code = 0
+                if x < 0: code |= 1
+                elif x > 100: code |= 2
+                if y < 0: code |= 4
+                elif y > 100: code |= 8
+                return code
+            code1 = compute_code(x0, y0)
+            code2 = compute_code(x1, y1)
+            while True:
+                if not (code1 | code2):
+                    return (x0, y0), (x1, y1)
+                if code1 & code2:
+                    return None
+                code_out = code1 if code1 else code2
+                if code_out & 8:
+                    x = x0 + (x1 - x0) * (100 - y0) / (y1 - y0)
+                    y = 100
+                elif code_out & 4:
+                    x = x0 + (x1 - x0) * (0 - y0) / (y1 - y0)
+                    y = 0
+                elif code_out & 2:
+                    y = y0 + (y1 - y0) * (100 - x0) / (x1 - x0)
+                    x = 100
+                elif code_out & 1:
+                    y = y0 + (y1 - y0) * (0 - x0) / (x1 - x0)
+                    x = 0
+                if code_out == code1:
+                    x0, y0, code1 = x, y, compute_code(x, y)
+                else:
+                    x1, y1, code2 = x, y, compute_code(x, y)
+        clipped = clip_line(p1[0], p1[1], p2[0], p2[1])
+        if clipped:
+            (x0, y0), (x1, y1) = clipped
+            segment.start = Point(x0, y0)
+            segment.end = Point(x1, y1)
+            return segment
+        return None
+
+
+def _in_circle(p, a, b, c):
+    ax, ay = a[0] - p[0], a[1] - p[1]
+    bx, by = b[0] - p[0], b[1] - p[1]
+    cx, cy = c[0] - p[0], c[1] - p[1]
+    det = (ax ** 2 + ay ** 2) * (bx * cy - by * cx) - (bx ** 2 + by ** 2) * (ax * cy - ay * cx) + (
+                cx ** 2 + cy ** 2) * (ax * by - ay * bx)
+    return det > 0
+
+
+def supertriangle(points):
+    """Треугольник, заведомо содержащий все точки, — начальная триангуляция Боуэра — Уотсона."""
+    min_x = min(x for x, y in points)
+    max_x = max(x for x, y in points)
+    min_y = min(y for x, y in points)
+    max_y = max(y for x, y in points)
+    dx, dy = max_x - min_x, max_y - min_y
+    max_d = max(dx, dy) * 3
+    mid_x, mid_y = (min_x + max_x) / 2, (min_y + max_y) / 2
+    return [
+        (mid_x - max_d, mid_y - max_d),
+        (mid_x + max_d, mid_y - max_d),
+        (mid_x, mid_y + max_d)
+    ]
+
+
+def delaunay_steps(points):
+    """Шаги Боуэра — Уотсона: ("start", triangles), затем на каждую точку ("cavity", (p, bad_triangles))
+    и ("insert", (p, triangles)); возвращает треугольники триангуляции как тройки точек.
+    """
+    if len(points) < 3:
+        return []
+    supertri = supertriangle(points)
+    triangles = [supertri]
+    yield "start", triangles
+    for p in points:
+        bad_triangles = []
+        for t in triangles:
+            if _in_circle(p, t[0], t[1], t[2]):
+                bad_triangles.append(t)
+        PROFILER.count("in_circle_tests", len(triangles))
+        PROFILER.count("bad_triangles", len(bad_triangles))
+        yield "cavity", (p, bad_triangles)
+        polygon = []
+        for t in bad_triangles:
+            for i in range(3):
+                edge = (t[i], t[(i + 1) % 3])
+                shared = False
+                for t2 in bad_triangles:
+                    if t2 != t and edge[0] in t2 and edge[1] in t2:
+                        shared = True
+                        break
+                if not shared:
+                    polygon.append(edge)
+        triangles = [t for t in triangles if t not in bad_triangles]
+        for edge in polygon:
+            triangles.append([edge[0], edge[1], p])
+        yield "insert", (p, triangles)
+    return [t for t in triangles if not any(p in supertri for p in t)]
+
+
+def triangle_edges(triangles):
+    """Уникальные ребра треугольников в виде пар точек."""
+    edges = set()
+    for t in triangles:
+        edges.add(tuple(sorted([t[0], t[1]])))
+        edges.add(tuple(sorted([t[1], t[2]])))
+        edges.add(tuple(sorted([t[2], t[0]])))
+    return list(edges)
+
+
+def delaunay_triangles(points):
+    """Триангуляция Делоне: массив треугольников (T, 3, 2)."""
+    points = [tuple(p) for p in points]
+    return np.array(run_steps(delaunay_steps(points)), dtype=float).reshape(-1, 3, 2)
+
@@ -0,0 +1,167 @@
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.animation import FuncAnimation
+from kernels import dda_segments
+from render3d import NEAR, FAR
+
+INTERPOLATED_KEYS = ('translate_x', 'translate_y', 'translate_z', 'scale', 'perspective')
+
+
+def quaternion_multiply(a, b):
+    """Произведение кватернионов (..., 4) в порядке (w, x, y, z)."""
+    w1, x1, y1, z1 = np.moveaxis(np.asarray(a, dtype=float), -1, 0)
+    w2, x2, y2, z2 = np.moveaxis(np.asarray(b, dtype=float), -1, 0)
+    return np.stack((
+        w1 * w2 - x1 * x2 - y1 * y2 - z1 * z2,
+        w1 * x2 + x1 * w2 + y1 * z2 - z1 * y2,
+        w1 * y2 - x1 * z2 + y1 * w2 + z1 * x2,
+        w1 * z2 + x1 * y2 - y1 * x2 + z1 * w2
+    ), axis=-1)
+
+
+def axis_quaternion(axis, angles):
+    """Кватернионы поворота на углы angles (в градусах) вокруг оси 0 (x), 1 (y) или 2 (z)."""
+    half = np.radians(np.asarray(angles, dtype=float)) / 2
+    q = np.zeros(half.shape + (4,))
+    q[..., 0] = np.cos(half)
+    q[..., 1 + axis] = np.sin(half)
+    return q
+
+
+def quaternion_from_euler(rotate_x, rotate_y, rotate_z):
+    """Кватернион поворотов CubeDrawer: сначала вокруг x, затем y, затем z."""
+    return quaternion_multiply(quaternion_multiply(axis_quaternion(2, rotate_z), axis_quaternion(1, rotate_y)),
+                               axis_quaternion(0, rotate_x))
+
+
+def quaternion_to_matrix(q):
+    """Матрицы поворота (..., 3, 3) для кватернионов (..., 4)."""
+    q = np.asarray(q, dtype=float)
+    w, x, y, z = np.moveaxis(q / np.linalg.norm(q, axis=-1, keepdims=True), -1, 0)
+    return np.stack((
+        np.stack((1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)), axis=-1),
+        np.stack((2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)), axis=-1),
+        np.stack((2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)), axis=-1)
+    ), axis=-2)
+
+
+def slerp(q0, q1, t):
+    """Сферическая интерполяция кватернионов (..., 4) по кратчайшей дуге; t — массив долей (...)."""
+    q0 = np.asarray(q0, dtype=float)
+    q1 = np.asarray(q1, dtype=float)
+    t = np.asarray(t, dtype=float)[..., None]
+    dot = np.sum(q0 * q1, axis=-1, keepdims=True)
+    # q и -q задают один поворот; берем тот, что ближе, чтобы не идти по длинной дуге
+    q1 = np.where(dot < 0, -q1, q1)
+    dot = np.abs(dot)
+    theta = np.arccos(np.clip(dot, -1, 1))
+    sin_theta = np.sin(theta)
+    linear = sin_theta < 1e-6
+    safe = np.where(linear, 1, sin_theta)
+    w0 = np.where(linear, 1 - t, np.sin((1 - t) * theta) / safe)
+    w1 = np.where(linear, t, np.sin(t * theta) / safe)
+    q = w0 * q0 + w1 * q1
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+
+def frame_matrices(times, poses, frames):
+    """Составные матрицы (frames, 4, 4) для ключевых кадров: slerp для поворота, линейно для остального."""
+    times = np.asarray(times, dtype=float)
+    t = np.linspace(times[0], times[-1], frames)
+    if len(times) > 1:
+        segment = np.clip(np.searchsorted(times, t, side='right') - 1, 0, len(times) - 2)
+        span = times[segment + 1] - times[segment]
+        local = np.divide(t - times[segment], span, out=np.zeros(frames), where=span > 0)
+        following = segment + 1
+    else:
+        segment = following = np.zeros(frames, dtype=np.int64)
+        local = np.zeros(frames)
+    values = {key: np.array([pose[key] for pose in poses], dtype=float) for key in INTERPOLATED_KEYS}
+    value = {key: v[segment] + (v[following] - v[segment]) * local for key, v in values.items()}
+    rotations = quaternion_from_euler(*(np.array([pose[key] for pose in poses], dtype=float)
+                                        for key in ('rotate_x', 'rotate_y', 'rotate_z')))
+    rotation = quaternion_to_matrix(slerp(rotations[segment], rotations[following], local))
+
+    # Та же цепочка, что и в compose_transform: масштаб, поворот, перенос, отражения, перспектива
+    matrices = np.zeros((frames, 4, 4))
+    matrices[:, :3, :3] = rotation * value['scale'][:, None, None]
+    matrices[:, :3, 3] = np.column_stack((value['translate_x'], value['translate_y'], value['translate_z']))
+    matrices[:, 3, 3] = 1
+    signs = np.array([[-1 if pose['reflect_yz'] else 1, -1 if pose['reflect_xz'] else 1,
+                       -1 if pose['reflect_xy'] else 1] for pose in poses], dtype=float)
+    matrices[:, :3] *= signs[segment][:, :, None]
+    distance = np.where(value['perspective'] <= 0, 0.001, value['perspective'])
+    matrices[:, 3] -= matrices[:, 2] / distance[:, None]
+    return matrices
+
+
+class KeyframeAnimation:
+    """Анимация модели CubeDrawer по ключевым кадрам; все кадры вычисляются заранее одним проходом."""
+
+    def __init__(self, drawer, keyframes, frames=120):
+        drawer.reset()
+        pose = dict(drawer.transform_params)
+        times = []
+        poses = []
+        # Ключевой кадр задает только изменившиеся параметры, остальные берутся из предыдущего
+        for time, params in sorted(keyframes, key=lambda keyframe: keyframe[0]):
+            pose = {**pose, **params}
+            times.append(time)
+            poses.append(pose)
+        if not poses:
+            raise ValueError("At least one keyframe is required")
+        self.drawer = drawer
+        self.vertex_count = len(drawer.original_vertices)
+        self.matrices = frame_matrices(times, poses, frames)
+        # (frames, V, 4): все кадры одним пакетным умножением
+        self.clip = drawer.instance_clip(self.matrices)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.vertices = self.clip[..., :3] / self.clip[..., 3:]
+
+    @property
+    def frames(self):
+        return len(self.matrices)
+
+    def edge_segments(self, width=100, height=100, cull=True, near=NEAR, far=FAR):
+        """Отрезки ребер всех кадров (F, E, 2, 2) и маска видимых (F, E) после отсечения и отбраковки."""
+        if len(self.drawer.original_vertices) != self.vertex_count:
+            raise ValueError("The drawer model changed after the animation was built")
+        return self.drawer.batch_edge_segments(self.clip, self.matrices, width, height, cull, near, far)
+
+    def render_frames(self, cell_size=1, value=0, background=255):
+        """Стопка растров (F, H, W, 3) всех кадров: ребра растеризуются одним вызовом ЦДА."""
+        segments, visible = self.edge_segments()
+        size = -(-100 // cell_size)
+        stack = np.full((self.frames, size, size, 3), background, dtype=np.uint8)
+        frame_of_segment = np.nonzero(visible)[0]
+        cells, owner = dda_segments(segments[visible] / cell_size, return_index=True)
+        frame = frame_of_segment[owner]
+        inside = (cells[:, 0] >= 0) & (cells[:, 0] < size) & (cells[:, 1] >= 0) & (cells[:, 1] < size)
+        stack[frame[inside], cells[inside, 1], cells[inside, 0]] = value
+        return stack
+
+    def save_npy(self, path, cell_size=None):
+        """Сохранить вершины (F, V, 3) или, если задан cell_size, стопку растров кадров."""
+        np.save(path, self.vertices if cell_size is None else self.render_frames(cell_size))
+
+    def save_gif(self, path, cell_size=1, duration=40):
+        from PIL import Image
+        # Начало координат графика внизу, а у изображения вверху
+        images = [Image.fromarray(frame[::-1]) for frame in self.render_frames(cell_size)]
+        images[0].save(path, save_all=True, append_images=images[1:], duration=duration, loop=0)
+
+    def play(self, ax, cell_size, interval=20, repeat=True):
+        """Проиграть заранее вычисленные кадры с блиттингом: на кадр — только замена отрезков."""
+        segments, visible = self.edge_segments()
+        self.drawer.stop_animation()
+        self.drawer.setup_plot(ax, cell_size)
+        lines = LineCollection(segments[0][visible[0]], colors='black', animated=True)
+        ax.add_collection(lines)
+
+        def update(frame):
+            lines.set_segments(segments[frame][visible[frame]])
+            return (lines,)
+
+        self.drawer.animation = FuncAnimation(ax.figure, update, frames=self.frames, interval=interval,
+                                              blit=True, repeat=repeat)
+        return self.drawer.animation
@@ -1,5 +1,55 @@
+import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.patches import Rectangle
+from framebuffer import Framebuffer, AccumulationBuffer
+from profiling import profiled, PROFILER
+from player import StepPlayer
+from kernels import dda_pixels, bresenham_pixels, wu_segments, stroke_spans, LINE_METHODS
+
+
+def wu_lines(framebuffer, segments, value=0):
+    """Rasterize many anti-aliased lines (K, 2, 2) into an 8-bit framebuffer in one pass.
+
+    Coverage of all lines is summed in a float32 accumulation buffer and resolved once,
+    so overlapping lines saturate at full coverage instead of compounding alpha.
+    """
+    cells, coverage = wu_segments(segments)
+    PROFILER.count("pixels", len(cells))
+    inside = ((cells[:, 0] >= 0) & (cells[:, 0] < framebuffer.width)
+              & (cells[:, 1] >= 0) & (cells[:, 1] < framebuffer.height))
+    cells, coverage = cells[inside], coverage[inside]
+    if not len(cells):
+        return framebuffer
+    # Accumulate over the lines' bounding box, or block by block for tiled and mapped targets
+    # (mapped ones in row-band order), never over the whole target
+    size = getattr(framebuffer, "tile_size", None) or getattr(framebuffer, "band_rows", None)
+    if size is None:
+        keys = np.zeros(len(cells), dtype=np.int64)
+    else:
+        keys = cells[:, 1] // size * (framebuffer.width // size + 1) + cells[:, 0] // size
+    order = np.argsort(keys, kind="stable")
+    breaks = np.flatnonzero(keys[order][1:] != keys[order][:-1]) + 1
+    for group in np.split(order, breaks):
+        part = cells[group]
+        low = part.min(axis=0)
+        width, height = part.max(axis=0) - low + 1
+        accumulation = AccumulationBuffer(width, height, origin=low)
+        accumulation.add(part[:, 0], part[:, 1], coverage[group])
+        accumulation.resolve(framebuffer, value)
+    return framebuffer
+
+
+def stroke(framebuffer, points, width, value=0, join="miter", cap="butt", closed=False, miter_limit=4.0):
+    """Stroke a polyline of any width into a framebuffer with one scanline fill pass.
+
+    join is "miter", "round" or "bevel"; cap is "butt", "square" or "round".
+    Coordinates and width are in framebuffer pixels, with pixel centres at integers.
+    """
+    ys, x_starts, x_ends = stroke_spans(points, width, join, cap, closed, miter_limit)
+    PROFILER.count("spans", len(ys))
+    framebuffer.fill_spans(ys, x_starts, x_ends, value)
+    return framebuffer
+
 
 class LineDrawer:
     def create_empty_plot(self):
@@ -10,6 +60,7 @@ class LineDrawer:
         ax.set_ylim(0, 100)
         return fig, ax
 
+    @profiled(phase=True)
     def plot_pixel(self, ax, x, y, cell_size, alpha=1.0):
         """Plot a pixel as a rectangle with optional transparency."""
         if alpha > 0:
@@ -22,6 +73,7 @@ class LineDrawer:
             )
             ax.add_patch(rect)
 
+    @profiled(phase=True)
     def setup_plot(self, ax, cell_size):
         """Initialize the plot with a grid."""
         ax.clear()
@@ -40,102 +92,56 @@ class LineDrawer:
                 rect = Rectangle((x, y), cell_size, cell_size, fill=False, edgecolor="gray")
                 ax.add_patch(rect)
 
-    def dda_line(self, x0, y0, x1, y1, cell_size, ax, debug=False):
+    def plot_pixels(self, ax, pixels, cell_size):
+        PROFILER.count("pixels", len(pixels))
+        for x, y, alpha in pixels:
+            self.plot_pixel(ax, x, y, cell_size, alpha)
+
+    def pixel_steps(self, ax, pixels, cell_size, group=1):
+        """Yield one debug step per group of plotted pixels."""
+        for i in range(0, len(pixels), group):
+            self.plot_pixels(ax, pixels[i:i + group], cell_size)
+            yield "pixel", pixels[i:i + group]
+
+    def dda_line(self, x0, y0, x1, y1, cell_size, ax):
         """Draw a line using the DDA algorithm."""
-        dx = x1 - x0
-        dy = y1 - y0
-        steps = max(abs(dx), abs(dy)) or 1
-        dx = dx / steps
-        dy = dy / steps
-        x = x0 + 0.5 * (1 if dx > 0 else -1 if dx < 0 else 0)
-        y = y0 + 0.5 * (1 if dy > 0 else -1 if dy < 0 else 0)
-
-        self.plot_pixel(ax, int(x), int(y), cell_size)
-        if debug:
-            ax.figure.canvas.draw()
-            ax.figure.canvas.flush_events()
-
-        for _ in range(int(steps)):
-            x += dx
-            y += dy
-            self.plot_pixel(ax, int(x), int(y), cell_size)
-            if debug:
-                ax.figure.canvas.draw()
-                ax.figure.canvas.flush_events()
-
-    def bresenham_line(self, x0, y0, x1, y1, cell_size, ax, debug=False):
+        self.plot_pixels(ax, dda_pixels(x0, y0, x1, y1), cell_size)
+
+    def bresenham_line(self, x0, y0, x1, y1, cell_size, ax):
         """Draw a line using Bresenham's algorithm."""
-        x0, y0, x1, y1 = int(x0), int(y0), int(x1), int(y1)
-        dx = abs(x1 - x0)
-        dy = abs(y1 - y0)
-        sx = 1 if x0 < x1 else -1
-        sy = 1 if y0 < y1 else -1
-        x, y = x0, y0
-
-        self.plot_pixel(ax, x, y, cell_size)
-        if debug:
-            ax.figure.canvas.draw()
-            ax.figure.canvas.flush_events()
-
-        if dx > dy:
-            err = 2 * dy - dx
-            while x != x1:
-                x += sx
-                if err >= 0:
-                    y += sy
-                    err -= 2 * dx
-                err += 2 * dy
-                self.plot_pixel(ax, x, y, cell_size)
-                if debug:
-                    ax.figure.canvas.draw()
-                    ax.figure.canvas.flush_events()
-        else:
-            err = 2 * dx - dy
-            while y != y1:
-                y += sy
-                if err >= 0:
-                    x += sx
-                    err -= 2 * dy
-                err += 2 * dx
-                self.plot_pixel(ax, x, y, cell_size)
-                if debug:
-                    ax.figure.canvas.draw()
-                    ax.figure.canvas.flush_events()
-
-    def wu_line(self, x0, y0, x1, y1, cell_size, ax, debug=False):
+        self.plot_pixels(ax, bresenham_pixels(x0, y0, x1, y1), cell_size)
+
+    def wu_line(self, x0, y0, x1, y1, cell_size, ax):
         """Draw a line using Wu's anti-aliasing algorithm."""
-        x0, y0, x1, y1 = float(x0), float(y0), float(x1), float(y1)
-        steep = abs(y1 - y0) > abs(x1 - x0)
-
-        if steep:
-            x0, y0 = y0, x0
-            x1, y1 = y1, x1
-        if x0 > x1:
-            x0, x1 = x1, x0
-            y0, y1 = y1, y0
-
-        dx = x1 - x0
-        dy = y1 - y0
-        gradient = dy / dx if dx != 0 else 1
-
-        xpxl1 = int(x0 + 0.5)
-        xpxl2 = int(x1 + 0.5)
-        intery = y0 + gradient * (xpxl1 - x0)
-
-        for x in range(xpxl1, xpxl2 + 1):
-            alpha1 = 1 - (intery % 1)
-            alpha2 = intery % 1
-            if steep:
-                self.plot_pixel(ax, int(intery), x, cell_size, alpha1)
-                self.plot_pixel(ax, int(intery) + 1, x, cell_size, alpha2)
-            else:
-                self.plot_pixel(ax, x, int(intery), cell_size, alpha1)
-                self.plot_pixel(ax, x, int(intery) + 1, cell_size, alpha2)
-            if debug:
-                ax.figure.canvas.draw()
-                ax.figure.canvas.flush_events()
-            intery += gradient
+        self.plot_antialiased(ax, [[(x0, y0), (x1, y1)]], cell_size)
+
+    @profiled(phase=True)
+    def plot_antialiased(self, ax, segments, cell_size, value=0):
+        """Show anti-aliased lines as a single image instead of two patches per column."""
+        size = -(-100 // cell_size)
+        self.show_framebuffer(ax, wu_lines(Framebuffer(size, size), segments, value), cell_size)
+
+    def show_framebuffer(self, ax, framebuffer, cell_size):
+        """Show a framebuffer of cells under the grid."""
+        ax.imshow(framebuffer.to_array(), origin="lower", interpolation="nearest",
+                  extent=(0, framebuffer.width * cell_size, 0, framebuffer.height * cell_size), zorder=0)
+        ax.set_xlim(0, 100)
+        ax.set_ylim(0, 100)
 
+    @profiled()
+    def draw_wu_lines(self, segments, cell_size, ax, value=0):
+        """Draw many anti-aliased lines (K, 2, 2), given in cells, in one raster pass."""
+        self.setup_plot(ax, cell_size)
+        self.plot_antialiased(ax, np.asarray(segments, dtype=float).reshape(-1, 2, 2), cell_size, value)
+
+    @profiled()
+    def draw_polyline(self, points, width, cell_size, ax, join="miter", cap="butt", closed=False, value=0):
+        """Draw a polyline (in cells) stroked to the given width in cells."""
+        self.setup_plot(ax, cell_size)
+        size = -(-100 // cell_size)
+        self.show_framebuffer(ax, stroke(Framebuffer(size, size), points, width, value, join, cap, closed), cell_size)
+
+    @profiled()
     def draw_line(self, method, x0, y0, x1, y1, cell_size, fig, ax):
         """Draw a line using the specified method."""
         self.setup_plot(ax, cell_size)
@@ -149,15 +155,14 @@ class LineDrawer:
             case _:
                 self.dda_line(x0, y0, x1, y1, cell_size, ax)
 
-    def start_debug(self, method, x0, y0, x1, y1, cell_size, fig, ax):
-        """Draw a line in debug mode with step-by-step visualization."""
+    def debug_steps(self, method, x0, y0, x1, y1, cell_size, ax):
+        """Draw a line step by step, yielding after each pixel."""
         self.setup_plot(ax, cell_size)
-        match method:
-            case 1:
-                self.dda_line(x0, y0, x1, y1, cell_size, ax, debug=True)
-            case 2:
-                self.bresenham_line(x0, y0, x1, y1, cell_size, ax, debug=True)
-            case 3:
-                self.wu_line(x0, y0, x1, y1, cell_size, ax, debug=True)
-            case _:
-                self.dda_line(x0, y0, x1, y1, cell_size, ax, debug=True)
\ No newline at end of file
+        pixels = LINE_METHODS.get(method, dda_pixels)(x0, y0, x1, y1)
+        # Wu plots two pixels per column, so one step covers a pair
+        yield from self.pixel_steps(ax, pixels, cell_size, 2 if method == 3 else 1)
+
+    def start_debug(self, method, x0, y0, x1, y1, cell_size, fig, ax):
+        """Return a player that shows the line being drawn step by step."""
+        return StepPlayer(ax, lambda: self.debug_steps(method, x0, y0, x1, y1, cell_size, ax),
+                          "LineDrawer.start_debug", interval=50)
@@ -0,0 +1,250 @@
+import os
+import numpy as np
+
+PLY_TYPES = {
+    'char': 'i1', 'int8': 'i1', 'uchar': 'u1', 'uint8': 'u1',
+    'short': 'i2', 'int16': 'i2', 'ushort': 'u2', 'uint16': 'u2',
+    'int': 'i4', 'int32': 'i4', 'uint': 'u4', 'uint32': 'u4',
+    'float': 'f4', 'float32': 'f4', 'double': 'f8', 'float64': 'f8'
+}
+
+
+def unique_edges(edges, vertex_count):
+    """Убрать повторяющиеся ребра (каждое ребро грани встречается у двух соседних граней)."""
+    edges = np.sort(np.asarray(edges, dtype=np.int64).reshape(-1, 2), axis=1)
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    # Пара (a, b) кодируется одним числом, np.unique по одномерному массиву быстрее, чем по строкам
+    keys = np.unique(edges[:, 0] * vertex_count + edges[:, 1])
+    return np.column_stack((keys // vertex_count, keys % vertex_count))
+
+
+def faces_to_edges(faces):
+    """Ребра многоугольных граней; faces — список массивов (F, k) граней с одинаковым числом вершин."""
+    edges = [np.stack((block, np.roll(block, -1, axis=1)), axis=2).reshape(-1, 2) for block in faces]
+    return np.concatenate(edges) if edges else np.empty((0, 2), dtype=np.int64)
+
+
+def faces_to_triangles(faces):
+    """Триангуляция граней веером из первой вершины: массив (T, 3)."""
+    triangles = [np.stack((np.repeat(block[:, :1], block.shape[1] - 2, axis=1), block[:, 1:-1], block[:, 2:]),
+                          axis=2).reshape(-1, 3) for block in faces if block.shape[1] >= 3]
+    return np.concatenate(triangles) if triangles else np.empty((0, 3), dtype=np.int64)
+
+
+def group_faces(faces):
+    """Сгруппировать грани по числу вершин, чтобы дальше обрабатывать их целыми массивами."""
+    groups = {}
+    for face in faces:
+        groups.setdefault(len(face), []).append(face)
+    return [np.array(group, dtype=np.int64) for size, group in sorted(groups.items()) if size >= 2]
+
+
+class Mesh:
+    """Каркасная модель: вершины (V, 3), ребра (E, 2) и треугольники (T, 3) в виде массивов numpy."""
+
+    def __init__(self, vertices, edges, triangles=None):
+        self.vertices = np.asarray(vertices, dtype=float).reshape(-1, 3)
+        self.edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        self.triangles = (np.empty((0, 3), dtype=np.int64) if triangles is None
+                          else np.asarray(triangles, dtype=np.int64).reshape(-1, 3))
+
+    @classmethod
+    def from_faces(cls, vertices, faces, lines=()):
+        vertices = np.asarray(vertices, dtype=float).reshape(-1, 3)
+        edges = faces_to_edges(faces)
+        if len(lines):
+            edges = np.concatenate((edges, np.asarray(lines, dtype=np.int64).reshape(-1, 2)))
+        return cls(vertices, unique_edges(edges, max(len(vertices), 1)), faces_to_triangles(faces))
+
+    def normalized(self, size=1.0):
+        """Копия модели с центром в начале координат и наибольшим размером size (как у куба CubeDrawer)."""
+        if not len(self.vertices):
+            return Mesh(self.vertices, self.edges, self.triangles)
+        low, high = self.vertices.min(axis=0), self.vertices.max(axis=0)
+        extent = (high - low).max() or 1.0
+        vertices = (self.vertices - (low + high) / 2) * (size / extent)
+        return Mesh(vertices, self.edges, self.triangles)
+
+
+def _obj_index(token, count):
+    index = int(token.split('/', 1)[0])
+    # Отрицательные индексы OBJ отсчитываются от последней прочитанной вершины
+    return index - 1 if index > 0 else count + index
+
+
+def load_obj(path):
+    """Прочитать OBJ построчно: вершины v, грани f и ломаные l; текстуры и нормали пропускаются."""
+    vertices = []
+    faces = []
+    lines = []
+    with open(path, 'r', encoding='utf-8', errors='replace') as file:
+        for line in file:
+            if line.startswith('v '):
+                vertices.append(line.split()[1:4])
+            elif line.startswith('f '):
+                count = len(vertices)
+                faces.append([_obj_index(token, count) for token in line.split()[1:]])
+            elif line.startswith('l '):
+                count = len(vertices)
+                polyline = [_obj_index(token, count) for token in line.split()[1:]]
+                lines.extend(zip(polyline, polyline[1:]))
+    vertices = np.array(vertices, dtype=float).reshape(-1, 3)
+    return Mesh.from_faces(vertices, group_faces(faces), lines)
+
+
+def _read_ply_header(file):
+    if file.readline().strip() != b'ply':
+        raise ValueError("Not a PLY file")
+    form = None
+    elements = []
+    while True:
+        line = file.readline()
+        if not line:
+            raise ValueError("Unexpected end of PLY header")
+        words = line.decode('ascii', errors='replace').split()
+        if not words or words[0] in ('comment', 'obj_info'):
+            continue
+        if words[0] == 'end_header':
+            return form, elements
+        if words[0] == 'format':
+            form = words[1]
+        elif words[0] == 'element':
+            elements.append((words[1], int(words[2]), []))
+        elif words[0] == 'property':
+            if words[1] == 'list':
+                elements[-1][2].append((words[4], PLY_TYPES[words[2]], PLY_TYPES[words[3]]))
+            else:
+                elements[-1][2].append((words[2], PLY_TYPES[words[1]], None))
+
+
+def _ply_vertices(table, names):
+    return np.column_stack([np.asarray(table[name], dtype=float) for name in ('x', 'y', 'z')]) \
+        if all(name in names for name in ('x', 'y', 'z')) else np.empty((0, 3))
+
+
+def _read_ply_ascii(file, elements):
+    data = {}
+    for name, count, properties in elements:
+        rows = [file.readline().split() for _ in range(count)]
+        if all(kind is None for _, _, kind in properties):
+            table = np.array(rows, dtype=float).reshape(count, len(properties))
+            data[name] = {prop: table[:, i] for i, (prop, _, _) in enumerate(properties)}
+        else:
+            data[name] = {prop: [] for prop, _, _ in properties}
+            for row in rows:
+                position = 0
+                for prop, _, kind in properties:
+                    if kind is None:
+                        data[name][prop].append(float(row[position]))
+                        position += 1
+                    else:
+                        size = int(row[position])
+                        data[name][prop].append([int(v) for v in row[position + 1:position + 1 + size]])
+                        position += 1 + size
+    return data
+
+
+def _uniform_lists(buffer, offset, count, dtype, properties, following, byte_order):
+    """Проверить до чтения одним frombuffer, что у всех записей длины списков как у первой.
+
+    Счетчики списков читаются с шагом записи dtype; если следующие элементы без списков, их размер
+    известен и длина буфера должна совпасть точно.
+    """
+    size = count * dtype.itemsize
+    if size > len(buffer) - offset:
+        return False
+    if all(kind is None for _, _, props in following for _, _, kind in props):
+        rest = sum(n * np.dtype([(prop, byte_order + t) for prop, t, _ in props]).itemsize
+                   for _, n, props in following if props)
+        if len(buffer) - offset != size + rest:
+            return False
+    for prop, _, kind in properties:
+        if kind is not None:
+            count_type, position = dtype.fields[prop + '_count'][:2]
+            counts = np.ndarray((count,), dtype=count_type, buffer=buffer, offset=offset + position,
+                                strides=(dtype.itemsize,))
+            if np.any(counts != dtype[prop].shape[0]):
+                return False
+    return True
+
+
+def _read_ply_binary(file, elements, byte_order):
+    buffer = file.read()
+    offset = 0
+    data = {}
+    for index, (name, count, properties) in enumerate(elements):
+        fields = [(prop, byte_order + dtype) for prop, dtype, kind in properties if kind is None]
+        if len(fields) == len(properties):
+            dtype = np.dtype(fields)
+            table = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+            offset += dtype.itemsize * count
+            data[name] = {prop: table[prop] for prop, _ in fields}
+            continue
+        if count == 0:
+            data[name] = {prop: [] for prop, _, _ in properties}
+            continue
+        # Списки переменной длины: если у всех записей длина как у первой (обычно треугольники),
+        # элемент читается одним frombuffer, иначе разбирается по записям
+        layout = []
+        position = offset
+        for prop, dtype, kind in properties:
+            if kind is None:
+                layout.append((prop, byte_order + dtype))
+                position += np.dtype(dtype).itemsize
+            else:
+                size = int(np.frombuffer(buffer, dtype=byte_order + dtype, count=1, offset=position)[0])
+                layout.append((prop + '_count', byte_order + dtype))
+                layout.append((prop, byte_order + kind, (size,)))
+                position += np.dtype(dtype).itemsize + size * np.dtype(kind).itemsize
+        dtype = np.dtype(layout)
+        if _uniform_lists(buffer, offset, count, dtype, properties, elements[index + 1:], byte_order):
+            table = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset)
+            offset += dtype.itemsize * count
+            data[name] = {prop: table[prop] for prop, _, _ in properties}
+            continue
+        data[name] = {prop: [] for prop, _, _ in properties}
+        for _ in range(count):
+            for prop, dtype, kind in properties:
+                value_type = np.dtype(byte_order + dtype)
+                value = np.frombuffer(buffer, dtype=value_type, count=1, offset=offset)[0]
+                offset += value_type.itemsize
+                if kind is None:
+                    data[name][prop].append(value)
+                else:
+                    item_type = np.dtype(byte_order + kind)
+                    data[name][prop].append(np.frombuffer(buffer, dtype=item_type, count=int(value), offset=offset))
+                    offset += item_type.itemsize * int(value)
+    return data
+
+
+def load_ply(path):
+    """Прочитать PLY (ascii или двоичный): элементы vertex, face и edge."""
+    with open(path, 'rb') as file:
+        form, elements = _read_ply_header(file)
+        if form == 'ascii':
+            data = _read_ply_ascii(file, elements)
+        elif form in ('binary_little_endian', 'binary_big_endian'):
+            data = _read_ply_binary(file, elements, '<' if form == 'binary_little_endian' else '>')
+        else:
+            raise ValueError(f"Unsupported PLY format: {form}")
+    vertex = data.get('vertex', {})
+    vertices = _ply_vertices(vertex, vertex.keys())
+    face = data.get('face', {})
+    indices = face.get('vertex_indices', face.get('vertex_index', []))
+    if isinstance(indices, np.ndarray):
+        faces = [indices.astype(np.int64)] if indices.ndim == 2 and indices.shape[1] >= 2 else []
+    else:
+        faces = group_faces(indices)
+    edge = data.get('edge', {})
+    lines = np.column_stack((edge['vertex1'], edge['vertex2'])) if 'vertex1' in edge else ()
+    return Mesh.from_faces(vertices, faces, lines)
+
+
+def load_mesh(path):
+    """Загрузить модель OBJ или PLY по расширению файла."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.obj':
+        return load_obj(path)
+    if extension == '.ply':
+        return load_ply(path)
+    raise ValueError(f"Unsupported mesh format: {extension}")
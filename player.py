@@ -0,0 +1,164 @@
+import math
+from collections import OrderedDict
+from profiling import PROFILER
+
+# Сколько отрисованных кадров хранить для перемотки назад (снимок — копия области холста)
+MAX_SNAPSHOTS = 64
+# Минимальный интервал таймера, мс; при большей скорости за тик пропускается несколько шагов без отрисовки
+MIN_INTERVAL = 20
+
+
+class StepPlayer:
+    """Проигрыватель шагов отладки.
+
+    factory() возвращает новый генератор, который рисует на ax очередной шаг алгоритма
+    и выдает его запись (kind, data). Генератор продвигается лениво, только до показываемого
+    кадра; кадр i — состояние после (i + 1)-го шага, последний кадр — итог алгоритма.
+    Показанные кадры запоминаются снимками холста, поэтому перемотка к ним не пересчитывает
+    алгоритм; к остальным кадрам назад генератор прогоняется заново без промежуточной отрисовки.
+    """
+
+    def __init__(self, ax, factory, name="debug", interval=400, max_snapshots=MAX_SNAPSHOTS):
+        self.ax = ax
+        self.factory = factory
+        self.name = name
+        self.interval = interval
+        self.max_snapshots = max_snapshots
+        self.speed = 1.0
+        self.steps = None
+        self.position = -1  # кадр, до которого дошел генератор
+        self.frame = -1  # показанный кадр
+        self.length = None  # число кадров, известно после исчерпания генератора
+        self.record = None
+        self.value = None
+        self.snapshots = OrderedDict()
+        self.timer = None
+        self.playing = False
+        self.listeners = []
+
+    @property
+    def canvas(self):
+        return self.ax.figure.canvas
+
+    @property
+    def done(self):
+        return self.length is not None and self.frame == self.length - 1
+
+    def restart(self):
+        self.steps = self.factory()
+        self.position = -1
+
+    def advance(self, index):
+        """Прогнать генератор до кадра index без перерисовки холста; вернуть достигнутый кадр."""
+        if self.steps is None or index < self.position:
+            self.restart()
+        while self.position < index and (self.length is None or self.position < self.length - 1):
+            try:
+                self.record = next(self.steps)
+            except StopIteration as stop:
+                self.value = stop.value
+                self.record = None
+                self.length = self.position + 2
+            self.position += 1
+        return self.position
+
+    def snapshot(self):
+        copy = getattr(self.canvas, "copy_from_bbox", None)
+        if copy is None or self.max_snapshots <= 0:
+            return
+        self.snapshots[self.position] = (self.canvas.get_width_height(), copy(self.ax.figure.bbox))
+        self.snapshots.move_to_end(self.position)
+        while len(self.snapshots) > self.max_snapshots:
+            self.snapshots.popitem(last=False)
+
+    def restore(self, index):
+        """Показать запомненный кадр index; False, если снимка нет или размер холста изменился."""
+        entry = self.snapshots.get(index)
+        if entry is None:
+            return False
+        size, region = entry
+        if size != self.canvas.get_width_height():
+            self.snapshots.clear()
+            return False
+        self.canvas.restore_region(region)
+        self.canvas.blit(self.ax.figure.bbox)
+        return True
+
+    def seek(self, index):
+        """Показать кадр index (отрицательный и слишком большой приводятся к границам)."""
+        index = max(0, index)
+        if self.length is not None:
+            index = min(index, self.length - 1)
+        if not self.restore(index):
+            with PROFILER.call(self.name, self.ax, {"frame": index}):
+                index = self.advance(index)
+                self.canvas.draw()
+                self.canvas.flush_events()
+            self.snapshot()
+        self.frame = index
+        if self.done:
+            self.pause()
+        for listener in self.listeners:
+            listener(self)
+        return index
+
+    def step(self, count=1):
+        return self.seek(self.frame + count)
+
+    def back(self, count=1):
+        return self.seek(self.frame - count)
+
+    def skip(self):
+        """Пропустить анимацию: дойти до итога без отрисовки промежуточных шагов."""
+        self.pause()
+        self.advance(math.inf)
+        return self.seek(self.length - 1)
+
+    def stride(self):
+        """Интервал таймера (мс) и число шагов за тик для текущей скорости."""
+        step_interval = self.interval / self.speed
+        if step_interval >= MIN_INTERVAL:
+            return int(step_interval), 1
+        return MIN_INTERVAL, math.ceil(MIN_INTERVAL / step_interval)
+
+    def set_speed(self, speed):
+        if speed <= 0:
+            raise ValueError("Speed must be positive")
+        self.speed = speed
+        if self.timer is not None:
+            self.timer.interval = self.stride()[0]
+
+    def tick(self):
+        if self.playing:
+            self.step(self.stride()[1])
+
+    def play(self):
+        if self.done:
+            return
+        if self.timer is None:
+            self.timer = self.canvas.new_timer(interval=self.stride()[0])
+            self.timer.add_callback(self.tick)
+        self.playing = True
+        if self.frame < 0:
+            self.seek(0)
+        if self.playing:
+            self.timer.start()
+
+    def pause(self):
+        self.playing = False
+        if self.timer is not None:
+            self.timer.stop()
+
+    def toggle(self):
+        if self.playing:
+            self.pause()
+        else:
+            self.play()
+
+    def stop(self):
+        """Остановить проигрывание и отпустить генератор и снимки."""
+        self.pause()
+        if self.steps is not None:
+            self.steps.close()
+        self.steps = None
+        self.snapshots.clear()
@@ -1,7 +1,57 @@
 import numpy as np
-import asyncio
+import os
 import platform
+from concurrent.futures import ProcessPoolExecutor
 from matplotlib.patches import Rectangle
+from framebuffer import Framebuffer, SharedFramebuffer
+from lines import stroke
+from profiling import profiled, PROFILER
+from player import StepPlayer
+from kernels import (scanline_spans, orientation, segment_intersection, run_steps, StepStream, graham_steps,
+                     jarvis_steps, intersection_steps, crossing_steps, basic_scanline_steps, active_edge_steps,
+                     flood_fill_steps, scanline_flood_steps, convex_window, sutherland_hodgman_steps,
+                     weiler_atherton_steps, clip_polygons, cyrus_beck_steps, clip_segments, clipped_segments)
+
+FILL_COLORS = {
+    "black": (0, 0, 0),
+    "green": (0, 255, 0),
+    "blue": (0, 0, 255),
+    "yellow": (255, 255, 0),
+    "purple": (128, 0, 128),
+}
+
+
+def _fill_rows(target, jobs, y_start, y_stop):
+    spans = 0
+    for points, color in jobs:
+        ys, x_starts, x_ends = scanline_spans(points, y_start, y_stop)
+        target.fill_spans(ys, x_starts, x_ends, color)
+        spans += len(ys)
+    return spans
+
+
+def _band_tasks(jobs, bounds):
+    """Задачи (многоугольники, y_start, y_stop) для полос между соседними границами bounds."""
+    y_ranges = [(points[:, 1].min(), points[:, 1].max()) for points, _ in jobs]
+    tasks = []
+    for y_start, y_stop in zip(bounds[:-1], bounds[1:]):
+        band_jobs = [job for job, (lo, hi) in zip(jobs, y_ranges) if hi >= y_start and lo < y_stop]
+        if band_jobs:
+            tasks.append((band_jobs, int(y_start), int(y_stop)))
+    return tasks
+
+
+def _polygon_spans(jobs, y_start, y_stop):
+    return [scanline_spans(points, y_start, y_stop) for points, _ in jobs]
+
+
+def _fill_band(kind, descriptor, jobs, y_start, y_stop):
+    target = kind.attach(descriptor)
+    try:
+        return _fill_rows(target, jobs, y_start, y_stop)
+    finally:
+        target.close()
+
 
 class PolygonEditor:
     def __init__(self):
@@ -11,9 +61,14 @@ class PolygonEditor:
         self.hull_graham = []
         self.hull_jarvis = []
         self.intersections = []
+        self.clipped = []
+        self.clipped_segments = np.empty((0, 4))
+        self._normals_key = None
+        self._clip_normals = None
         self.fill_color = 'black'
         self.pixel_map = np.zeros((100, 100, 3), dtype=np.uint8) + 255  # Белый фон
 
+    @profiled(phase=True)
     def setup_plot(self, ax, cell_size):
         ax.clear()
         ax.set_aspect("equal")
@@ -97,6 +152,26 @@ class PolygonEditor:
             normals.append((mid_point, normal))
         return normals
 
+    def clip_normals(self, points):
+        """Середины ребер и внутренние нормали выпуклого многоугольника для Кируса — Бека (с кэшем)."""
+        key = tuple(map(tuple, np.asarray(points, dtype=float).tolist()))
+        if key != self._normals_key:
+            if not self.is_convex_polygon(points):
+                raise ValueError("Cyrus-Beck clipping requires a convex polygon")
+            normals = self.get_inner_normals(points)
+            self._clip_normals = (np.array([mid for mid, _ in normals]), np.array([normal for _, normal in normals]))
+            self._normals_key = key
+        return self._clip_normals
+
+    def clip_segments(self, segments, points=None):
+        """Интервалы видимости отрезков (N, 4) в выпуклом многоугольнике (по умолчанию — текущем).
+
+        Возвращает t_enter, t_exit и маску видимых; прямоугольник со сторонами вдоль осей
+        отсекается Лиангом — Барски.
+        """
+        points = self.points if points is None else points
+        return clip_segments(segments, points, *self.clip_normals(points))
+
     def show_normals(self, ax):
         self.normals = self.get_inner_normals(self.points)
         for mid_point, normal in self.normals:
@@ -104,200 +179,172 @@ class PolygonEditor:
             ax.plot([mid_point[0], end_point[0]], [mid_point[1], end_point[1]], color="green")
 
     def orientation(self, p, q, r):
-        val = (q[1] - p[1]) * (r[0] - q[0]) - (q[0] - p[0]) * (r[1] - q[1])
-        if val == 0:
-            return 0
-        return 1 if val > 0 else -1
+        return orientation(p, q, r)
 
-    async def graham_hull(self, ax, debug=False):
+    def graham_hull(self, ax, debug=False):
         if len(self.points) < 3:
             return False
-        points = sorted(self.points)
-        n = len(points)
-        stack = []
+        stream = StepStream(graham_steps(self.points))
         if debug:
             self.setup_plot(ax, 10)
             self.redraw_polygon(ax, close=True)
-            ax.figure.canvas.draw()
-            ax.figure.canvas.flush_events()
-            await asyncio.sleep(0.4)
-        for i in range(n):
-            while len(stack) > 1 and self.orientation(stack[-2], stack[-1], points[i]) != -1:
-                stack.pop()
-                if debug:
-                    self.setup_plot(ax, 10)
-                    self.redraw_polygon(ax, close=True)
-                    for j in range(len(stack) - 1):
-                        self.plot_line(ax, stack[j], stack[j + 1], color="purple")
-                    ax.figure.canvas.draw()
-                    ax.figure.canvas.flush_events()
-                    await asyncio.sleep(0.4)
-            stack.append(points[i])
-            if debug:
-                self.setup_plot(ax, 10)
-                self.redraw_polygon(ax, close=True)
-                for j in range(len(stack) - 1):
-                    self.plot_line(ax, stack[j], stack[j + 1], color="purple")
-                ax.figure.canvas.draw()
-                ax.figure.canvas.flush_events()
-                await asyncio.sleep(0.4)
-        lower = stack[:]
-        stack = []
-        for i in range(n - 1, -1, -1):
-            while len(stack) > 1 and self.orientation(stack[-2], stack[-1], points[i]) != -1:
+            yield "start", None
+        # Стек повторяется по шагам ядра; готовая нижняя цепь рисуется вместе с верхней
+        lower, stack = [], []
+        for kind, index in stream:
+            if not debug:
+                continue
+            if kind == "upper":
+                lower, stack = stack, []
+                continue
+            if kind == "pop":
                 stack.pop()
-                if debug:
-                    self.setup_plot(ax, 10)
-                    self.redraw_polygon(ax, close=True)
-                    for j in range(len(lower) - 1):
-                        self.plot_line(ax, lower[j], lower[j + 1], color="purple")
-                    for j in range(len(stack) - 1):
-                        self.plot_line(ax, stack[j], stack[j + 1], color="purple")
-                    ax.figure.canvas.draw()
-                    ax.figure.canvas.flush_events()
-                    await asyncio.sleep(0.4)
-            stack.append(points[i])
-            if debug:
-                self.setup_plot(ax, 10)
-                self.redraw_polygon(ax, close=True)
-                for j in range(len(lower) - 1):
-                    self.plot_line(ax, lower[j], lower[j + 1], color="purple")
-                for j in range(len(stack) - 1):
-                    self.plot_line(ax, stack[j], stack[j + 1], color="purple")
-                ax.figure.canvas.draw()
-                ax.figure.canvas.flush_events()
-                await asyncio.sleep(0.4)
-        stack.pop()
-        self.hull_graham = lower + stack
+            else:
+                stack.append(index)
+            self.setup_plot(ax, 10)
+            self.redraw_polygon(ax, close=True)
+            for chain in (lower, stack):
+                for j in range(len(chain) - 1):
+                    self.plot_line(ax, self.points[chain[j]], self.points[chain[j + 1]], color="purple")
+            yield kind, index
+        self.hull_graham = [self.points[i] for i in stream.value]
         for i in range(len(self.hull_graham)):
             self.plot_line(ax, self.hull_graham[i], self.hull_graham[(i + 1) % len(self.hull_graham)], color="purple")
         return True
 
-    async def jarvis_hull(self, ax, debug=False):
+    def jarvis_hull(self, ax, debug=False):
         if len(self.points) < 3:
             return False
-        n = len(self.points)
-        hull = []
-        l = min(range(n), key=lambda i: (self.points[i][0], self.points[i][1]))
-        p = l
+        stream = StepStream(jarvis_steps(self.points))
         if debug:
             self.setup_plot(ax, 10)
             self.redraw_polygon(ax, close=True)
-            ax.figure.canvas.draw()
-            ax.figure.canvas.flush_events()
-            await asyncio.sleep(0.4)
-        while True:
-            hull.append(self.points[p])
-            q = (p + 1) % n
-            for i in range(n):
-                if self.orientation(self.points[p], self.points[i], self.points[q]) == -1:
-                    q = i
-            p = q
-            if debug:
-                self.setup_plot(ax, 10)
-                self.redraw_polygon(ax, close=True)
-                for i in range(len(hull) - 1):
-                    self.plot_line(ax, hull[i], hull[i + 1], color="orange")
-                ax.figure.canvas.draw()
-                ax.figure.canvas.flush_events()
-                await asyncio.sleep(0.4)
-            if p == l:
-                break
-        self.hull_jarvis = hull
+            yield "start", None
+        hull = []
+        for kind, index in stream:
+            if not debug:
+                continue
+            hull.append(self.points[index])
+            self.setup_plot(ax, 10)
+            self.redraw_polygon(ax, close=True)
+            for i in range(len(hull) - 1):
+                self.plot_line(ax, hull[i], hull[i + 1], color="orange")
+            yield kind, index
+        self.hull_jarvis = [self.points[i] for i in stream.value]
         for i in range(len(self.hull_jarvis)):
             self.plot_line(ax, self.hull_jarvis[i], self.hull_jarvis[(i + 1) % len(self.hull_jarvis)], color="orange")
         return True
 
     def find_intersection(self, p1, p2, q1, q2):
-        def on_segment(p, q, r):
-            return (q[0] <= max(p[0], r[0]) and q[0] >= min(p[0], r[0]) and
-                    q[1] <= max(p[1], r[1]) and q[1] >= min(p[1], r[1]))
-
-        o1 = self.orientation(p1, p2, q1)
-        o2 = self.orientation(p1, p2, q2)
-        o3 = self.orientation(q1, q2, p1)
-        o4 = self.orientation(q1, q2, p2)
-
-        if o1 != o2 and o3 != o4:
-            denom = ((p1[0] - p2[0]) * (q1[1] - q2[1]) - (p1[1] - p2[1]) * (q1[0] - q2[0]))
-            if denom == 0:
-                return None
-            t = ((p1[0] - q1[0]) * (q1[1] - q2[1]) - (p1[1] - q1[1]) * (q1[0] - q2[0])) / denom
-            u = -((p1[0] - p2[0]) * (p1[1] - q1[1]) - (p1[1] - p2[1]) * (p1[0] - q1[0])) / denom
-            if 0 <= t <= 1 and 0 <= u <= 1:
-                x = p1[0] + t * (p2[0] - p1[0])
-                y = p1[1] + t * (p2[1] - p1[1])
-                return (x, y)
-            return None
-
-        if o1 == 0 and o2 == 0 and o3 == 0 and o4 == 0:
-            if on_segment(p1, q1, p2) or on_segment(p1, q2, p2) or on_segment(q1, p1, q2) or on_segment(q1, p2, q2):
-                if on_segment(p1, q1, p2):
-                    return q1
-                if on_segment(p1, q2, p2):
-                    return q2
-                if on_segment(q1, p1, q2):
-                    return p1
-                if on_segment(q1, p2, q2):
-                    return p2
-            return None
-        return None
-
-    async def find_intersections(self, ax, debug=False):
+        return segment_intersection(p1, p2, q1, q2)
+
+    def find_intersections(self, ax, debug=False):
         if len(self.segment_points) != 2:
             return False
         if len(self.points) < 2:
             return False
-        self.intersections = []
-        segment_p1, segment_p2 = self.segment_points
-        n = len(self.points)
-        for i in range(n):
-            poly_p1 = self.points[i]
-            poly_p2 = self.points[(i + 1) % n]
-            intersection = self.find_intersection(segment_p1, segment_p2, poly_p1, poly_p2)
-            if intersection:
-                self.intersections.append(intersection)
-                self.plot_point(ax, intersection[0], intersection[1], color="yellow", size=5)
-                if debug:
-                    ax.figure.canvas.draw()
-                    ax.figure.canvas.flush_events()
-                    await asyncio.sleep(0.4)
+        stream = StepStream(intersection_steps(self.points, self.segment_points))
+        for kind, intersection in stream:
+            self.plot_point(ax, intersection[0], intersection[1], color="yellow", size=5)
+            if debug:
+                yield kind, intersection
+        self.intersections = stream.value
         return bool(self.intersections)
 
-    async def is_point_inside(self, point, ax, debug=False):
-        if len(self.points) < 3:
+    def clip_window(self):
+        """Окно отсечения из точек отрезка: две точки — углы прямоугольника, больше — многоугольник."""
+        if len(self.segment_points) == 2:
+            (x1, y1), (x2, y2) = self.segment_points
+            return convex_window((min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)))
+        return np.asarray(self.segment_points, dtype=float)
+
+    def draw_window(self, ax, window):
+        for i in range(len(window)):
+            self.plot_line(ax, window[i], window[(i + 1) % len(window)], color="green")
+
+    def clip_polygon(self, ax, debug=False):
+        """Отсечь многоугольник окном: выпуклым — Сазерлендом — Ходжманом, невыпуклым — Вейлером — Азертоном."""
+        if len(self.points) < 3 or len(self.segment_points) < 2:
             return False
-        x, y = point
-        n = len(self.points)
-        inside = False
-        j = n - 1
-        if debug:
+        window = self.clip_window()
+        self.draw_window(ax, window)
+        if len(self.segment_points) == 2 or self.is_convex_polygon(self.segment_points):
+            stream = StepStream(sutherland_hodgman_steps(self.points, window))
+            for kind, (i, polygon) in stream:
+                if not debug:
+                    continue
+                self.setup_plot(ax, 10)
+                self.redraw_polygon(ax, close=True)
+                self.draw_window(ax, window)
+                self.plot_line(ax, window[i], window[(i + 1) % len(window)], color="red")
+                if len(polygon):
+                    ax.fill(polygon[:, 0], polygon[:, 1], color="orange", alpha=0.5)
+                yield kind, i
+            self.clipped = [stream.value] if len(stream.value) else []
+        else:
+            stream = StepStream(weiler_atherton_steps(self.points, window))
+            for kind, data in stream:
+                if kind == "intersection":
+                    self.plot_point(ax, data[0], data[1], color="yellow", size=5)
+                else:
+                    ax.fill(data[:, 0], data[:, 1], color="orange", alpha=0.5)
+                if debug:
+                    yield kind, data
+            self.clipped = stream.value
+        for polygon in self.clipped:
+            ax.fill(polygon[:, 0], polygon[:, 1], color=self.fill_color)
+        return bool(self.clipped)
+
+    def clip_segment_pairs(self, ax, debug=False):
+        """Отсечь отрезки из пар точек отрезка выпуклым многоугольником (Кирус — Бек)."""
+        if len(self.points) < 3 or len(self.segment_points) < 2 or len(self.segment_points) % 2:
+            return False
+        segments = np.asarray(self.segment_points, dtype=float).reshape(-1, 4)
+        for x0, y0, x1, y1 in segments:
+            ax.plot([x0, x1], [y0, y1], color="cyan", linestyle="--")
+        edge_points, normals = self.clip_normals(self.points)
+        stream = StepStream(cyrus_beck_steps(segments, edge_points, normals))
+        for kind, (i, t_enter, t_exit) in stream:
+            if not debug:
+                continue
             self.setup_plot(ax, 10)
             self.redraw_polygon(ax, close=True)
-            self.plot_point(ax, x, y, color="red", size=5)
-            ax.figure.canvas.draw()
-            ax.figure.canvas.flush_events()
-            await asyncio.sleep(0.4)
-        for i in range(n):
-            if ((self.points[i][1] > y) != (self.points[j][1] > y)) and \
-               (x < (self.points[j][0] - self.points[i][0]) * (y - self.points[i][1]) / \
-                (self.points[j][1] - self.points[i][1] + 1e-10) + self.points[i][0]):
-                inside = not inside
-                if debug:
-                    self.plot_line(ax, self.points[i], self.points[j], color="red")
-                    ax.figure.canvas.draw()
-                    ax.figure.canvas.flush_events()
-                    await asyncio.sleep(0.4)
-            j = i
-        if debug and inside:
+            self.plot_line(ax, self.points[i], self.points[(i + 1) % len(self.points)], color="red")
+            ax.plot([edge_points[i][0], edge_points[i][0] + normals[i][0]],
+                    [edge_points[i][1], edge_points[i][1] + normals[i][1]], color="green")
+            for (x0, y0, x1, y1), t0, t1 in zip(segments, t_enter, t_exit):
+                ax.plot([x0, x1], [y0, y1], color="cyan", linestyle="--")
+                if t0 <= t1:
+                    ax.plot([x0 + t0 * (x1 - x0), x0 + t1 * (x1 - x0)], [y0 + t0 * (y1 - y0), y0 + t1 * (y1 - y0)],
+                            color="orange")
+            yield kind, i
+        self.clipped_segments = clipped_segments(segments, *stream.value)
+        for x0, y0, x1, y1 in self.clipped_segments:
+            ax.plot([x0, x1], [y0, y1], color="red", linewidth=2)
+        return bool(len(self.clipped_segments))
+
+    def is_point_inside(self, point, ax, debug=False):
+        if len(self.points) < 3:
+            return False
+        if not debug:
+            return run_steps(crossing_steps(self.points, point))
+        x, y = point
+        self.setup_plot(ax, 10)
+        self.redraw_polygon(ax, close=True)
+        self.plot_point(ax, x, y, color="red", size=5)
+        yield "start", point
+        stream = StepStream(crossing_steps(self.points, point))
+        for kind, (i, j) in stream:
+            self.plot_line(ax, self.points[i], self.points[j], color="red")
+            yield kind, (i, j)
+        if stream.value:
             self.plot_point(ax, x, y, color="green", size=5)
-            ax.figure.canvas.draw()
-            ax.figure.canvas.flush_events()
-            await asyncio.sleep(0.4)
-        return inside
+            yield "inside", point
+        return stream.value
 
     def update_pixel_map(self, x, y, color):
         x, y = int(x), int(y)
+        PROFILER.count("pixels")
         if 0 <= x < 100 and 0 <= y < 100:
             if color == "black":
                 self.pixel_map[y, x] = [0, 0, 0]
@@ -348,187 +395,154 @@ class PolygonEditor:
                 err += dx
                 y1 += sy
 
-    async def basic_scanline(self, ax, debug=False):
-        if len(self.points) < 3:
-            return False
-        min_y = min(p[1] for p in self.points)
-        max_y = max(p[1] for p in self.points)
-        edges = []
-        for i in range(len(self.points)):
-            p1 = self.points[i]
-            p2 = self.points[(i + 1) % len(self.points)]
-            if p1[1] != p2[1]:
-                if p1[1] < p2[1]:
-                    edges.append((p1, p2))
-                else:
-                    edges.append((p2, p1))
-        for y in range(int(min_y), int(max_y) + 1):
-            intersections = []
-            for edge in edges:
-                p1, p2 = edge
-                if p1[1] <= y < p2[1]:
-                    dx = p2[0] - p1[0]
-                    dy = p2[1] - p1[1]
-                    x = p1[0] + dx * (y - p1[1]) / dy
-                    intersections.append(x)
-                    if debug:
+    def draw_outline_on_pixel_map(self, color, width=1):
+        """Контур многоугольника в карте пикселей: толщиной 1 — отрезками Брезенхема, толще — обводкой."""
+        if width <= 1:
+            for i in range(len(self.points)):
+                self.draw_line_on_pixel_map(self.points[i], self.points[(i + 1) % len(self.points)], color)
+            return
+        stroke(Framebuffer(100, 100, buffer=self.pixel_map), self.points, width, FILL_COLORS[color], closed=True)
+
+    def fill_cells(self, cells):
+        """Записать клетки заливки в карту пикселей одной операцией."""
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        PROFILER.count("pixels", len(cells))
+        inside = (cells[:, 0] >= 0) & (cells[:, 0] < 100) & (cells[:, 1] >= 0) & (cells[:, 1] < 100)
+        self.pixel_map[cells[inside, 1], cells[inside, 0]] = FILL_COLORS.get(self.fill_color, (255, 255, 255))
+
+    def play_fill(self, ax, steps, debug):
+        """Выполнить ядро заливки: без отладки — сразу записать клетки, в отладке — показывать каждый шаг."""
+        if not debug:
+            self.fill_cells(run_steps(steps))
+        else:
+            for kind, data in steps:
+                if kind == "pixel":
+                    self.update_pixel_map(data[0], data[1], self.fill_color)
+                    ax.plot(data[0], data[1], 's', color=self.fill_color, markersize=3)
+                elif kind == "intersection":
+                    self.plot_point(ax, data[0], data[1], color="red", size=3)
+                elif kind == "activate":
+                    xs, y = data
+                    self.setup_plot(ax, 10)
+                    self.redraw_polygon(ax, close=True)
+                    for x in xs:
                         self.plot_point(ax, x, y, color="red", size=3)
-                        ax.figure.canvas.draw()
-                        ax.figure.canvas.flush_events()
-                        await asyncio.sleep(0.4)
-            intersections.sort()
-            for j in range(0, len(intersections), 2):
-                if j + 1 >= len(intersections):
-                    break
-                x_start = int(intersections[j])
-                x_end = int(intersections[j + 1])
-                for x in range(x_start, x_end + 1):
-                    self.update_pixel_map(x, y, self.fill_color)
-                    if debug:
-                        ax.plot(x, y, 's', color=self.fill_color, markersize=3)
-                        ax.figure.canvas.draw()
-                        ax.figure.canvas.flush_events()
-                        await asyncio.sleep(0.4)
+                yield kind, data
         # Сплошная заливка в конце
         ax.fill([p[0] for p in self.points], [p[1] for p in self.points], color=self.fill_color)
         return True
 
-    async def scanline_fill(self, ax, debug=False):
+    def basic_scanline(self, ax, debug=False):
         if len(self.points) < 3:
             return False
-        min_y = min(p[1] for p in self.points)
-        max_y = max(p[1] for p in self.points)
-        edges = []
-        for i in range(len(self.points)):
-            p1 = self.points[i]
-            p2 = self.points[(i + 1) % len(self.points)]
-            if p1[1] != p2[1]:
-                edges.append((p1, p2))
-        edge_table = []
-        for edge in edges:
-            p1, p2 = edge
-            if p1[1] < p2[1]:
-                ymin, ymax = p1[1], p2[1]
-                x = p1[0]
-            else:
-                ymin, ymax = p2[1], p1[1]
-                x = p2[0]
-            dx = p2[0] - p1[0]
-            dy = p2[1] - p1[1]
-            inv_m = dx / dy if dy != 0 else 0
-            edge_table.append((ymin, ymax, x, inv_m))
-        edge_table.sort(key=lambda e: e[0])
-        active_edges = []
-        y = int(min_y)
-        while y <= int(max_y) and (active_edges or edge_table):
-            while edge_table and edge_table[0][0] <= y:
-                active_edges.append(edge_table.pop(0))
-                if debug:
-                    self.setup_plot(ax, 10)
-                    self.redraw_polygon(ax, close=True)
-                    for edge in active_edges:
-                        self.plot_point(ax, edge[2], y, color="red", size=3)
-                    ax.figure.canvas.draw()
-                    ax.figure.canvas.flush_events()
-                    await asyncio.sleep(0.4)
-            active_edges = [e for e in active_edges if e[1] > y]
-            active_edges.sort(key=lambda e: e[2])
-            for i in range(0, len(active_edges), 2):
-                x_start = int(active_edges[i][2])
-                x_end = int(active_edges[i + 1][2]) if i + 1 < len(active_edges) else x_start
-                for x in range(x_start, x_end + 1):
-                    self.update_pixel_map(x, y, self.fill_color)
-                    if debug:
-                        ax.plot(x, y, 's', color=self.fill_color, markersize=3)
-                        ax.figure.canvas.draw()
-                        ax.figure.canvas.flush_events()
-                        await asyncio.sleep(0.4)
-            for i in range(len(active_edges)):
-                ymin, ymax, x, inv_m = active_edges[i]
-                active_edges[i] = (ymin, ymax, x + inv_m, inv_m)
-            y += 1
-        # Сплошная заливка в конце
-        ax.fill([p[0] for p in self.points], [p[1] for p in self.points], color=self.fill_color)
-        return True
+        return (yield from self.play_fill(ax, basic_scanline_steps(self.points), debug))
 
-    async def flood_fill(self, ax, debug=False):
+    def scanline_fill(self, ax, debug=False):
         if len(self.points) < 3:
             return False
-        center_x = sum(p[0] for p in self.points) // len(self.points)
-        center_y = sum(p[1] for p in self.points) // len(self.points)
-        target_color = self.get_pixel_color(center_x, center_y)
-        if target_color == self.fill_color:
+        return (yield from self.play_fill(ax, active_edge_steps(self.points), debug))
+
+    def fill_seed(self):
+        return (int(sum(p[0] for p in self.points) // len(self.points)),
+                int(sum(p[1] for p in self.points) // len(self.points)))
+
+    def flood_fill(self, ax, debug=False):
+        if len(self.points) < 3:
             return False
-        stack = [(center_x, center_y)]
-        visited = set()
-        while stack:
-            x, y = stack.pop()
-            if (x, y) in visited:
-                continue
-            visited.add((x, y))
-            if 0 <= x < 100 and 0 <= y < 100 and self.get_pixel_color(x, y) == target_color:
-                self.update_pixel_map(x, y, self.fill_color)
-                if debug:
-                    ax.plot(x, y, 's', color=self.fill_color, markersize=3)
-                    ax.figure.canvas.draw()
-                    ax.figure.canvas.flush_events()
-                    await asyncio.sleep(0.4)
-                stack.extend([(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)])
-        # Сплошная заливка в конце
-        ax.fill([p[0] for p in self.points], [p[1] for p in self.points], color=self.fill_color)
-        return True
+        seed = self.fill_seed()
+        if self.get_pixel_color(*seed) == self.fill_color:
+            return False
+        return (yield from self.play_fill(ax, flood_fill_steps(self.pixel_map, seed), debug))
 
-    async def scanline_flood_fill(self, ax, debug=False):
+    def scanline_flood_fill(self, ax, debug=False):
         if len(self.points) < 3:
             return False
-        center_x = sum(p[0] for p in self.points) // len(self.points)
-        center_y = sum(p[1] for p in self.points) // len(self.points)
-        target_color = self.get_pixel_color(center_x, center_y)
-        if target_color == self.fill_color:
+        seed = self.fill_seed()
+        if self.get_pixel_color(*seed) == self.fill_color:
             return False
-        stack = [(center_x, center_y)]
-        while stack:
-            x, y = stack.pop()
-            left_x = x
-            while left_x >= 0 and self.get_pixel_color(left_x, y) == target_color:
-                left_x -= 1
-            left_x += 1
-            span_above = False
-            span_below = False
-            current_x = left_x
-            while current_x < 100 and self.get_pixel_color(current_x, y) == target_color:
-                self.update_pixel_map(current_x, y, self.fill_color)
-                if debug:
-                    ax.plot(current_x, y, 's', color=self.fill_color, markersize=3)
-                    ax.figure.canvas.draw()
-                    ax.figure.canvas.flush_events()
-                    await asyncio.sleep(0.4)
-                if y > 0:
-                    if not span_above and self.get_pixel_color(current_x, y - 1) == target_color:
-                        stack.append((current_x, y - 1))
-                        span_above = True
-                    elif span_above and self.get_pixel_color(current_x, y - 1) != target_color:
-                        span_above = False
-                if y < 99:
-                    if not span_below and self.get_pixel_color(current_x, y + 1) == target_color:
-                        stack.append((current_x, y + 1))
-                        span_below = True
-                    elif span_below and self.get_pixel_color(current_x, y + 1) != target_color:
-                        span_below = False
-                current_x += 1
-        # Сплошная заливка в конце
-        ax.fill([p[0] for p in self.points], [p[1] for p in self.points], color=self.fill_color)
-        return True
+        return (yield from self.play_fill(ax, scanline_flood_steps(self.pixel_map, seed), debug))
+
+    def parallel_scanline_fill(self, polygons, width=100, height=100, colors=None,
+                               workers=None, split="bands", target=None):
+        """Залить набор многоугольников в пуле процессов.
+
+        split="bands" делит растр на горизонтальные полосы, которые процессы заливают сами;
+        split="polygons" раздает процессам группы многоугольников для построения отрезков, а
+        заливка идет в текущем процессе. В обоих случаях порядок наложения тот же, что при
+        последовательной заливке.
+        Если target (SharedFramebuffer или MappedFramebuffer) передан, результат остается в нем
+        без копирования, иначе возвращается копия пикселей. Буфер без descriptor (например,
+        TiledFramebuffer) заливается в текущем процессе и возвращается сам.
+        Перед заливкой многоугольники отсекаются по растру, так что невидимые части не обрабатываются.
+        """
+        if colors is None:
+            colors = [self.fill_color] * len(polygons)
+        elif isinstance(colors, str):
+            colors = [colors] * len(polygons)
+        if target is not None:
+            width, height = target.width, target.height
+        # Окно шире растра на клетку: новые вершины на его границе не попадают на граничные строки
+        clipped, source = clip_polygons(polygons, (-1, -1, width + 1, height + 1))
+        jobs = [(points, FILL_COLORS.get(colors[i], colors[i])) for points, i in zip(clipped, source)]
+        if target is not None and not hasattr(target, "descriptor"):
+            _fill_rows(target, jobs, 0, target.height)
+            return target
+        workers = workers or os.cpu_count() or 1
+        owner = target is None
+        if owner:
+            target = SharedFramebuffer(width, height)
+        try:
+            if workers == 1:
+                # Буфер в файле заливается полосами сверху вниз, чтобы страницы затрагивались по порядку
+                band_rows = getattr(target, "band_rows", target.height)
+                bounds = np.minimum(np.arange(0, target.height + band_rows, band_rows), target.height)
+                for task in _band_tasks(jobs, bounds):
+                    _fill_rows(target, *task)
+            elif split == "bands":
+                bands = min(workers * 4, target.height)
+                tasks = _band_tasks(jobs, np.linspace(0, target.height, bands + 1).astype(int))
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = [pool.submit(_fill_band, type(target), target.descriptor, *task) for task in tasks]
+                    for future in futures:
+                        future.result()
+            elif split == "polygons":
+                # Группы пишутся в порядке отправки, а не завершения: перекрытия ложатся как при
+                # последовательной заливке
+                chunk = max(1, -(-len(jobs) // (workers * 4)))
+                starts = range(0, len(jobs), chunk)
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = [pool.submit(_polygon_spans, jobs[i:i + chunk], 0, target.height) for i in starts]
+                    for i, future in zip(starts, futures):
+                        for (ys, x_starts, x_ends), (_, color) in zip(future.result(), jobs[i:i + chunk]):
+                            target.fill_spans(ys, x_starts, x_ends, color)
+            else:
+                raise ValueError(f"Неизвестный способ разбиения: {split}")
+            if owner:
+                return target.pixels.copy()
+            return target.pixels
+        finally:
+            if owner:
+                target.close()
+
+    @profiled()
+    def draw_polygon(self, points, segment_points, cell_size, ax, mode="По умолчанию", fill_color="black",
+                     outline_width=1):
+        run_steps(self.polygon_steps(points, segment_points, cell_size, ax, mode, fill_color, outline_width))
+
+    def start_debug(self, points, segment_points, cell_size, ax, mode="По умолчанию", fill_color="black",
+                    outline_width=1):
+        """Проигрыватель шагов выбранного режима; шаги вычисляются, только когда их показывают."""
+        return StepPlayer(ax, lambda: self.polygon_steps(points, segment_points, cell_size, ax, mode, fill_color,
+                                                         outline_width, debug=True), "PolygonEditor.start_debug")
 
-    async def draw_polygon(self, points, segment_points, cell_size, ax, mode="По умолчанию", fill_color="black", debug=False):
+    def polygon_steps(self, points, segment_points, cell_size, ax, mode="По умолчанию", fill_color="black",
+                      outline_width=1, debug=False):
+        """Генератор шагов режима mode; без debug шаги не выдаются и рисуется только итог."""
         self.points = points
         self.segment_points = segment_points
         self.fill_color = fill_color
-        self.pixel_map = np.zeros((100, 100, 3), dtype=np.uint8) + 255
-        for i in range(len(self.points)):
-            p1 = self.points[i]
-            p2 = self.points[(i + 1) % len(self.points)]
-            self.draw_line_on_pixel_map(p1, p2, "blue")
+        self.pixel_map[...] = 255
+        self.draw_outline_on_pixel_map("blue", outline_width)
         self.setup_plot(ax, cell_size)
         self.redraw_polygon(ax, close=True)
         if self.is_self_intersecting(self.points):
@@ -536,24 +550,37 @@ class PolygonEditor:
         if mode == "Нормали":
             self.show_normals(ax)
         elif mode == "Грэхем":
-            await self.graham_hull(ax, debug=debug)
+            yield from self.graham_hull(ax, debug=debug)
         elif mode == "Джарвис":
-            await self.jarvis_hull(ax, debug=debug)
+            yield from self.jarvis_hull(ax, debug=debug)
         elif mode == "Пересечения":
             self.draw_segment(ax)
-            await self.find_intersections(ax, debug=debug)
+            yield from self.find_intersections(ax, debug=debug)
         elif mode == "Простая развертка":
-            await self.basic_scanline(ax, debug=debug)
+            yield from self.basic_scanline(ax, debug=debug)
         elif mode == "Развертка с активными ребрами":
-            await self.scanline_fill(ax, debug=debug)
+            yield from self.scanline_fill(ax, debug=debug)
         elif mode == "Заливка с затравкой":
-            await self.flood_fill(ax, debug=debug)
+            yield from self.flood_fill(ax, debug=debug)
         elif mode == "Построчная заливка":
-            await self.scanline_flood_fill(ax, debug=debug)
+            yield from self.scanline_flood_fill(ax, debug=debug)
+        elif mode == "Отсечение":
+            if len(segment_points) < 2:
+                print("Ошибка: для отсечения требуется окно из 2 точек или многоугольник")
+                return
+            yield from self.clip_polygon(ax, debug=debug)
+        elif mode == "Отсечение отрезков":
+            if len(segment_points) < 2 or len(segment_points) % 2:
+                print("Ошибка: для отсечения отрезков требуются пары точек")
+                return
+            if not self.is_convex_polygon(self.points):
+                print("Ошибка: отрезки отсекаются только выпуклым многоугольником")
+                return
+            yield from self.clip_segment_pairs(ax, debug=debug)
         elif mode == "Проверка точки":
             if len(segment_points) != 1:
                 print("Ошибка: для проверки точки требуется ровно одна точка")
                 return
-            await self.is_point_inside(segment_points[0], ax, debug=debug)
+            yield from self.is_point_inside(segment_points[0], ax, debug=debug)
         elif mode == "По умолчанию":
             self.draw_segment(ax)
\ No newline at end of file
@@ -0,0 +1,171 @@
+import json
+import time
+import inspect
+import functools
+from collections import deque
+from contextlib import contextmanager
+
+# Сколько отдельных интервалов хранить на вызов для файла трассы (plot_pixel вызывается на каждый пиксель)
+MAX_SPANS = 20000
+
+
+class Record:
+    """Замер одного вызова: общее время, собственное время фаз, число их вызовов и счетчики."""
+
+    def __init__(self, name, info):
+        self.name = name
+        self.info = info
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+        self.phases = {}
+        self.calls = {}
+        self.counters = {}
+        self.spans = []
+
+    def add_phase(self, name, self_time, start, duration, depth):
+        self.phases[name] = self.phases.get(name, 0.0) + self_time
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if len(self.spans) < MAX_SPANS:
+            self.spans.append((name, start, duration, depth))
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self):
+        """Строка для панели состояния: фазы по убыванию собственного времени и счетчики."""
+        phases = ", ".join(
+            f"{name} {seconds * 1000:.1f}" + (f" ×{self.calls[name]}" if self.calls[name] > 1 else "")
+            for name, seconds in sorted(self.phases.items(), key=lambda item: -item[1]))
+        counters = ", ".join(f"{name}={value}" for name, value in self.counters.items())
+        return f"{self.name}: {self.elapsed * 1000:.1f} мс ({phases})" + (f"; {counters}" if counters else "")
+
+    def to_dict(self):
+        return {"name": self.name, "info": self.info, "elapsed": self.elapsed, "phases": self.phases,
+                "calls": self.calls, "counters": self.counters}
+
+
+class Profiler:
+    """Сбор замеров вызовов рисовальщиков; выключенный профилировщик сводится к проверке enabled."""
+
+    def __init__(self, history=100):
+        self.enabled = False
+        self.records = deque(maxlen=history)
+        self.listeners = []
+        self.origin = time.perf_counter()
+        self._record = None
+        self._stack = []
+
+    @property
+    def active(self):
+        return self._record
+
+    def clear(self):
+        self.records.clear()
+
+    @contextmanager
+    def call(self, name, ax=None, info=None):
+        """Замер вызова верхнего уровня; внутри другого замера работает как фаза."""
+        if not self.enabled:
+            yield None
+            return
+        if self._record is not None:
+            with self.phase(name):
+                yield self._record
+            return
+        record = self._record = Record(name, info or {})
+        canvas = connection = None
+        if ax is not None:
+            # Каждая перерисовка холста во время вызова — шаг отладки или итоговый вывод
+            canvas = ax.figure.canvas
+            connection = canvas.mpl_connect("draw_event", lambda event: record.count("canvas_draws"))
+        try:
+            with self.phase(name):
+                yield record
+        finally:
+            if connection is not None:
+                canvas.mpl_disconnect(connection)
+            record.elapsed = time.perf_counter() - record.start
+            self._record = None
+            self._stack.clear()
+            if ax is not None:
+                for kind in ("patches", "lines", "collections", "images"):
+                    if getattr(ax, kind):
+                        record.counters[kind] = len(getattr(ax, kind))
+            self.records.append(record)
+            for listener in self.listeners:
+                listener(record)
+
+    @contextmanager
+    def phase(self, name):
+        """Фаза текущего замера; собственное время фазы не включает вложенные фазы."""
+        record = self._record
+        if record is None:
+            yield
+            return
+        frame = [time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - frame[0]
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1][1] += duration
+            record.add_phase(name, duration - frame[1], frame[0], duration, len(self._stack))
+
+    def count(self, name, n=1):
+        if self._record is not None:
+            self._record.count(name, n)
+
+    def trace_events(self):
+        """События в формате Chrome Trace Event (chrome://tracing, Perfetto)."""
+        events = []
+        for index, record in enumerate(self.records):
+            for name, start, duration, depth in record.spans:
+                event = {"name": name, "ph": "X", "pid": 0, "tid": 0,
+                         "ts": (start - self.origin) * 1e6, "dur": duration * 1e6}
+                if depth == 0:
+                    event["args"] = {**record.info, **record.counters, "record": index}
+                events.append(event)
+        return events
+
+    def save_trace(self, path):
+        """Записать файл трассы: события для просмотрщика и сводку по каждому вызову."""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": self.trace_events(),
+                       "records": [record.to_dict() for record in self.records]}, file, ensure_ascii=False, default=str)
+
+
+PROFILER = Profiler()
+
+
+def _scalar_arguments(parameters, args, kwargs):
+    values = dict(zip(parameters, args))
+    values.update(kwargs)
+    return {key: value for key, value in values.items()
+            if key != "self" and isinstance(value, (bool, int, float, str))}
+
+
+def profiled(name=None, phase=False):
+    """Декоратор точки входа: замер вызова (или фазы при phase=True), если PROFILER включен."""
+    def decorate(func):
+        label = name or func.__qualname__
+        parameters = list(inspect.signature(func).parameters)
+        ax_index = parameters.index("ax") if "ax" in parameters else None
+
+        def context(args, kwargs):
+            if phase:
+                return PROFILER.phase(label)
+            ax = kwargs.get("ax")
+            if ax is None and ax_index is not None and ax_index < len(args):
+                ax = args[ax_index]
+            return PROFILER.call(label, ax, _scalar_arguments(parameters, args, kwargs))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return func(*args, **kwargs)
+            with context(args, kwargs):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
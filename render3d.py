@@ -0,0 +1,160 @@
+import numpy as np
+
+# Плоскости отсечения задаются по w: после матрицы перспективы CubeDrawer w = 1 - z / d,
+# то есть расстояние до наблюдателя в единицах d; w <= 0 — точки позади глаза
+NEAR = 0.05
+FAR = 100.0
+LIGHT = np.array([0.3, 0.4, 0.87])
+
+
+def _plane_distance(w, near, far):
+    return w - near, far - w
+
+
+def clip_segments_mask(segments, near=NEAR, far=FAR):
+    """Отсечь отрезки (..., 2, 4) на месте; возвращает маску отрезков, оставшихся хотя бы частично."""
+    keep = np.ones(segments.shape[:-2], dtype=bool)
+    for distance in _plane_distance(segments[..., 3], near, far):
+        inside = distance >= 0
+        keep &= inside.any(axis=-1)
+        for end in (0, 1):
+            # Вышедший конец переносится в точку пересечения; интерполяция до деления на w линейна
+            moved = ~inside[..., end] & inside[..., 1 - end]
+            t = distance[moved][:, end] / (distance[moved][:, end] - distance[moved][:, 1 - end])
+            segments[moved, end] += t[:, None] * (segments[moved, 1 - end] - segments[moved, end])
+    return keep
+
+
+def clip_segments(segments, near=NEAR, far=FAR):
+    """Отсечь отрезки (E, 2, 4) в однородных координатах ближней и дальней плоскостями по w."""
+    segments = np.array(segments, dtype=float).reshape(-1, 2, 4)
+    return segments[clip_segments_mask(segments, near, far)]
+
+
+def _clip_triangles_plane(triangles, distance, ids):
+    inside = distance >= 0
+    count = inside.sum(axis=1)
+    result = [triangles[count == 3]]
+    result_ids = [ids[count == 3]]
+    for kept in (1, 2):
+        selected = count == kept
+        if not selected.any():
+            continue
+        tri, dist, flags = triangles[selected], distance[selected], inside[selected]
+        # Циклический сдвиг вершин сохраняет обход: первой ставится «особая» вершина
+        # (единственная снаружи при kept == 2 и единственная внутри при kept == 1)
+        first = np.argmax(flags == (kept == 1), axis=1)
+        order = (first[:, None] + np.arange(3)) % 3
+        tri = np.take_along_axis(tri, order[:, :, None], axis=1)
+        dist = np.take_along_axis(dist, order, axis=1)
+        a, b, c = tri[:, 0], tri[:, 1], tri[:, 2]
+        ab = a + (dist[:, 0] / (dist[:, 0] - dist[:, 1]))[:, None] * (b - a)
+        ac = a + (dist[:, 0] / (dist[:, 0] - dist[:, 2]))[:, None] * (c - a)
+        if kept == 1:
+            result.append(np.stack((a, ab, ac), axis=1))
+            result_ids.append(ids[selected])
+        else:
+            result.append(np.concatenate((np.stack((ab, b, c), axis=1), np.stack((ab, c, ac), axis=1))))
+            result_ids.append(np.tile(ids[selected], 2))
+    return np.concatenate(result), np.concatenate(result_ids)
+
+
+def clip_triangles(triangles, near=NEAR, far=FAR):
+    """Отсечь треугольники (T, 3, 4) плоскостями по w; возвращает треугольники и индексы исходных."""
+    triangles = np.asarray(triangles, dtype=float).reshape(-1, 3, 4)
+    ids = np.arange(len(triangles))
+    for plane in (0, 1):
+        distance = _plane_distance(triangles[:, :, 3], near, far)[plane]
+        triangles, ids = _clip_triangles_plane(triangles, distance, ids)
+    return triangles, ids
+
+
+def to_screen(clip, width=100, height=100):
+    """Деление на w и перевод в координаты графика, как в CubeDrawer.project; возвращает (xy, 1/w)."""
+    inverse_w = 1 / clip[..., 3]
+    scale = min(width, height) / 3
+    xy = np.empty(clip.shape[:-1] + (2,))
+    xy[..., 0] = clip[..., 0] * inverse_w * scale + width / 2
+    xy[..., 1] = -clip[..., 1] * inverse_w * scale + height / 2
+    return xy, inverse_w
+
+
+def signed_areas(xy):
+    """Удвоенные ориентированные площади треугольников (..., 3, 2) на экране."""
+    ab = xy[..., 1, :] - xy[..., 0, :]
+    ac = xy[..., 2, :] - xy[..., 0, :]
+    return ab[..., 0] * ac[..., 1] - ab[..., 1] * ac[..., 0]
+
+
+def front_facing(xy, flipped=False):
+    """Маска лицевых граней; flipped — признак отражения, число или массив по треугольникам."""
+    # Обход против часовой стрелки снаружи становится по часовой после отражения оси y в проекции
+    return signed_areas(xy) * np.where(flipped, -1.0, 1.0) < 0
+
+
+def flat_shading(xyz, color, ambient=0.25):
+    """Цвет граней по Ламберту для треугольников (T, 3, 3) после деления на w."""
+    normals = np.cross(xyz[:, 1] - xyz[:, 0], xyz[:, 2] - xyz[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    lengths[lengths == 0] = 1
+    intensity = ambient + (1 - ambient) * np.abs(normals @ LIGHT) / lengths
+    return np.clip(np.asarray(color, dtype=float) * intensity[:, None], 0, 255)
+
+
+class ZBuffer:
+    """Буфер глубины к буферу кадра: хранит 1/w, больше — ближе к наблюдателю."""
+
+    def __init__(self, framebuffer):
+        self.framebuffer = framebuffer
+        self.depth = np.full((framebuffer.height, framebuffer.width), -np.inf, dtype=np.float32)
+
+    def clear(self):
+        self.depth.fill(-np.inf)
+
+    def draw_triangles(self, xy, depth, colors, chunk=1 << 21):
+        """Закрасить треугольники (T, 3, 2) в клетках с тестом глубины; depth — 1/w вершин (T, 3)."""
+        width, height = self.framebuffer.width, self.framebuffer.height
+        low = np.maximum(np.floor(xy.min(axis=1)).astype(np.int64), 0)
+        high = np.minimum(np.ceil(xy.max(axis=1)).astype(np.int64) - 1, (width - 1, height - 1))
+        sizes = np.maximum(high - low + 1, 0)
+        counts = sizes[:, 0] * sizes[:, 1]
+        areas = signed_areas(xy)
+        valid = (counts > 0) & (areas != 0)
+        triangles = np.flatnonzero(valid)
+        # Треугольники обрабатываются группами, чтобы число фрагментов за проход было ограничено
+        cumulative = np.cumsum(counts[triangles])
+        start = 0
+        while start < len(triangles):
+            base = cumulative[start - 1] if start else 0
+            stop = max(int(np.searchsorted(cumulative, base + chunk, side='right')), start + 1)
+            self._draw_chunk(triangles[start:stop], xy, depth, colors, low, sizes, counts, areas)
+            start = stop
+
+    def _draw_chunk(self, triangles, xy, depth, colors, low, sizes, counts, areas):
+        if not len(triangles):
+            return
+        chunk_counts = counts[triangles]
+        owner = np.repeat(triangles, chunk_counts)
+        k = np.arange(chunk_counts.sum()) - np.repeat(np.cumsum(chunk_counts) - chunk_counts, chunk_counts)
+        px = low[owner, 0] + k % sizes[owner, 0]
+        py = low[owner, 1] + k // sizes[owner, 0]
+        cx, cy = px + 0.5, py + 0.5
+        a, b, c = xy[owner, 0], xy[owner, 1], xy[owner, 2]
+        w0 = ((c[:, 0] - b[:, 0]) * (cy - b[:, 1]) - (c[:, 1] - b[:, 1]) * (cx - b[:, 0])) / areas[owner]
+        w1 = ((a[:, 0] - c[:, 0]) * (cy - c[:, 1]) - (a[:, 1] - c[:, 1]) * (cx - c[:, 0])) / areas[owner]
+        w2 = 1 - w0 - w1
+        inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0)
+        owner, px, py = owner[inside], px[inside], py[inside]
+        # 1/w линейно зависит от экранных координат, поэтому интерполируется барицентрически
+        z = (w0[inside] * depth[owner, 0] + w1[inside] * depth[owner, 1] + w2[inside] * depth[owner, 2])
+        index = py * self.framebuffer.width + px
+        order = np.lexsort((-z, index))
+        index, z, owner = index[order], z[order], owner[order]
+        first = np.ones(len(index), dtype=bool)
+        first[1:] = index[1:] != index[:-1]
+        index, z, owner = index[first], z[first], owner[first]
+        closer = z > self.depth.ravel()[index]
+        index, z, owner = index[closer], z[closer], owner[closer]
+        self.depth.ravel()[index] = z
+        ys, xs = np.divmod(index, self.framebuffer.width)
+        self.framebuffer.set_pixels(xs, ys, colors[owner])
@@ -0,0 +1,290 @@
+from abc import ABC, abstractmethod
+import numpy as np
+from framebuffer import Framebuffer
+from kernels import (line_cells, dda_segments, scanline_spans, spans_to_cells, stroke_spans, run_steps,
+                     delaunay_steps, triangle_edges, FortuneVoronoi)
+from conics import circles_batch, ellipses_batch, hyperbola_quadrant, parabola_half, mirror_quadrant
+from curves import CurveDrawer, rasterize_polyline
+from cube import CubeDrawer
+from polygon import FILL_COLORS
+
+BLACK = (0, 0, 0)
+BLUE = FILL_COLORS["blue"]
+
+
+def _union(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+def _overlaps(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+class SceneNode(ABC):
+    """Узел сцены: хранит растеризацию (клетки, покрытие, цвета) и ограничивающий прямоугольник."""
+
+    def __init__(self, color=BLACK, **params):
+        self.color = color
+        self.params = params
+        self.dirty = True
+        self.cells = np.empty((0, 2), dtype=np.int64)
+        self.coverage = None
+        self.colors = None
+        self.bbox = None
+
+    def update(self, **params):
+        """Изменить параметры узла; перерастеризация произойдет при следующей перерисовке сцены."""
+        self.color = params.pop("color", self.color)
+        self.params.update(params)
+        self.dirty = True
+
+    @abstractmethod
+    def rasterize(self, scene):
+        """Вернуть клетки (N, 2) узла в координатах сцены или кортеж (клетки, покрытие, цвета).
+
+        Покрытие (N,) в долях 0..1 смешивается с буфером, цвета (N, 3) заменяют цвет узла;
+        любой из них может быть None.
+        """
+
+    def refresh(self, scene):
+        result = self.rasterize(scene)
+        cells, coverage, colors = result if isinstance(result, tuple) else (result, None, None)
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        inside = (cells[:, 0] >= 0) & (cells[:, 0] < scene.width) & (cells[:, 1] >= 0) & (cells[:, 1] < scene.height)
+        self.cells = cells[inside]
+        self.coverage = None if coverage is None else np.asarray(coverage)[inside]
+        self.colors = None if colors is None else np.asarray(colors)[inside]
+        if len(self.cells):
+            self.bbox = (*(int(v) for v in self.cells.min(axis=0)), *(int(v) for v in self.cells.max(axis=0)))
+        else:
+            self.bbox = None
+        self.dirty = False
+
+    def composite(self, framebuffer, region):
+        x_min, y_min, x_max, y_max = region
+        cells = self.cells
+        inside = (cells[:, 0] >= x_min) & (cells[:, 0] <= x_max) & (cells[:, 1] >= y_min) & (cells[:, 1] <= y_max)
+        color = self.color if self.colors is None else self.colors[inside]
+        if self.coverage is None:
+            framebuffer.set_pixels(cells[inside, 0], cells[inside, 1], color)
+        else:
+            framebuffer.blend_pixels(cells[inside, 0], cells[inside, 1], color, self.coverage[inside])
+
+
+class LineNode(SceneNode):
+    """Отрезок (x0, y0)-(x1, y1) в клетках; method — 1 (ЦДА), 2 (Брезенхем) или 3 (Ву)."""
+
+    def __init__(self, x0, y0, x1, y1, method=2, color=BLACK):
+        super().__init__(color, x0=x0, y0=y0, x1=x1, y1=y1, method=method)
+
+    def rasterize(self, scene):
+        p = self.params
+        cells, coverage = line_cells(p["method"], p["x0"], p["y0"], p["x1"], p["y1"])
+        if p["method"] != 3:
+            return cells
+        # Для сглаженной линии покрытие хранится как доля смешивания
+        visible = coverage > 0
+        return cells[visible], coverage[visible], None
+
+
+class ConicNode(SceneNode):
+    """Окружность, эллипс, гипербола или парабола с центром (xc, yc) в клетках."""
+
+    def __init__(self, conic_type, xc, yc, a=0, b=0, p=0, color=BLACK):
+        super().__init__(color, conic_type=conic_type, xc=xc, yc=yc, a=a, b=b, p=p)
+
+    def rasterize(self, scene):
+        p = self.params
+        center = np.rint([p["xc"], p["yc"]]).astype(np.int64)
+        if p["conic_type"] == "Circle":
+            return circles_batch([center], [p["a"]])
+        if p["conic_type"] == "Ellipse":
+            return ellipses_batch([center], [(p["a"], p["b"])])
+        x_limit = max(center[0], scene.width - center[0])
+        y_limit = max(center[1], scene.height - center[1])
+        if p["conic_type"] == "Hyperbola":
+            return mirror_quadrant(*hyperbola_quadrant(p["a"], p["b"], x_limit, y_limit)) + center
+        xs, ys = parabola_half(p["p"], x_limit, y_limit)
+        return np.concatenate((np.column_stack((xs, ys)), np.column_stack((-xs[xs > 0], ys[xs > 0])))) + center
+
+
+class CurveNode(SceneNode):
+    """Кривая любого типа из CurveDrawer по контрольным точкам в клетках."""
+
+    def __init__(self, curve_type, points, tolerance=0.5, color=BLACK, **options):
+        super().__init__(color, curve_type=curve_type, points=points, tolerance=tolerance, **options)
+        self.drawer = CurveDrawer()
+
+    def rasterize(self, scene):
+        p = dict(self.params)
+        # Те же точки, что рисует draw_curve; проверка числа точек остается в CurveDrawer
+        points = self.drawer.curve_points(p.pop("curve_type"), p.pop("points"), p.pop("tolerance"), **p)
+        return rasterize_polyline(points) if len(points) else np.empty((0, 2), dtype=np.int64)
+
+
+class CubeNode(SceneNode):
+    """Каркас куба с параметрами преобразования CubeDrawer."""
+
+    def __init__(self, transform_params=None, color=BLACK):
+        super().__init__(color, transform_params=dict(transform_params or {}))
+        self.drawer = CubeDrawer()
+
+    def rasterize(self, scene):
+        matrix = self.drawer.composed_matrix(self.params["transform_params"])
+        # Проекция отражает ось y, как и в CubeDrawer.draw_cube
+        return dda_segments(self.drawer.visible_edge_segments(matrix, scene.width, scene.height))
+
+
+class StrokeNode(SceneNode):
+    """Ломаная толщиной width в клетках со стыками join и концами cap."""
+
+    def __init__(self, points, width, join="miter", cap="butt", closed=False, color=BLACK):
+        super().__init__(color, points=points, width=width, join=join, cap=cap, closed=closed)
+
+    def rasterize(self, scene):
+        p = self.params
+        points = np.asarray(p["points"], dtype=float)
+        return spans_to_cells(*stroke_spans(points, p["width"], p["join"], p["cap"], p["closed"]))
+
+
+class PolygonNode(SceneNode):
+    """Многоугольник в клетках: контур толщиной outline_width и, при filled, заливка по строкам."""
+
+    def __init__(self, points, filled=False, color=BLACK, outline=BLUE, outline_width=1):
+        super().__init__(color, points=points, filled=filled, outline=outline, outline_width=outline_width)
+
+    def rasterize(self, scene):
+        points = np.asarray(self.params["points"], dtype=float)
+        cells = []
+        colors = []
+        if self.params["filled"] and len(points) >= 3:
+            ys, x_starts, x_ends = scanline_spans(points)
+            counts = np.maximum(x_ends - x_starts + 1, 0)
+            row = np.repeat(ys, counts)
+            xs = np.repeat(x_starts, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            cells.append(np.column_stack((xs, row)))
+            colors.append(np.broadcast_to(self.color, (len(xs), 3)))
+        width = self.params["outline_width"]
+        if width > 1:
+            outline = spans_to_cells(*stroke_spans(points, width, closed=True))
+        else:
+            outline = rasterize_polyline(np.vstack((points, points[:1])))
+        cells.append(outline)
+        colors.append(np.broadcast_to(self.params["outline"], (len(outline), 3)))
+        # Цвета заливки и контура различаются, поэтому они задаются попиксельно
+        return np.concatenate(cells), None, np.concatenate(colors)
+
+
+class PointSetNode(SceneNode):
+    """Набор точек в клетках с триангуляцией Делоне или диаграммой Вороного."""
+
+    def __init__(self, points, mode="delaunay", color=BLUE):
+        super().__init__(color, points=points, mode=mode)
+
+    def rasterize(self, scene):
+        points = [tuple(p) for p in self.params["points"]]
+        segments = []
+        if self.params["mode"] == "delaunay":
+            segments = triangle_edges(run_steps(delaunay_steps(points)))
+        elif self.params["mode"] == "voronoi":
+            # Алгоритм Форчуна обрезает ребра по области графика [0, 100], поэтому считаем в его единицах
+            plot_points = [(x * scene.cell_size, y * scene.cell_size) for x, y in points]
+            segments = FortuneVoronoi().voronoi_segments(plot_points) / scene.cell_size
+        cells = [np.floor(np.asarray(points, dtype=float)).astype(np.int64)]
+        for p1, p2 in segments:
+            cells.append(rasterize_polyline(np.array([p1, p2], dtype=float)))
+        return np.concatenate(cells)
+
+
+class Scene:
+    """Сцена с сохранением состояния: узлы кэшируют растеризацию, перерисовываются только поврежденные области.
+
+    Все параметры узлов (координаты, радиусы, толщины) задаются в клетках сцены размером cell_size
+    единиц графика; точки из единиц графика (0..100) перед созданием узла делятся на cell_size.
+    """
+
+    def __init__(self, cell_size=1, background=255):
+        self.background = background
+        self.nodes = []
+        self.damage = []
+        self.image = None
+        self.resize(cell_size)
+
+    def resize(self, cell_size):
+        self.cell_size = int(max(1, cell_size))
+        size = -(-100 // self.cell_size)
+        self.width = self.height = size
+        self.framebuffer = Framebuffer(size, size, background=self.background)
+        for node in self.nodes:
+            node.dirty = True
+        self.damage = [(0, 0, size - 1, size - 1)]
+        self.image = None
+
+    def add(self, node):
+        """Добавить узел; растеризация идет до добавления, и узел с ошибкой в сцену не попадает."""
+        node.refresh(self)
+        self.nodes.append(node)
+        if node.bbox is not None:
+            self.damage.append(node.bbox)
+        return node
+
+    def remove(self, node):
+        self.nodes.remove(node)
+        if node.bbox is not None:
+            self.damage.append(node.bbox)
+
+    def clear(self):
+        self.nodes = []
+        self.damage = [(0, 0, self.width - 1, self.height - 1)]
+
+    def merged_damage(self):
+        """Объединить пересекающиеся поврежденные прямоугольники."""
+        regions = []
+        for region in self.damage:
+            merged = True
+            while merged:
+                merged = False
+                for other in regions:
+                    if _overlaps(region, other):
+                        regions.remove(other)
+                        region = _union(region, other)
+                        merged = True
+                        break
+            regions.append(region)
+        return regions
+
+    def redraw(self):
+        """Перерастеризовать измененные узлы и перекомпоновать только поврежденные области."""
+        for node in self.nodes:
+            if node.dirty:
+                old = node.bbox
+                node.refresh(self)
+                damaged = _union(old, node.bbox)
+                if damaged is not None:
+                    self.damage.append(damaged)
+        regions = self.merged_damage()
+        for region in regions:
+            self.framebuffer.fill_rect(*region, self.background)
+            for node in self.nodes:
+                if node.bbox is not None and _overlaps(node.bbox, region):
+                    node.composite(self.framebuffer, region)
+        self.damage = []
+        return regions
+
+    def show(self, ax):
+        """Показать буфер сцены на осях; повторные вызовы только обновляют данные изображения."""
+        self.redraw()
+        if self.image is None or self.image not in ax.images:
+            ax.clear()
+            ax.set_aspect("equal")
+            extent = (0, self.width * self.cell_size, 0, self.height * self.cell_size)
+            self.image = ax.imshow(self.framebuffer.pixels, origin="lower", interpolation="nearest", extent=extent)
+            ax.set_xlim(0, 100)
+            ax.set_ylim(0, 100)
+        else:
+            self.image.set_data(self.framebuffer.pixels)
+        return self.image
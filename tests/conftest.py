@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Модули лежат в корне репозитория без пакета
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
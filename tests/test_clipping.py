@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+from kernels import sutherland_hodgman, clip_polygons, weiler_atherton, points_in_polygon
+
+
+def area(points):
+    x, y = points[:, 0], points[:, 1]
+    return abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2
+
+
+def star_polygon(rng, center, radius, count):
+    """Простой (обычно невыпуклый) многоугольник: вершины по возрастанию угла со случайным радиусом.
+
+    Промежуток между соседними углами меньше π, поэтому центр внутри и стороны не пересекаются.
+    """
+    count = max(count, 4)
+    angles = (np.arange(count) + rng.uniform(0, 0.5, count)) * 2 * np.pi / count
+    radii = rng.uniform(0.3, 1.0, count) * radius
+    return np.asarray(center) + np.column_stack((np.cos(angles), np.sin(angles))) * radii[:, None]
+
+
+def convex_polygon(rng, center, radius, count):
+    angles = np.sort(rng.uniform(0, 2 * np.pi, count))
+    return np.asarray(center) + np.column_stack((np.cos(angles), np.sin(angles))) * radius
+
+
+def sampled_area(subject, clip, resolution=400):
+    """Площадь пересечения по центрам ячеек сетки, покрывающей оба многоугольника."""
+    both = np.vstack((subject, clip))
+    (x0, y0), (x1, y1) = both.min(axis=0), both.max(axis=0)
+    xs = x0 + (np.arange(resolution) + 0.5) * (x1 - x0) / resolution
+    ys = y0 + (np.arange(resolution) + 0.5) * (y1 - y0) / resolution
+    grid = np.stack(np.meshgrid(xs, ys), axis=-1).reshape(-1, 2)
+    inside = points_in_polygon(subject, grid) & points_in_polygon(clip, grid)
+    return inside.sum() * (x1 - x0) * (y1 - y0) / resolution ** 2
+
+
+def test_weiler_atherton_matches_sutherland_hodgman_on_convex_clip():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        subject = star_polygon(rng, rng.uniform(-5, 5, 2), 10, rng.integers(3, 12))
+        clip = convex_polygon(rng, rng.uniform(-5, 5, 2), 8, rng.integers(3, 8))
+        expected = sutherland_hodgman(subject, clip)
+        parts = weiler_atherton(subject, clip)
+        assert sum(area(p) for p in parts) == pytest.approx(area(expected) if len(expected) else 0, abs=1e-6)
+
+
+def test_weiler_atherton_concave_clip_area():
+    rng = np.random.default_rng(1)
+    for _ in range(30):
+        subject = star_polygon(rng, rng.uniform(-3, 3, 2), 10, rng.integers(4, 10))
+        clip = star_polygon(rng, rng.uniform(-3, 3, 2), 10, rng.integers(4, 10))
+        parts = weiler_atherton(subject, clip)
+        total = sum(area(p) for p in parts)
+        both = np.vstack((subject, clip))
+        # Ошибка выборки — порядка периметра, умноженного на шаг сетки
+        tolerance = 0.01 * np.ptp(both, axis=0).prod()
+        assert total == pytest.approx(sampled_area(subject, clip), abs=tolerance)
+
+
+@pytest.mark.parametrize("subject, clip, expected", [
+    # Общие стороны y = 0 и y = 2
+    ([(0, 0), (2, 0), (2, 2), (0, 2)], [(1, 0), (3, 0), (3, 2), (1, 2)], 2.0),
+    # Совпадающие многоугольники
+    ([(0, 0), (2, 0), (2, 2), (0, 2)], [(0, 0), (2, 0), (2, 2), (0, 2)], 4.0),
+    # Вершина треугольника лежит на стороне квадрата
+    ([(1, 2), (3, 4), (-1, 4)], [(0, 0), (4, 0), (4, 4), (0, 4)], 3.5),
+    # Касание только по стороне: пересечения нет
+    ([(0, 0), (1, 0), (1, 1), (0, 1)], [(1, 0), (2, 0), (2, 1), (1, 1)], 0.0),
+    # Квадрат целиком внутри
+    ([(1, 1), (2, 1), (2, 2), (1, 2)], [(0, 0), (4, 0), (4, 4), (0, 4)], 1.0),
+])
+def test_weiler_atherton_degenerate_cases(subject, clip, expected):
+    parts = weiler_atherton(subject, clip)
+    assert sum(area(p) for p in parts) == pytest.approx(expected, abs=1e-6)
+
+
+def test_clip_polygons_matches_sutherland_hodgman():
+    rng = np.random.default_rng(2)
+    polygons = [star_polygon(rng, rng.uniform(-20, 120, 2), rng.uniform(1, 30), rng.integers(3, 10))
+                for _ in range(300)]
+    polygons += [np.array([(1.0, 1.0), (2.0, 2.0)]), np.array([(0.0, 0.0), (100.0, 0.0), (100.0, 100.0)])]
+    for window in ((0, 0, 100, 100), [(10, 0), (100, 40), (60, 100), (0, 70)]):
+        clipped, source = clip_polygons(polygons, window)
+        expected = {i: sutherland_hodgman(p, window) for i, p in enumerate(polygons) if len(p) >= 3}
+        expected = {i: p for i, p in expected.items() if len(p)}
+        assert list(source) == sorted(expected)
+        for i, part in zip(source, clipped):
+            assert area(part) == pytest.approx(area(expected[i]), rel=1e-9, abs=1e-9)
+            assert np.allclose(np.unique(np.round(part, 9), axis=0), np.unique(np.round(expected[i], 9), axis=0))
+
+
+def test_clip_polygons_snaps_onto_rectangle_edges():
+    # Вершины на левой стороне окна ложатся ровно на x = x_min
+    polygon = [(-12.21, 22.54), (14.21, 64.95), (-30.11, 93.84), (-54.61, 51.42), (-45.29, 3.75), (52.92, -1.22)]
+    (part,), _ = clip_polygons([polygon], (-1, -1, 128, 128))
+    assert part[:, 0].min() == -1
+    assert set(part[part[:, 0] < 0, 0]) == {-1}
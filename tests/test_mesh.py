@@ -0,0 +1,95 @@
+import struct
+import numpy as np
+import pytest
+from mesh import load_obj, load_ply, load_mesh
+
+SQUARE = [(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0), (0.5, 0.5, 1)]
+# Пирамида: квадратное основание и четыре треугольные грани
+FACES = [[0, 3, 2, 1], [0, 1, 4], [1, 2, 4], [2, 3, 4], [3, 0, 4]]
+
+
+def triangle_set(triangles):
+    return {tuple(sorted(t)) for t in np.asarray(triangles).tolist()}
+
+
+def expected_triangles(faces):
+    return {tuple(sorted((face[0], face[i], face[i + 1]))) for face in faces for i in range(1, len(face) - 1)}
+
+
+def expected_edges(faces):
+    return {tuple(sorted((face[i], face[(i + 1) % len(face)]))) for face in faces for i in range(len(face))}
+
+
+def check_pyramid(mesh, faces=FACES):
+    assert np.allclose(mesh.vertices, SQUARE)
+    assert triangle_set(mesh.triangles) == expected_triangles(faces)
+    assert {tuple(e) for e in mesh.edges.tolist()} == expected_edges(faces)
+
+
+def test_obj_negative_indices(tmp_path):
+    path = tmp_path / "pyramid.obj"
+    lines = ["# pyramid"] + [f"v {x} {y} {z}" for x, y, z in SQUARE]
+    # Отрицательный индекс -1 — последняя прочитанная вершина; текстурные индексы отбрасываются
+    lines += ["f -5/1 -2/1 -3/1 -4/1", "f 1 2 -1", "f 2//1 3//1 5//1", "f -3 -2 -1", "f 4 1 5", "l -5 -4"]
+    path.write_text("\n".join(lines) + "\n")
+    mesh = load_mesh(str(path))
+    check_pyramid(mesh)
+
+
+def test_obj_relative_to_current_vertex_count(tmp_path):
+    path = tmp_path / "two.obj"
+    path.write_text("v 0 0 0\nv 1 0 0\nv 0 1 0\nf -3 -2 -1\nv 1 1 0\nf -3 -2 -1\n")
+    mesh = load_obj(str(path))
+    assert triangle_set(mesh.triangles) == {(0, 1, 2), (1, 2, 3)}
+
+
+def ply_header(form, faces, count_type="uchar", extra=""):
+    return (f"ply\nformat {form} 1.0\ncomment test\nelement vertex {len(SQUARE)}\n"
+            "property float x\nproperty float y\nproperty float z\n"
+            f"element face {len(faces)}\nproperty list {count_type} int vertex_indices\n{extra}end_header\n")
+
+
+def test_ascii_ply(tmp_path):
+    path = tmp_path / "pyramid.ply"
+    body = "".join(f"{x} {y} {z}\n" for x, y, z in SQUARE)
+    body += "".join(f"{len(face)} {' '.join(map(str, face))}\n" for face in FACES)
+    path.write_text(ply_header("ascii", FACES) + body)
+    check_pyramid(load_ply(str(path)))
+
+
+def binary_ply(path, faces, order="<", extra_elements=b"", extra_header=""):
+    form = "binary_little_endian" if order == "<" else "binary_big_endian"
+    body = b"".join(struct.pack(order + "3f", *v) for v in SQUARE)
+    body += b"".join(struct.pack(order + f"B{len(face)}i", len(face), *face) for face in faces)
+    path.write_bytes(ply_header(form, faces, extra=extra_header).encode("ascii") + body + extra_elements)
+
+
+@pytest.mark.parametrize("order", ["<", ">"])
+@pytest.mark.parametrize("faces", [
+    FACES,
+    FACES[1:] + FACES[:1],
+    # Треугольник первым, затем четырехугольник, снова треугольники
+    [[0, 1, 4], [0, 3, 2, 1], [1, 2, 4], [2, 3, 4], [3, 0, 4]],
+    FACES[1:],
+])
+def test_binary_ply_faces(tmp_path, faces, order):
+    path = tmp_path / "pyramid.ply"
+    binary_ply(path, faces, order)
+    check_pyramid(load_ply(str(path)), faces)
+
+
+def test_binary_ply_trailing_bytes(tmp_path):
+    # Длина буфера не совпадает с размером элементов — чтение идет по записям и остается верным
+    path = tmp_path / "trailing.ply"
+    binary_ply(path, FACES[1:], extra_elements=b"\n\n")
+    check_pyramid(load_ply(str(path)), FACES[1:])
+
+
+def test_binary_ply_with_following_element(tmp_path):
+    path = tmp_path / "edges.ply"
+    edges = struct.pack("<2i", 0, 2) + struct.pack("<2i", 1, 3)
+    binary_ply(path, FACES[1:], extra_elements=edges,
+               extra_header="element edge 2\nproperty int vertex1\nproperty int vertex2\n")
+    mesh = load_ply(str(path))
+    assert triangle_set(mesh.triangles) == expected_triangles(FACES[1:])
+    assert {(0, 2), (1, 3)} <= {tuple(e) for e in mesh.edges.tolist()}
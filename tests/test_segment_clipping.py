@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from kernels import clip_segments, convex_window
+
+
+def sampled_interval(segments, window, samples=4001):
+    """Первый и последний t из равномерной выборки, при которых точка отрезка внутри окна."""
+    window = convex_window(window)
+    edges = np.roll(window, -1, axis=0) - window
+    t = np.linspace(0, 1, samples)
+    points = segments[:, None, :2] + t[:, None] * (segments[:, None, 2:] - segments[:, None, :2])
+    offset = points[:, :, None, :] - window
+    side = edges[:, 0] * offset[..., 1] - edges[:, 1] * offset[..., 0]
+    inside = np.all(side >= -1e-9, axis=-1)
+    visible = inside.any(axis=1)
+    first = np.where(visible, t[np.argmax(inside, axis=1)], np.nan)
+    last = np.where(visible, t[samples - 1 - np.argmax(inside[:, ::-1], axis=1)], np.nan)
+    return first, last, visible
+
+
+@pytest.mark.parametrize("window", [
+    (10, 20, 80, 70),
+    [(10, 0), (100, 40), (60, 100), (0, 70)],
+    [(50, 0), (100, 50), (50, 100), (0, 50)],
+])
+def test_clip_segments_matches_sampled_reference(window):
+    rng = np.random.default_rng(3)
+    segments = rng.uniform(-20, 120, (2000, 4))
+    t_enter, t_exit, visible = clip_segments(segments, window)
+    first, last, expected = sampled_interval(segments, window)
+    step = 1 / 4000
+    # Отрезок, задевающий окно на интервале короче шага выборки, выборка может пропустить
+    assert np.all(expected <= visible)
+    missed = visible & ~expected
+    assert np.all(t_exit[missed] - t_enter[missed] < step)
+    both = visible & expected
+    assert np.all(np.abs(t_enter[both] - first[both]) <= step)
+    assert np.all(np.abs(t_exit[both] - last[both]) <= step)
+
+
+@pytest.mark.parametrize("window", [(0, 0, 10, 10), [(0, 0), (10, 0), (10, 10), (0, 10), (-5, 5)]])
+def test_clip_segments_degenerate_cases(window):
+    segments = np.array([
+        (2, 0, 8, 0),      # вдоль стороны окна
+        (2, -1, 8, -1),    # параллельно стороне снаружи
+        (5, 5, 5, 5),      # нулевой длины внутри
+        (20, 5, 20, 5),    # нулевой длины снаружи
+        (-5, 5, 15, 5),    # насквозь
+        (10, 10, 20, 20),  # касается угла
+    ], dtype=float)
+    t_enter, t_exit, visible = clip_segments(segments, window)
+    assert list(visible) == [True, False, True, False, True, True]
+    assert t_enter[0] == 0 and t_exit[0] == 1
+    assert t_enter[2] == 0 and t_exit[2] == 1
+    assert t_exit[5] == pytest.approx(0)
+    if np.ndim(window) == 1:
+        assert (t_enter[4], t_exit[4]) == pytest.approx((0.25, 0.75))
+    else:
+        assert (t_enter[4], t_exit[4]) == pytest.approx((0.0, 0.75))